@@ -1,7 +1,24 @@
 import streamlit as st
+import altair as alt
 import pandas as pd
-from datetime import datetime
-import os
+from datetime import datetime, timedelta
+import time
+
+from parking_archive import Archiver, HistoryArchive
+from parking_config import (
+    ARCHIVE_DIR, CAPACITY, DB, DESTINATIONS, FILE, JOURNAL, LOT_CAPACITY, LOTS,
+)
+from parking_forecast import OccupancyForecaster
+from parking_metrics import observe, serve, span, timed
+from parking_overstay import OverstaySweeper
+from parking_profile import (
+    finish as finish_profile, profiled, start as start_profile, tag as tag_profile,
+)
+from parking_recommend import Recommender
+from parking_rollup import KEYS, WEEKDAYS, OccupancyRollup
+from parking_store import (
+    AlreadyParked, ExitBeforeEntry, LotFull, NotParked, ParkingStore, open_store,
+)
 
 # ------------------------
 # COLORS & CONSTANTS
@@ -11,96 +28,74 @@ ORANGE = "#FF6B35"    # Residents
 GREEN = "#2ECC71"     # Commuters
 BLUE = "#3498DB"      # Faculty
 
-FILE = "fairfield_parking.csv"
-
-# Category-level capacities
-CAPACITY = {
-    "Orange (Residents)": 320,   # total resident spaces
-    "Green (Commuters)": 480,    # total commuter spaces
-    "Blue (Faculty)": 200,       # total faculty spaces
-}
-
-# Specific lots inside each category (from the campus map)
-LOTS = {
-    "Orange (Residents)": [
-        "F-1", "F-2", "H-2", "I-1", "M-2"
-    ],
-    "Green (Commuters)": [
-        "B-1", "B-2", "B-3", "E-1", "H-1", "M-1", "N-1", "N-2"
-    ],
-    "Blue (Faculty)": [
-        "A-1", "A-2", "A-3",
-        "C-4", "C-5",
-        "D-1",
-        "G-1", "G-2", "G-3",
-        "J-1", "J-2", "J-3",
-        "K-1", "K-2", "K-3",
-        "O-1",
-    ],
-}
-
-# Destination → recommended lot per category
-DEST_RECOMMEND = {
-    "Barone Campus Center (BCC)": {
-        "Orange (Residents)": "H-2",
-        "Green (Commuters)": "B-1",
-        "Blue (Faculty)": "C-4",
-    },
-    "Dolan School of Business": {
-        "Orange (Residents)": "M-2",
-        "Green (Commuters)": "E-1",
-        "Blue (Faculty)": "D-1",
-    },
-    "RecPlex": {
-        "Orange (Residents)": "H-2",
-        "Green (Commuters)": "H-1",
-        "Blue (Faculty)": "G-1",
-    },
-    "Library": {
-        "Orange (Residents)": "F-1",
-        "Green (Commuters)": "B-2",
-        "Blue (Faculty)": "K-1",
-    },
-    "Townhouses": {
-        "Orange (Residents)": "F-2",
-        "Green (Commuters)": "N-1",
-        "Blue (Faculty)": "O-1",
-    },
-    "The Village / Regis area": {
-        "Orange (Residents)": "H-2",
-        "Green (Commuters)": "H-1",
-        "Blue (Faculty)": "J-1",
-    },
-    "Dolan Campus": {
-        "Orange (Residents)": "M-2",
-        "Green (Commuters)": "M-1",
-        "Blue (Faculty)": "D-1",
-    },
-}
+# How often the occupancy widgets on the group pages refresh themselves
+OCCUPANCY_REFRESH = "10s"
 
 # ------------------------
 # HELPERS
 # ------------------------
 
-def load_data():
-    """Load parking history from CSV, or create empty DataFrame."""
-    if os.path.exists(FILE) and os.path.getsize(FILE) > 0:
-        df = pd.read_csv(FILE, parse_dates=["Entry", "Exit"])
-    else:
-        df = pd.DataFrame(columns=["Plate", "Lot", "Entry", "Exit"])
-    for col in ["Plate", "Lot", "Entry", "Exit"]:
-        if col not in df.columns:
-            df[col] = None
-    return df
+@st.cache_resource
+def get_store() -> ParkingStore:
+    """Open the storage backend once per process (see PARKING_STORE)."""
+    return open_store(CAPACITY.keys(), JOURNAL, DB, legacy_csv=FILE)
+
+
+@st.cache_resource
+def get_archiver() -> Archiver:
+    """Moves old closed sessions out of the live store (see parking_archive)."""
+    return Archiver(get_store(), HistoryArchive(ARCHIVE_DIR))
+
+
+@st.cache_resource
+def get_sweeper() -> OverstaySweeper:
+    """Background overstay alerts, running whether or not Alerts is open."""
+    return OverstaySweeper(get_store()).start()
+
+
+@st.cache_resource
+def get_recommender() -> Recommender:
+    """Walking graph and per-destination lot rankings, built once."""
+    return Recommender()
+
+
+@st.cache_resource
+def get_rollup() -> OccupancyRollup:
+    """Hourly occupancy cube, rebuilt from all history once and kept current."""
+    return OccupancyRollup(get_store(), get_archiver().archive).start()
+
 
+@st.cache_resource
+def get_forecaster() -> OccupancyForecaster:
+    """Free-space forecasts from the rollup's weekly profile plus today's trend."""
+    return OccupancyForecaster(get_rollup())
 
-def save_data(df: pd.DataFrame):
-    df.to_csv(FILE, index=False)
 
+@st.cache_resource
+def get_metrics_server():
+    """/metrics on PARKING_METRICS_PORT when PARKING_METRICS=1 (see parking_metrics)."""
+    return serve()
 
-def active_in_group(df: pd.DataFrame, group: str) -> pd.DataFrame:
+
+def load_history_page(offset: int, limit: int, include_archive: bool, **filters):
+    """One page of history, newest first: live sessions, then archived ones.
+
+    Returns the page and the number of sessions matching ``filters``.
+    """
+    if not include_archive:
+        return get_store().history(offset, limit, **filters)
+    return get_archiver().page(offset, limit, **filters)
+
+
+def active_in_group(group: str) -> pd.DataFrame:
     """Return active cars in a group (Orange, Green, Blue)."""
-    return df[(df["Lot"] == group) & df["Exit"].isna()].copy()
+    with span("parking_active_in_group_seconds", group=group):
+        return get_store().active(group)
+
+
+def profile_requested() -> bool:
+    """``?profile=1`` in the URL (honoured with PARKING_PROFILE=query)."""
+    return st.query_params.get("profile") == "1"
 
 
 def format_free_spaces(free: int, capacity: int) -> str:
@@ -116,6 +111,8 @@ def format_free_spaces(free: int, capacity: int) -> str:
 # ------------------------
 # STREAMLIT SETUP & STYLES
 # ------------------------
+rerun_started = time.perf_counter()
+profile_run = start_profile("script", profile_requested())
 st.set_page_config(page_title="Fairfield U Parking", layout="wide")
 
 st.markdown("""
@@ -163,36 +160,28 @@ with col_header_right:
         width=130,
     )
 
-# Load data
-df = load_data()
+get_metrics_server()
+store = get_store()
+get_archiver().maybe_run()
+get_sweeper()
 
 # ------------------------
 # SIDEBAR: NAV + PARK IN / OUT
 # ------------------------
-with st.sidebar:
-    st.image(
-        "https://www.fairfield.edu/images/fairfield-university-logo.png",
-        width=100,
-    )
-    st.markdown(
-        "<h2 style='color:#E31837; margin-bottom:0;'>Navigation</h2>",
-        unsafe_allow_html=True,
-    )
 
-    page = st.radio(
-        "Go to",
-        [
-            "Orange Lot",
-            "Green Lot",
-            "Blue Lot",
-            "Alerts & Recommendations",
-            "Map & Walking",
-            "History",
-        ],
-        label_visibility="collapsed",
-    )
+@st.fragment
+@profiled("fragment", profile_requested)
+@timed("parking_streamlit_fragment_seconds", fragment="park_exit")
+def park_exit_panel():
+    """Park / Exit form plus live counters.
+
+    Runs as a fragment: clicking PARK IN / PARK OUT reruns only this panel,
+    not the header, page body or History table.
+    """
+    started = time.perf_counter()
+    store = get_store()
+    tag_profile(page=st.session_state.get("page"), action="interaction")
 
-    st.markdown("---")
     st.markdown(
         f"<h2 style='color:{RED}; margin-bottom:0.5rem;'>Park / Exit</h2>",
         unsafe_allow_html=True,
@@ -209,42 +198,104 @@ with st.sidebar:
         help="Orange = residents, Green = commuters, Blue = faculty.",
     )
 
+    # Physical lot, defaulting to the one with the most free spaces
+    usage = store.lot_usage()
+    lots = LOTS[lot_group]
+    lot_free = {lot: LOT_CAPACITY[lot] - usage[lot] for lot in lots}
+    lot_code = st.selectbox(
+        "Lot",
+        lots,
+        index=lots.index(max(lots, key=lot_free.get)),
+        format_func=lambda lot: f"{lot} ({lot_free[lot]} free)",
+    )
+
     c1, c2 = st.columns(2)
+    processed = False
 
     # PARK IN
     if c1.button("PARK IN", use_container_width=True):
+        tag_profile(action="PARK IN")
         if not plate:
             st.error("Please enter a license plate.")
-        elif plate in df[df["Exit"].isna()]["Plate"].values:
-            st.error("This plate is already parked on campus.")
-        elif len(active_in_group(df, lot_group)) >= CAPACITY[lot_group]:
-            st.error("This lot type is full. Choose another one.")
         else:
-            new = pd.DataFrame(
-                {
-                    "Plate": [plate],
-                    "Lot": [lot_group],
-                    "Entry": [datetime.now()],
-                    "Exit": [None],
-                }
-            )
-            df = pd.concat([df, new], ignore_index=True)
-            save_data(df)
-            st.success(f"{plate} parked in {lot_group}.")
-            st.rerun()
+            try:
+                store.park_in(
+                    plate, lot_group, datetime.now(), CAPACITY[lot_group],
+                    lot_code, LOT_CAPACITY[lot_code],
+                )
+            except AlreadyParked:
+                st.error("This plate is already parked on campus.")
+            except LotFull as full:
+                if str(full) == lot_code:
+                    st.error(f"Lot {lot_code} is full. Choose another lot.")
+                else:
+                    st.error("This lot type is full. Choose another one.")
+            else:
+                st.success(f"{plate} parked in lot {lot_code} ({lot_group}).")
+                processed = True
 
     # PARK OUT
     if c2.button("PARK OUT", use_container_width=True):
-        active_mask = (df["Plate"] == plate) & df["Exit"].isna()
+        tag_profile(action="PARK OUT")
         if not plate:
             st.error("Please enter a license plate.")
-        elif active_mask.any():
-            df.loc[active_mask, "Exit"] = datetime.now()
-            save_data(df)
-            st.success(f"{plate} exited campus parking.")
-            st.rerun()
         else:
-            st.error("That plate is not currently parked.")
+            try:
+                store.park_out(plate, datetime.now())
+            except NotParked:
+                st.error("That plate is not currently parked.")
+            except ExitBeforeEntry:
+                st.error("This exit is earlier than the car's entry. Check the clock.")
+            else:
+                st.success(f"{plate} exited campus parking.")
+                processed = True
+
+    # Live counters (rendered after the handlers so they include this car)
+    for group, capacity in CAPACITY.items():
+        used = store.count(group)
+        st.write(
+            f"**{group}**: {used} / {capacity} • "
+            f"{format_free_spaces(capacity - used, capacity)} free"
+        )
+
+    # Time per processed car, for this browser session
+    timings = st.session_state.setdefault("gate_timings_ms", [])
+    if processed:
+        timings.append((time.perf_counter() - started) * 1000)
+    if timings:
+        st.caption(
+            f"Last car processed in {timings[-1]:.0f} ms "
+            f"(avg {sum(timings) / len(timings):.0f} ms over {len(timings)} cars)"
+        )
+
+
+with st.sidebar:
+    st.image(
+        "https://www.fairfield.edu/images/fairfield-university-logo.png",
+        width=100,
+    )
+    st.markdown(
+        "<h2 style='color:#E31837; margin-bottom:0;'>Navigation</h2>",
+        unsafe_allow_html=True,
+    )
+
+    page = st.radio(
+        "Go to",
+        [
+            "Orange Lot",
+            "Green Lot",
+            "Blue Lot",
+            "Alerts & Recommendations",
+            "Map & Walking",
+            "Analytics",
+            "History",
+        ],
+        label_visibility="collapsed",
+        key="page",
+    )
+
+    st.markdown("---")
+    park_exit_panel()
 
     st.markdown("---")
     st.markdown("**Free space legend**")
@@ -272,19 +323,28 @@ def render_group_page(group_name: str, color: str, title_text: str, description:
     st.markdown("**🟢 plenty • 🟡 getting full • 🔴 full**")
     st.markdown("---")
 
+    group_occupancy(group_name)
+
+
+@st.fragment(run_every=OCCUPANCY_REFRESH)
+@timed("parking_streamlit_fragment_seconds", fragment="group_occupancy")
+def group_occupancy(group_name: str):
+    """Lots table and active cars for one group, refreshed on its own."""
+    store = get_store()
+
     # Specific lots table
     st.subheader("Lots in this category")
 
     rows = []
-    used_total = len(active_in_group(df, group_name))
-    free_total = CAPACITY[group_name] - used_total
+    usage = store.lot_usage()
     for lot_code in LOTS[group_name]:
+        capacity = LOT_CAPACITY[lot_code]
         rows.append(
             {
                 "Lot": lot_code,
-                "Total spaces (category)": CAPACITY[group_name],
-                "Currently parked (category)": used_total,
-                "Free spaces (category)": format_free_spaces(free_total, CAPACITY[group_name]),
+                "Total spaces": capacity,
+                "Currently parked": usage[lot_code],
+                "Free spaces": format_free_spaces(capacity - usage[lot_code], capacity),
             }
         )
 
@@ -298,7 +358,7 @@ def render_group_page(group_name: str, color: str, title_text: str, description:
     # Active cars in this category
     st.subheader("Cars currently parked here")
 
-    cur = active_in_group(df, group_name)
+    cur = active_in_group(group_name)
     if not cur.empty:
         cur = cur.copy()
         cur["Duration"] = (
@@ -312,7 +372,7 @@ def render_group_page(group_name: str, color: str, title_text: str, description:
             delta=f"{CAPACITY[group_name] - used} available",
         )
         st.dataframe(
-            cur[["Plate", "Entry", "Duration"]],
+            cur[["Plate", "LotCode", "Entry", "Duration"]].rename(columns={"LotCode": "Lot"}),
             use_container_width=True,
             hide_index=True,
         )
@@ -359,8 +419,7 @@ elif page == "Alerts & Recommendations":
     # Over-parked cars
     st.markdown("### ⏰ Cars parked longer than X hours")
 
-    active_all = df[df["Exit"].isna()].copy()
-    if active_all.empty:
+    if not any(store.count(g) for g in CAPACITY):
         st.info("No cars are currently parked on campus.")
     else:
         max_hours = st.slider(
@@ -370,16 +429,16 @@ elif page == "Alerts & Recommendations":
             value=4,
         )
         now = datetime.now()
-        active_all["Hours parked"] = (
-            now - pd.to_datetime(active_all["Entry"])
-        ).dt.total_seconds() / 3600
-        over = active_all[active_all["Hours parked"] > max_hours]
+        # range lookup on the entry-ordered index: only overstaying cars come back
+        over = store.parked_before(now - timedelta(hours=max_hours))
 
         if over.empty:
             st.success(f"No cars have been parked longer than {max_hours} hours.")
         else:
             over_display = over.copy()
-            over_display["Hours parked"] = over_display["Hours parked"].round(1)
+            over_display["Hours parked"] = (
+                (now - over_display["Entry"]).dt.total_seconds() / 3600
+            ).round(1)
             st.warning(f"Cars parked longer than {max_hours} hours:")
             st.dataframe(
                 over_display[["Plate", "Lot", "Entry", "Hours parked"]],
@@ -387,6 +446,17 @@ elif page == "Alerts & Recommendations":
                 hide_index=True,
             )
 
+    alerts = get_sweeper().since()
+    if alerts:
+        with st.expander(f"Overstay alerts raised in the background ({len(alerts)})"):
+            st.dataframe(
+                pd.DataFrame(alerts[::-1])[
+                    ["plate", "lot", "entry", "threshold_hours", "hours_parked"]
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+
     st.markdown("---")
 
     # Best lot recommendation
@@ -394,7 +464,7 @@ elif page == "Alerts & Recommendations":
 
     dest = st.selectbox(
         "Where are you heading?",
-        list(DEST_RECOMMEND.keys()),
+        DESTINATIONS,
     )
 
     cat_choice_label = st.radio(
@@ -410,20 +480,50 @@ elif page == "Alerts & Recommendations":
     }
     group = cat_to_group[cat_choice_label]
 
+    arrival = st.time_input("Arriving around", datetime.now().time().replace(second=0, microsecond=0))
+
     if st.button("Suggest a lot"):
-        rec = DEST_RECOMMEND.get(dest, {}).get(group)
-        used = len(active_in_group(df, group))
+        usage = store.lot_usage()
+        ranked = get_recommender().rank(dest, group, usage, limit=3)
+        used = store.count(group)
         free = CAPACITY[group] - used
-        if rec is None:
-            st.info("No specific suggestion available for that combination yet.")
+        now = datetime.now()
+        arrive_at = datetime.combine(now.date(), arrival)
+        if arrive_at < now - timedelta(minutes=1):
+            arrive_at += timedelta(days=1)
+        forecaster = get_forecaster()
+        if not ranked:
+            st.error(f"Every {group} lot is full right now.")
         else:
+            rec = ranked[0]
             st.success(
-                f"For **{cat_choice_label}** going to **{dest}**, a good choice is lot **{rec}** "
-                f"({group})."
+                f"For **{cat_choice_label}** going to **{dest}**, a good choice is lot "
+                f"**{rec['lot']}** ({group}), about {rec['walk_minutes']:.0f} min on foot."
+            )
+            st.write(
+                f"Free right now in lot {rec['lot']}: "
+                f"{format_free_spaces(rec['free'], rec['capacity'])} out of {rec['capacity']} spaces."
             )
+            if arrive_at > now + timedelta(minutes=5):
+                lot_free = forecaster.free_at(rec["lot"], arrive_at, usage.get(rec["lot"], 0), now)
+                st.write(
+                    f"Expected free in lot {rec['lot']} at {arrive_at:%H:%M}: "
+                    f"{format_free_spaces(lot_free, rec['capacity'])} out of {rec['capacity']} spaces."
+                )
+            if len(ranked) > 1:
+                st.dataframe(
+                    pd.DataFrame(ranked).rename(columns={
+                        "lot": "Lot", "walk_minutes": "Walk (min)", "free": "Free spaces",
+                        "capacity": "Total spaces", "score": "Score",
+                    }),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+            forecast_free = forecaster.free_at(group, arrive_at, used, now)
             st.write(
-                f"Estimated availability for this category: "
-                f"{format_free_spaces(free, CAPACITY[group])} out of {CAPACITY[group]} total spaces."
+                f"Estimated availability for this category at {arrive_at:%H:%M}: "
+                f"{format_free_spaces(forecast_free, CAPACITY[group])} out of "
+                f"{CAPACITY[group]} total spaces ({free} free right now)."
             )
 
 # ----- MAP & WALKING PAGE -----
@@ -435,16 +535,12 @@ elif page == "Map & Walking":
         "to help choose a parking area."
     )
 
-    walking_times = [
-        {"From - To": "Dolan Campus → BCC", "Minutes": 8},
-        {"From - To": "BCC → Dolan School of Business", "Minutes": 7},
-        {"From - To": "Townhouses → BCC", "Minutes": 8},
-        {"From - To": "Village → BCC", "Minutes": 4},
-        {"From - To": "Regis Hall → RecPlex", "Minutes": 4},
-        {"From - To": "Dolan Campus → Dolan School of Business", "Minutes": 15},
-    ]
-    st.subheader("Approximate walking times")
-    st.table(walking_times)
+    # shortest walks over the campus walking graph, destination to destination
+    walking_times = pd.DataFrame(
+        get_recommender().graph.table(DESTINATIONS, DESTINATIONS)
+    ).T.astype(int)
+    st.subheader("Approximate walking times (minutes)")
+    st.dataframe(walking_times, use_container_width=True)
 
     st.markdown("### Parking zones by area (summary)")
     st.write("**Near BCC / central campus**: C-4, C-5, B-1, B-2")
@@ -453,15 +549,109 @@ elif page == "Map & Walking":
     st.write("**Near Library / Kelley Center**: A-1, A-2, A-3, K-1, K-2, K-3")
     st.write("**Near Townhouse complex**: N-1, N-2, O-1")
 
+# ----- ANALYTICS -----
+elif page == "Analytics":
+    st.markdown("## Occupancy by weekday and hour")
+    st.write(
+        "Average number of cars parked in each hour of the week, over every closed "
+        "session on record (archived history included)."
+    )
+
+    rollup = get_rollup()
+    place = st.selectbox("Group or lot", KEYS)
+    average, utilization = rollup.heatmap(place)
+    capacity = CAPACITY.get(place) or LOT_CAPACITY[place]
+
+    if not rollup.sessions:
+        st.info("No closed sessions yet, so there is nothing to chart.")
+    else:
+        cells = pd.DataFrame({
+            "Weekday": [day for day in WEEKDAYS for _ in range(24)],
+            "Hour": list(range(24)) * 7,
+            "Average parked": average.ravel().round(1),
+            "Utilization": utilization.ravel(),
+        })
+        st.altair_chart(
+            alt.Chart(cells).mark_rect().encode(
+                x=alt.X("Hour:O"),
+                y=alt.Y("Weekday:O", sort=WEEKDAYS),
+                color=alt.Color("Utilization:Q", scale=alt.Scale(domain=[0, 1], scheme="reds"),
+                                legend=alt.Legend(format="%")),
+                tooltip=["Weekday", "Hour", "Average parked",
+                         alt.Tooltip("Utilization:Q", format=".0%")],
+            ),
+            use_container_width=True,
+        )
+        busiest = divmod(int(utilization.argmax()), 24)
+        st.write(
+            f"Busiest hour: **{WEEKDAYS[busiest[0]]} {busiest[1]:02d}:00**, on average "
+            f"{average[busiest]:.0f} of {capacity} spaces taken "
+            f"({utilization[busiest]:.0%})."
+        )
+        st.caption(
+            f"{rollup.sessions:,} sessions, up to {rollup.watermark:%Y-%m-%d %H:%M}. "
+            "Refreshed in the background every minute."
+        )
+
+    if st.button("Rebuild from full history"):
+        rollup.rebuild(rollup.history())
+        st.rerun()
+
 # ----- HISTORY -----
 else:  # History
     st.markdown("## Full Parking History")
-    if df.empty:
-        st.info("No parking history yet. Start by parking a car in the sidebar.")
+
+    def first_page():
+        st.session_state["history_page"] = 1
+
+    archived_days = get_archiver().archive.dates()
+    col1, col2, col3 = st.columns(3)
+    plate = col1.text_input("Plate starts with", on_change=first_page).upper().strip()
+    group = col2.selectbox("Group", ["All groups"] + list(CAPACITY), on_change=first_page)
+    picked = col3.date_input("Entry dates", (), on_change=first_page)
+    if not isinstance(picked, tuple):
+        picked = (picked,)
+    include_archive = bool(archived_days) and st.checkbox(
+        f"Include archived sessions ({archived_days[0]} – {archived_days[-1]})",
+        on_change=first_page,
+    )
+    page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1, on_change=first_page)
+
+    filters = dict(
+        plate=plate or None,
+        group=None if group == "All groups" else group,
+        start=picked[0] if picked else None,
+        end=picked[-1] if picked else None,
+    )
+    page_no = st.session_state.get("history_page", 1)
+    rows, total = load_history_page((page_no - 1) * page_size, page_size, include_archive, **filters)
+    pages = max(1, -(-total // page_size))
+    if page_no > pages:  # filters shrank the result under the current page
+        page_no = st.session_state["history_page"] = pages
+        rows, total = load_history_page((page_no - 1) * page_size, page_size, include_archive, **filters)
+
+    if total == 0:
+        if any(filters.values()):
+            st.info("No sessions match these filters.")
+        else:
+            st.info("No parking history yet. Start by parking a car in the sidebar.")
     else:
-        st.dataframe(
-            df.sort_values("Entry", ascending=False),
-            use_container_width=True,
-        )
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        first = (page_no - 1) * page_size
+        st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, key="history_page")
+        st.caption(f"Sessions {first + 1:,}–{first + len(rows):,} of {total:,}, newest first.")
 
 st.caption("Fairfield University • Go Stags!")
+
+# Whole-script rerun time (fragment reruns are timed on their own); a run cut
+# short by st.rerun() is not recorded
+observe("parking_streamlit_render_seconds", time.perf_counter() - rerun_started, page=page)
+
+# Opt-in profile of this run (see parking_profile): a rerun that lands on
+# another page is navigation, anything else keeps the "interaction" tag the
+# Park / Exit panel gave it
+if profile_run is not None:
+    if st.session_state.get("profiled_page") != page:
+        tag_profile(action="navigation")
+    st.session_state["profiled_page"] = page
+    finish_profile(profile_run, page=page)
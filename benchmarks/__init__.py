@@ -0,0 +1,4 @@
+"""Benchmarks and stress checks for the Fairfield parking app.
+
+Run from the repository root, e.g. ``python -m benchmarks.stress_park_in``.
+"""
@@ -0,0 +1,149 @@
+"""Time per processed car at the gate: the original app vs Park/Exit fragment.
+
+Pre-fills a history of closed sessions, opens the app on the History page
+(the most expensive page) and processes cars back to back through the
+sidebar.  For every car it reports:
+
+* ``before_per_car_ms`` – one PARK IN click in the original app (``app.py``
+  at ``--baseline``, by default the repository's first commit) on the same
+  history as a flat CSV: the click run, which re-reads and rewrites the
+  whole file, plus the ``st.rerun()`` it ends with,
+* ``full_run_ms``  – one full script run of the current app,
+* ``fragment_ms`` – the Park/Exit fragment alone, as timed inside the app.
+
+    python -m benchmarks.bench_gate [--history 100000] [--cars 20] [--baseline REF]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from parking_journal import IN, OUT, EventJournal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+GROUP = "Green (Commuters)"
+START = datetime(2024, 9, 1, 7, 0)
+
+
+def prefill(path, sessions):
+    journal = EventJournal(path, fsync_every=sessions * 2 + 1)
+    for i in range(sessions):
+        entry = START + timedelta(minutes=i)
+        journal.append(IN, f"H{i:07d}", GROUP, entry)
+        journal.append(OUT, f"H{i:07d}", GROUP, entry + timedelta(hours=3))
+    journal.close()
+
+
+def prefill_csv(path, sessions):
+    """The same history in the original app's fairfield_parking.csv."""
+    entry = pd.Series(START + pd.to_timedelta(range(sessions), unit="min"))
+    pd.DataFrame({
+        "Plate": [f"H{i:07d}" for i in range(sessions)],
+        "Lot": GROUP,
+        "Entry": entry,
+        "Exit": entry + timedelta(hours=3),
+    }).to_csv(path, index=False)
+
+
+def first_commit():
+    return subprocess.run(
+        ["git", "rev-list", "--max-parents=0", "HEAD"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split()[0]
+
+
+def baseline_app(ref, workdir):
+    """Write ``app.py`` as of ``ref`` into ``workdir``; returns its path."""
+    source = subprocess.run(
+        ["git", "show", f"{ref}:app.py"], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    path = os.path.join(workdir, "baseline_app.py")
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(source)
+    return path
+
+
+def click_park_in(at, cars, prefix):
+    """Process ``cars`` through the sidebar; each click's run time in ms."""
+    runs = []
+    for i in range(cars):
+        at.sidebar.text_input[0].set_value(f"{prefix}{i:04d}")
+        at.sidebar.selectbox[0].set_value(GROUP)
+        at.sidebar.button[0].click()
+        started = time.perf_counter()
+        at.run()  # includes the st.rerun() the original app ends a click with
+        runs.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception)
+    return runs
+
+
+def run_baseline(history, cars, ref):
+    """Median ms per car of the original read-everything, rewrite-everything app."""
+    workdir = tempfile.mkdtemp(prefix="bench-gate-base-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        prefill_csv(os.path.join(workdir, "fairfield_parking.csv"), history)
+        at = AppTest.from_file(baseline_app(ref, workdir), default_timeout=120)
+        at.run()
+        at.sidebar.radio[0].set_value("History").run()
+        return statistics.median(click_park_in(at, cars, "B"))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run(history, cars, baseline):
+    before = run_baseline(history, cars, baseline)
+    workdir = tempfile.mkdtemp(prefix="bench-gate-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        prefill(os.path.join(workdir, "fairfield_parking_events.csv"), history)
+        st.cache_resource.clear()  # drop the store opened for the previous size
+
+        at = AppTest.from_file(APP, default_timeout=120)
+        at.run()
+        at.sidebar.radio[0].set_value("History").run()
+
+        full_runs = click_park_in(at, cars, "G")
+        fragment = at.session_state["gate_timings_ms"]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "history_sessions": history,
+        "cars": cars,
+        "full_run_ms": round(statistics.median(full_runs), 2),
+        "before_per_car_ms": round(before, 2),
+        "fragment_ms": round(statistics.median(fragment), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--cars", type=int, default=20)
+    parser.add_argument("--baseline", help="git ref of the original app (default: first commit)")
+    args = parser.parse_args(argv)
+
+    baseline = args.baseline or first_commit()
+    results = [run(h, args.cars, baseline) for h in args.history]
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Scan time and size: flat history CSV vs day-partitioned Parquet archive.
+
+Generates a synthetic history, writes it once as the old single
+``fairfield_parking.csv`` and once through ``HistoryArchive`` (Parquet), then
+times three questions against each:
+
+* ``full``    – every column, every day,
+* ``columns`` – only Lot and Entry (e.g. occupancy reports),
+* ``week``    – every column for one week (History page date filter).
+
+    python -m benchmarks.bench_history_format [--sessions 1000000] [--days 365]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from parking_archive import HistoryArchive
+
+GROUPS = ["Orange (Residents)", "Green (Commuters)", "Blue (Faculty)"]
+
+
+def synthetic_history(sessions, days, seed=0):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-01-01T00:00", "s")
+    entry = start + rng.integers(0, days * 86400, sessions).astype("timedelta64[s]")
+    stay = rng.integers(15 * 60, 10 * 3600, sessions).astype("timedelta64[s]")
+    return pd.DataFrame(
+        {
+            "Plate": [f"{a}{b:04d}" for a, b in zip(
+                rng.choice(list("ABCDEFGHJKLMNPRSTUVWXYZ"), sessions),
+                rng.integers(0, 20_000, sessions),
+            )],
+            "Lot": rng.choice(GROUPS, sessions),
+            "Entry": entry.astype("datetime64[ns]"),
+            "Exit": (entry + stay).astype("datetime64[ns]"),
+        }
+    ).sort_values("Entry", ignore_index=True)
+
+
+def _size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, f))
+        for root, _, files in os.walk(path)
+        for f in files
+    )
+
+
+def _time(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 1)
+
+
+def run(sessions, days):
+    workdir = tempfile.mkdtemp(prefix="bench-history-")
+    try:
+        df = synthetic_history(sessions, days)
+        week_start = date(2025, 1, 1) + timedelta(days=days // 2)
+        week_end = week_start + timedelta(days=6)
+
+        csv_path = os.path.join(workdir, "fairfield_parking.csv")
+        df.to_csv(csv_path, index=False)
+        archive = HistoryArchive(os.path.join(workdir, "archive"), fmt="parquet")
+        archive.write(df)
+
+        def csv_week():
+            full = pd.read_csv(csv_path, parse_dates=["Entry", "Exit"])
+            days_ = full["Entry"].dt.date
+            return full[(days_ >= week_start) & (days_ <= week_end)]
+
+        return {
+            "sessions": sessions,
+            "days": days,
+            "size_bytes": {"csv": _size(csv_path), "parquet": _size(archive.root)},
+            "scan_ms": {
+                "csv": {
+                    "full": _time(lambda: pd.read_csv(csv_path, parse_dates=["Entry", "Exit"])),
+                    "columns": _time(
+                        lambda: pd.read_csv(csv_path, usecols=["Lot", "Entry"], parse_dates=["Entry"])
+                    ),
+                    "week": _time(csv_week),
+                },
+                "parquet": {
+                    "full": _time(lambda: archive.read()),
+                    "columns": _time(lambda: archive.read(columns=["Lot", "Entry"])),
+                    "week": _time(lambda: archive.read(week_start, week_end)),
+                },
+            },
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args(argv)
+
+    json.dump([run(n, args.days) for n in args.sessions], sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
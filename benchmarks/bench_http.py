@@ -0,0 +1,237 @@
+"""HTTP throughput of the Flask API under a production WSGI server.
+
+Starts ``fairfield_parking_api:app`` under gunicorn (``-w N`` sync worker
+processes) or waitress (one process, ``--threads N``) on localhost, in an
+empty working directory, and drives it from several client processes with
+persistent connections (gunicorn's sync workers close them after every
+response, as they would behind a proxy).  Every request route is in the
+mix once, including 404s for an unknown zone, lot and group, plus a
+one-event POST /events (each client parks and releases its own plates).
+The long-lived ``/occupancy/stream`` is left out because it does not have
+a per-request latency.
+
+Each worker count runs once with the precomputed static responses and once
+with ``PARKING_API_PRECOMPUTED=0`` (``jsonify`` on every request).  p50/p99
+latency and requests/sec are reported overall and per route.
+
+    python -m benchmarks.bench_http [--server gunicorn] [--workers 1 2 4]
+        [--mode precomputed jsonify] [--duration 10] [--connections 32]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing as mp
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, method, path, expected status), requested in turn
+ROUTES = [
+    ("home", "GET", "/", 200),
+    ("zones", "GET", "/zones", 200),
+    ("zone", "GET", "/zones/blue", 200),
+    ("zone_404", "GET", "/zones/nowhere", 404),
+    ("lot", "GET", "/lots/A-1", 200),
+    ("lot_404", "GET", "/lots/Z-99", 404),
+    ("walking_times", "GET", "/walking-times", 200),
+    ("occupancy", "GET", "/occupancy", 200),
+    ("occupancy_group", "GET", "/occupancy/green", 200),
+    ("occupancy_group_404", "GET", "/occupancy/nowhere", 404),
+    ("recommend", "GET", "/recommend?destination=bcc&group=green", 200),
+    ("overstays", "GET", "/overstays", 200),
+    ("overstay_alerts", "GET", "/overstays/alerts", 200),
+    ("occupancy_lots", "GET", "/occupancy/lots", 200),
+    ("analytics", "GET", "/analytics/occupancy/green", 200),
+    ("forecast", "GET", "/forecast/green", 200),
+    # 404 unless the server runs with PARKING_METRICS=1
+    ("metrics", "GET", "/metrics", 200 if os.environ.get("PARKING_METRICS") == "1" else 404),
+    ("events", "POST", "/events", 200),
+]
+HEADERS = {"Accept-Encoding": "gzip"}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_command(server, workers, port):
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}",
+                "--log-level", "warning", "fairfield_parking_api:app"]
+    return [sys.executable, "-m", "waitress", f"--listen=127.0.0.1:{port}",
+            f"--threads={workers}", "fairfield_parking_api:app"]
+
+
+def _wait_ready(port, proc, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/occupancy")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def _client(port, connections, duration, client_id, results):
+    """One client process: ``connections`` threads, each on its own connection."""
+    samples = defaultdict(list)  # label -> [seconds]
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(n):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        mine = defaultdict(list)
+        failed = defaultdict(int)
+        parked = False
+        plate = f"HTTP{client_id}-{n}"
+        i = n
+        while time.monotonic() < deadline:
+            label, method, path, expected = ROUTES[i % len(ROUTES)]
+            i += 1
+            body = None
+            headers = HEADERS
+            if method == "POST":
+                body = json.dumps({"event": "OUT" if parked else "IN", "plate": plate, "group": "orange"})
+                headers = dict(HEADERS, **{"Content-Type": "application/x-ndjson"})
+                parked = not parked
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == expected
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                ok = False
+            elapsed = time.perf_counter() - started
+            if ok:
+                mine[label].append(elapsed)
+            else:
+                failed[label] += 1
+        conn.close()
+        with lock:
+            for label, values in mine.items():
+                samples[label].extend(values)
+            for label, count in failed.items():
+                errors[label] += count
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(connections)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put((dict(samples), dict(errors)))
+
+
+def _percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {"p50_ms": None, "p99_ms": None}
+    return {
+        "p50_ms": round(values[len(values) // 2] * 1000, 2),
+        "p99_ms": round(values[min(len(values) - 1, int(len(values) * 0.99))] * 1000, 2),
+    }
+
+
+def run(server, workers, mode, duration, connections, clients):
+    workdir = tempfile.mkdtemp(prefix="bench-http-")
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        PARKING_API_PRECOMPUTED="1" if mode == "precomputed" else "0",
+    )
+    proc = subprocess.Popen(
+        _server_command(server, workers, port), cwd=workdir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(port, proc)
+        ctx = mp.get_context("spawn")
+        results = ctx.Queue()
+        per_client = max(1, connections // clients)
+        procs = [
+            ctx.Process(target=_client, args=(port, per_client, duration, c, results))
+            for c in range(clients)
+        ]
+        for p in procs:
+            p.start()
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+        for _ in procs:
+            client_samples, client_errors = results.get()
+            for label, values in client_samples.items():
+                samples[label].extend(values)
+            for label, count in client_errors.items():
+                errors[label] += count
+        for p in procs:
+            p.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    everything = [v for values in samples.values() for v in values]
+    return {
+        "server": server,
+        "workers": workers,
+        "mode": mode,
+        "connections": per_client * clients,
+        "duration_s": duration,
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "requests_per_sec": round(len(everything) / duration),
+        **_percentiles(everything),
+        "routes": {
+            label: dict(requests=len(samples[label]), errors=errors.get(label, 0),
+                        **_percentiles(samples[label]))
+            for label in sorted(set(samples) | set(errors))
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=["gunicorn", "waitress"], default="gunicorn")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                        help="gunicorn worker processes, or waitress threads")
+    parser.add_argument("--mode", nargs="+", choices=["precomputed", "jsonify"],
+                        default=["precomputed", "jsonify"])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--connections", type=int, default=32, help="concurrent connections")
+    parser.add_argument("--clients", type=int, default=min(4, os.cpu_count() or 1),
+                        help="load generator processes")
+    args = parser.parse_args(argv)
+
+    report = []
+    for workers in args.workers:
+        for mode in args.mode:
+            result = run(args.server, workers, mode, args.duration, args.connections, args.clients)
+            print(
+                f"{args.server} workers={workers:<3} {mode:<12} {result['requests_per_sec']:>7} req/s"
+                f"  p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  errors {result['errors']}",
+                file=sys.stderr,
+            )
+            report.append(result)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
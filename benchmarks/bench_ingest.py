@@ -0,0 +1,104 @@
+"""Throughput of POST /events for different batch sizes.
+
+Drives the Flask app in-process (test client, no network) with a rolling
+stream of entries and exits: 100 cars are on site at any time, every new
+arrival is paired with the oldest car leaving, so every event is valid and
+the capacity check never rejects.  Each backend runs in a fresh process on
+empty files.
+
+    python -m benchmarks.bench_ingest [--events 20000] [--batch 1 100 10000]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+GROUPS = ["green", "blue", "orange"]
+ON_SITE = 100
+
+
+def gate_events(n):
+    events = []
+    i = 0
+    while len(events) < n:
+        events.append({"event": "IN", "plate": f"L{i:07d}", "group": GROUPS[i % 3]})
+        if i >= ON_SITE:
+            events.append({"event": "OUT", "plate": f"L{i - ON_SITE:07d}"})
+        i += 1
+    return events[:n]
+
+
+def _run_backend(backend, total, batches, fmt, results):
+    os.environ["PARKING_STORE"] = backend
+    workdir = tempfile.mkdtemp(prefix=f"bench-ingest-{backend}-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        if fmt == "msgpack":
+            import msgpack
+
+        from fairfield_parking_api import app
+
+        client = app.test_client()
+        out = []
+        for size in batches:
+            # fresh plates per batch size so earlier runs do not collide
+            events = [
+                dict(e, plate=f"{size}-{e['plate']}") for e in gate_events(total)
+            ]
+            bodies = []
+            for start in range(0, total, size):
+                chunk = events[start:start + size]
+                if fmt == "msgpack":
+                    bodies.append((msgpack.packb(chunk), "application/msgpack"))
+                else:
+                    bodies.append(("\n".join(json.dumps(e) for e in chunk), "application/x-ndjson"))
+
+            accepted = 0
+            started = time.perf_counter()
+            for body, content_type in bodies:
+                accepted += client.post("/events", data=body, content_type=content_type).get_json()["accepted"]
+            elapsed = time.perf_counter() - started
+            out.append({
+                "backend": backend,
+                "format": fmt,
+                "batch_size": size,
+                "events": total,
+                "accepted": accepted,
+                "seconds": round(elapsed, 3),
+                "events_per_sec": round(total / elapsed),
+            })
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    results.put(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--backend", nargs="+", default=["journal", "sqlite"])
+    parser.add_argument("--format", choices=["jsonl", "msgpack"], default="jsonl")
+    args = parser.parse_args(argv)
+
+    ctx = mp.get_context("spawn")
+    report = []
+    for backend in args.backend:
+        results = ctx.Queue()
+        proc = ctx.Process(
+            target=_run_backend, args=(backend, args.events, args.batch, args.format, results)
+        )
+        proc.start()
+        report.extend(results.get())
+        proc.join()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Memory footprint of the live session table, per million sessions.
+
+Writes a synthetic history (``benchmarks.traffic``) as a journal, then, in a
+fresh process per backend, opens the store and builds its sessions frame.
+Reported per million sessions:
+
+* ``rss_mb``    – growth of the process's resident set from before the store
+  was opened (everything the store keeps: parsed rows, indexes, frame),
+* ``frame_mb``  – ``DataFrame.memory_usage(deep=True)`` of the sessions frame,
+* ``append_us`` – median time of one PARK IN + PARK OUT plus the next
+  ``sessions()`` once loaded, for a plate seen before (how much of the table
+  an append touches); ``append_new_plate_us`` the same for first-seen plates.
+
+    python -m benchmarks.bench_memory [--rows 1000000] [--backend journal sqlite]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from benchmarks.traffic import generate_sessions, open_sessions, write_journal_fast
+from parking_config import CAPACITY
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def measure(backend: str, journal: str, db: str, rows: int) -> dict:
+    """Run in a fresh process: open the store, build the frame, time appends."""
+    from parking_store import open_store
+
+    before = _rss_mb()
+    store = open_store(CAPACITY.keys(), journal, db, backend=backend)
+    df = store.sessions()
+    rss = _rss_mb() - before
+    frame = df.memory_usage(deep=True).sum() / 2**20
+
+    group = "Green (Commuters)"
+
+    def append_us(plates):
+        samples = []
+        for plate in plates:
+            now = datetime.now()
+            started = time.perf_counter()
+            store.park_in(plate, group, now, CAPACITY[group] + 100)
+            store.park_out(plate, now + timedelta(seconds=1))
+            store.sessions()
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        return round(samples[len(samples) // 2] * 1e6)
+
+    plates = [f"MEM{i}" for i in range(50)]
+    new_plate = append_us(plates)
+    known_plate = append_us(plates)
+    store.close()
+    per_million = 1_000_000 / rows
+    return {
+        "backend": backend,
+        "rows": rows,
+        "rss_mb_per_million": round(rss * per_million, 1),
+        "frame_mb_per_million": round(float(frame) * per_million, 1),
+        "dtypes": {column: str(dtype) for column, dtype in df.dtypes.items()},
+        "append_us": known_plate,
+        "append_new_plate_us": new_plate,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--backend", nargs="+", default=["journal", "sqlite"])
+    parser.add_argument("--measure", nargs=3, metavar=("BACKEND", "JOURNAL", "DB"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        backend, journal, db = args.measure
+        json.dump(measure(backend, journal, db, args.rows), sys.stdout)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench-memory-")
+    try:
+        journal = os.path.join(workdir, "events.csv")
+        history = pd.concat([generate_sessions(args.rows), open_sessions()], ignore_index=True)
+        write_journal_fast(history, journal)
+        rows = len(history)
+        del history
+        report = []
+        for backend in args.backend:
+            db = os.path.join(workdir, f"{backend}.db")
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_memory", "--rows", str(rows),
+                 "--measure", backend, journal, db],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(out)
+            print(f"{backend:<8} rss {result['rss_mb_per_million']:>8} MB/M  "
+                  f"frame {result['frame_mb_per_million']:>7} MB/M  "
+                  f"append {result['append_us']} us "
+                  f"({result['append_new_plate_us']} us new plate)", file=sys.stderr)
+            report.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
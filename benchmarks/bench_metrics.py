@@ -0,0 +1,108 @@
+"""Cost of the metrics layer, off (the default) and on.
+
+In a fresh process per setting of ``PARKING_METRICS``:
+
+* ``span_ns``    – one ``with span(...)`` around an empty block,
+* ``timed_ns``   – one call through a ``@timed`` no-op function, minus the
+  call itself,
+* ``routes``     – median in-process (Flask test client) latency of a few
+  API routes, with the per-request hooks registered or not.
+
+    python -m benchmarks.bench_metrics [--calls 200000] [--requests 2000]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROUTES = ["/", "/occupancy", "/occupancy/green", "/recommend?destination=bcc&group=green"]
+
+
+def _per_call_ns(fn, calls: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / calls * 1e9
+
+
+def measure(calls: int, requests: int) -> dict:
+    """Run in a fresh process (``PARKING_METRICS`` is read at import)."""
+    import parking_metrics
+    from parking_metrics import span, timed
+
+    def empty_span():
+        with span("bench_seconds", op="empty"):
+            pass
+
+    def plain():
+        pass
+
+    wrapped = timed("bench_seconds", op="timed")(plain)
+    result = {
+        "enabled": parking_metrics.ENABLED,
+        "span_ns": round(_per_call_ns(empty_span, calls)),
+        "timed_ns": round(_per_call_ns(wrapped, calls) - _per_call_ns(plain, calls)),
+    }
+
+    workdir = tempfile.mkdtemp(prefix="bench-metrics-")  # fresh journal
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import fairfield_parking_api as api
+
+        client = api.app.test_client()
+        routes = {}
+        for path in ROUTES:
+            client.get(path)  # warm up (opens the store on first use)
+            samples = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                client.get(path)
+                samples.append(time.perf_counter() - started)
+            samples.sort()
+            routes[path] = round(samples[len(samples) // 2] * 1e6, 1)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    result["routes_us"] = routes
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        json.dump(measure(args.calls, args.requests), sys.stdout)
+        return
+
+    report = []
+    for enabled in ("0", "1"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_metrics", "--measure",
+             "--calls", str(args.calls), "--requests", str(args.requests)],
+            capture_output=True, text=True, check=True,
+            env=dict(os.environ, PARKING_METRICS=enabled),
+        ).stdout
+        result = json.loads(out)
+        print(f"metrics {'on ' if result['enabled'] else 'off'}  span {result['span_ns']} ns  "
+              f"timed {result['timed_ns']} ns  "
+              + "  ".join(f"{path} {us} us" for path, us in result["routes_us"].items()),
+              file=sys.stderr)
+        report.append(result)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
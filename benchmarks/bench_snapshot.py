@@ -0,0 +1,204 @@
+"""Cold start from a snapshot, and recovery after a kill mid-write.
+
+Cold start: writes a synthetic history (``benchmarks.traffic``) as a journal
+and times, each in a fresh process, opening the journal store and answering
+one occupancy query:
+
+* ``replay_ms``     – no snapshot, the whole journal is parsed,
+* ``snapshot_ms``   – the latest snapshot is loaded, nothing to replay,
+* ``tail_ms``       – the snapshot plus ``--tail`` events written after it.
+
+Kill test: a child process parks cars in and out and writes a snapshot after
+every few events, so it spends most of its time inside a snapshot write; it
+is SIGKILL-ed at a random moment.  The store is then reopened from disk and
+must match a full replay of the journal (sessions, counters, rosters, open
+plates).  Each trial reports whether the snapshot was used or, if it no
+longer matched, the journal was replayed from the start.
+
+    python -m benchmarks.bench_snapshot [--rows 1000000] [--tail 1000] [--trials 20]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from benchmarks.traffic import generate_sessions, open_sessions, write_journal_fast
+from parking_config import CAPACITY
+
+GROUP = "Orange (Residents)"
+
+
+def _open(journal):
+    from parking_store import open_store
+
+    return open_store(CAPACITY.keys(), journal, journal + ".db", backend="journal")
+
+
+def time_open(journal: str) -> dict:
+    """Run in a fresh process: open the store and answer one query."""
+    started = time.perf_counter()
+    store = _open(journal)
+    store.count(GROUP)
+    elapsed = time.perf_counter() - started
+    thread = store.tail._snapshot_thread
+    if thread is not None:
+        thread.join()  # let a first snapshot finish before the process exits
+    store.close()
+    return {"ms": round(elapsed * 1000, 1), "sessions": len(store.tail.table)}
+
+
+def _child_open(journal: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_snapshot", "--open", journal],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out)
+
+
+def park_forever(journal: str, snapshot_every: int):
+    """Child of the kill test: park in/out and snapshot until killed."""
+    store = _open(journal)
+    now = datetime.now()
+    parked = []
+    for i in range(10**9):
+        if len(parked) < 50 or random.random() < 0.5:
+            plate = f"K{os.getpid()}-{i}"
+            store.park_in(plate, GROUP, now + timedelta(seconds=i), 10**6)
+            parked.append(plate)
+        else:
+            store.park_out(parked.pop(random.randrange(len(parked))), now + timedelta(seconds=i))
+        if i % snapshot_every == 0:
+            store.tail.save_snapshot()
+
+
+def recovered_matches(journal: str):
+    """(snapshot used, store reopened from disk == full replay of the journal)."""
+    from parking_journal import JournalTail
+    from parking_occupancy import OccupancyIndex
+
+    reference = OccupancyIndex(CAPACITY.keys())
+    tail = JournalTail(journal, listeners=[reference])
+    tail.refresh()
+
+    with _open(journal) as store:
+        store.count(GROUP)
+        used = store.tail.restored_from is not None
+        occupancy = store.occupancy
+        same = (
+            store.sessions().astype(str).equals(tail.frame().astype(str))
+            and occupancy.counts == reference.counts
+            and list(occupancy.lot_counts) == list(reference.lot_counts)
+            and occupancy.by_entry == reference.by_entry
+            and {g: list(r.items()) for g, r in occupancy.rosters.items()}
+            == {g: list(r.items()) for g, r in reference.rosters.items()}
+            and store.tail.open_rows == tail.open_rows
+        )
+    return used, same
+
+
+def kill_test(journal: str, trials: int, snapshot_every: int, max_delay: float) -> dict:
+    results = []
+    for trial in range(trials):
+        child = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_snapshot", "--park-forever", journal,
+             "--snapshot-every", str(snapshot_every)],
+            stdout=subprocess.DEVNULL,
+        )
+        time.sleep(random.uniform(0.2, max_delay))
+        child.send_signal(signal.SIGKILL)
+        child.wait()
+        # its half-written snapshot, if the kill landed inside a write
+        mid_write = any(
+            f.startswith(f"{os.path.basename(journal)}.snapshot.{child.pid}-")
+            for f in os.listdir(os.path.dirname(journal))
+        )
+        used, same = recovered_matches(journal)
+        results.append({"mid_write": mid_write, "snapshot_used": used, "matches_replay": same})
+        print(f"trial {trial:>3}: killed {'during' if mid_write else 'outside'} a snapshot write, "
+              f"snapshot {'used' if used else 'not used'}, "
+              f"{'matches' if same else 'DIFFERS FROM'} full replay", file=sys.stderr)
+    return {
+        "trials": trials,
+        "killed_mid_write": sum(r["mid_write"] for r in results),
+        "snapshot_used": sum(r["snapshot_used"] for r in results),
+        "mismatches": sum(not r["matches_replay"] for r in results),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=1_000, help="events after the snapshot")
+    parser.add_argument("--trials", type=int, default=20, help="kill test runs (0 to skip)")
+    parser.add_argument("--kill-rows", type=int, default=200_000,
+                        help="history size for the kill test")
+    parser.add_argument("--snapshot-every", type=int, default=5,
+                        help="kill test: events between snapshots")
+    parser.add_argument("--max-delay", type=float, default=3.0,
+                        help="kill test: latest kill, seconds after start")
+    parser.add_argument("--open", help=argparse.SUPPRESS)
+    parser.add_argument("--park-forever", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.open:
+        json.dump(time_open(args.open), sys.stdout)
+        return
+    if args.park_forever:
+        park_forever(args.park_forever, args.snapshot_every)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench-snapshot-")
+    report = {}
+    try:
+        journal = os.path.join(workdir, "events.csv")
+        history = pd.concat([generate_sessions(args.rows), open_sessions()], ignore_index=True)
+        write_journal_fast(history, journal)
+        del history
+
+        replay = _child_open(journal)  # also writes the first snapshot
+        snapshot = _child_open(journal)
+        store = _open(journal)
+        now = datetime.now()
+        for i in range(args.tail // 2):
+            store.park_in(f"TAIL{i}", GROUP, now, 10**6)
+            store.park_out(f"TAIL{i}", now + timedelta(minutes=1))
+        store.close()
+        tail = _child_open(journal)
+        report["cold_start"] = {
+            "sessions": replay["sessions"],
+            "replay_ms": replay["ms"],
+            "snapshot_ms": snapshot["ms"],
+            "tail_events": args.tail // 2 * 2,
+            "tail_ms": tail["ms"],
+            "snapshot_mb": round(os.path.getsize(journal + ".snapshot") / 2**20, 1),
+            "journal_mb": round(os.path.getsize(journal) / 2**20, 1),
+        }
+        print(f"cold start: replay {replay['ms']} ms, snapshot {snapshot['ms']} ms, "
+              f"snapshot + {args.tail // 2 * 2} events {tail['ms']} ms", file=sys.stderr)
+
+        if args.trials:
+            journal = os.path.join(workdir, "kill.csv")
+            history = pd.concat([generate_sessions(args.kill_rows), open_sessions()],
+                                ignore_index=True)
+            write_journal_fast(history, journal)
+            del history
+            _child_open(journal)
+            report["kill_test"] = kill_test(journal, args.trials, args.snapshot_every,
+                                            args.max_delay)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
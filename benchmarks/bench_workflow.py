@@ -0,0 +1,219 @@
+"""Time the parking workflow against pre-populated semester histories.
+
+For each history size a synthetic semester (``benchmarks.traffic``) is written
+as an event journal, with about 60% of every group currently on site, and each
+backend is opened on it.  The operations timed are the ones a gate attendant
+and the pages trigger:
+
+* ``load_data_cold``  – open the store and build the sessions frame,
+* ``load_data_warm``  – the same frame on a rerun,
+* ``park_in_check``   – already-parked and capacity check for one car,
+* ``save``            – PARK IN followed by PARK OUT (two durable writes),
+* ``group_page``      – active cars of one group plus the Duration column,
+* ``overstay``        – all active cars parked longer than 4 hours,
+* ``history_page``    – first History page (50 sessions, newest first),
+* ``history_deep``    – a History page halfway through all sessions,
+* ``history_group``   – first History page filtered to one group.
+
+``--legacy`` also times the original flat-CSV code paths (read the whole
+file, mask the frame, rewrite the whole file) on the same history.
+
+    python -m benchmarks.bench_workflow [--rows 10000 1000000 10000000]
+        [--backend journal sqlite] [--legacy] [--out results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from benchmarks.traffic import generate_sessions, open_sessions, write_journal_fast
+from parking_config import CAPACITY
+from parking_store import open_store
+
+OVERSTAY_HOURS = 4
+HISTORY_PAGE = 50
+# stop repeating an operation after this many seconds (but run it at least 3 times)
+BUDGET = 2.0
+MAX_REPEATS = 200
+
+
+def _time(fn, budget=BUDGET, max_repeats=MAX_REPEATS):
+    samples = []
+    spent = 0.0
+    while len(samples) < 3 or (spent < budget and len(samples) < max_repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+        spent += samples[-1]
+    samples.sort()
+    return {
+        "median_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "min_ms": round(samples[0] * 1000, 3),
+        "repeats": len(samples),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def workflow_ops(store, backend, journal, db):
+    """{op: callable} for the current store code, on an open ``store``."""
+    group = "Green (Commuters)"
+    cars = iter(range(10**9))
+
+    def load_cold():
+        with open_store(CAPACITY.keys(), journal, db, backend=backend) as cold:
+            cold.sessions()
+
+    def check():
+        store.is_parked("BENCH-CHECK") or store.count(group) >= CAPACITY[group]
+
+    def save():
+        plate = f"BENCH{next(cars)}"
+        now = datetime.now()
+        store.park_in(plate, group, now, CAPACITY[group] + 1)
+        store.park_out(plate, now + timedelta(seconds=1))
+
+    def group_page():
+        cur = store.active(group).copy()
+        cur["Duration"] = (
+            datetime.now() - pd.to_datetime(cur["Entry"])
+        ).astype(str).str.split(".").str[0]
+
+    def overstay():
+        return store.parked_before(datetime.now() - timedelta(hours=OVERSTAY_HOURS))
+
+    middle = store.history(0, 1)[1] // 2
+    ops = {
+        "load_data_cold": (load_cold, 3),
+        "load_data_warm": (store.sessions, MAX_REPEATS),
+        "park_in_check": (check, MAX_REPEATS),
+        "save": (save, MAX_REPEATS),
+        "group_page": (group_page, MAX_REPEATS),
+        "overstay": (overstay, MAX_REPEATS),
+        "history_page": (lambda: store.history(0, HISTORY_PAGE), MAX_REPEATS),
+        "history_deep": (lambda: store.history(middle, HISTORY_PAGE), MAX_REPEATS),
+        "history_group": (lambda: store.history(0, HISTORY_PAGE, group=group), MAX_REPEATS),
+    }
+    return ops
+
+
+def legacy_ops(csv_path):
+    """{op: callable} reproducing the original read-mask-rewrite CSV app."""
+    group = "Green (Commuters)"
+    df = pd.read_csv(csv_path, parse_dates=["Entry", "Exit"])
+
+    def active(frame):
+        return frame[(frame["Lot"] == group) & frame["Exit"].isna()].copy()
+
+    def check():
+        plate = "BENCH-CHECK"
+        plate in df[df["Exit"].isna()]["Plate"].values or len(active(df)) >= CAPACITY[group]
+
+    def group_page():
+        cur = active(df)
+        cur["Duration"] = (
+            datetime.now() - pd.to_datetime(cur["Entry"])
+        ).astype(str).str.split(".").str[0]
+
+    def overstay():
+        cur = df[df["Exit"].isna()].copy()
+        hours = (datetime.now() - pd.to_datetime(cur["Entry"])).dt.total_seconds() / 3600
+        return cur[hours > OVERSTAY_HOURS]
+
+    def history(frame, offset):
+        newest = frame.sort_values("Entry", ascending=False)
+        return newest.iloc[offset:offset + HISTORY_PAGE], len(newest)
+
+    return {
+        "load_data_cold": (lambda: pd.read_csv(csv_path, parse_dates=["Entry", "Exit"]), 3),
+        "park_in_check": (check, MAX_REPEATS),
+        "save": (lambda: df.to_csv(csv_path, index=False), 3),
+        "group_page": (group_page, MAX_REPEATS),
+        "overstay": (overstay, MAX_REPEATS),
+        "history_page": (lambda: history(df, 0), 20),
+        "history_deep": (lambda: history(df, len(df) // 2), 20),
+        "history_group": (lambda: history(df[df["Lot"] == group], 0), 20),
+    }
+
+
+def run(rows, backends, legacy):
+    workdir = tempfile.mkdtemp(prefix="bench-workflow-")
+    stores = ExitStack()
+    try:
+        history = pd.concat([generate_sessions(rows), open_sessions()], ignore_index=True)
+        journal = os.path.join(workdir, "events.csv")
+        write_journal_fast(history, journal)
+
+        suites = []
+        for backend in backends:
+            db = os.path.join(workdir, f"{backend}.db")
+            started = time.perf_counter()
+            store = stores.enter_context(open_store(CAPACITY.keys(), journal, db, backend=backend))
+            ops = workflow_ops(store, backend, journal, db)
+            suites.append((backend, round(time.perf_counter() - started, 2), ops))
+        if legacy:
+            csv_path = os.path.join(workdir, "fairfield_parking.csv")
+            history[["Plate", "Lot", "Entry", "Exit"]].to_csv(csv_path, index=False)
+            suites.append(("legacy_csv", None, legacy_ops(csv_path)))
+
+        results = []
+        for backend, open_seconds, ops in suites:
+            for op, (fn, max_repeats) in ops.items():
+                result = _time(fn, max_repeats=max_repeats)
+                results.append(dict(rows=rows, backend=backend, op=op, **result))
+                print(f"{rows:>10} {backend:<10} {op:<15} {result['median_ms']:>10} ms",
+                      file=sys.stderr)
+            if open_seconds is not None:
+                results.append(dict(rows=rows, backend=backend, op="first_open",
+                                    median_ms=open_seconds * 1000, min_ms=open_seconds * 1000,
+                                    repeats=1))
+        return results
+    finally:
+        stores.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--backend", nargs="+", default=["journal", "sqlite"])
+    parser.add_argument("--legacy", action="store_true", help="also time the original CSV code paths")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "started": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": [r for rows in args.rows for r in run(rows, args.backend, args.legacy)],
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
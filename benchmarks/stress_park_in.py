@@ -0,0 +1,134 @@
+"""Fire hundreds of simultaneous PARK IN attempts at one small category.
+
+Several processes, each with several threads, open their own store on the
+same files and all release at once.  Every plate is tried twice so the
+duplicate-plate rule is raced as well.  Afterwards the store is reopened from
+disk and checked:
+
+* the category never holds more than its capacity,
+* every attempt was either committed or rejected,
+* every committed entry is on disk and nothing else is (no lost events).
+
+    python -m benchmarks.stress_park_in [--backend journal|sqlite|all]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+from parking_store import AlreadyParked, LotFull, open_store
+
+GROUP = "Green (Commuters)"
+GROUPS = [GROUP]
+
+
+def _open(backend, workdir):
+    return open_store(
+        GROUPS,
+        os.path.join(workdir, "events.csv"),
+        os.path.join(workdir, "parking.db"),
+        backend=backend,
+    )
+
+
+def _worker(backend, workdir, plates, capacity, barrier, results):
+    store = _open(backend, workdir)
+    outcomes = []
+    lock = threading.Lock()
+    start = threading.Barrier(len(plates))
+
+    def attempt(plate):
+        start.wait()
+        try:
+            store.park_in(plate, GROUP, datetime.now(), capacity)
+            outcome = "committed"
+        except LotFull:
+            outcome = "full"
+        except AlreadyParked:
+            outcome = "duplicate"
+        with lock:
+            outcomes.append((plate, outcome))
+
+    barrier.wait()
+    threads = [threading.Thread(target=attempt, args=(p,)) for p in plates]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    store.close()
+    results.put(outcomes)
+
+
+def run(backend, processes, threads, capacity):
+    workdir = tempfile.mkdtemp(prefix=f"stress-{backend}-")
+    try:
+        _open(backend, workdir).close()  # create the files before the race starts
+
+        total = processes * threads
+        # each plate shows up twice, in different processes
+        plates = [f"S{i % (total // 2):04d}" for i in range(total)]
+        ctx = mp.get_context("spawn")
+        barrier = ctx.Barrier(processes)
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(
+                target=_worker,
+                args=(backend, workdir, plates[p::processes], capacity, barrier, results),
+            )
+            for p in range(processes)
+        ]
+        for p in procs:
+            p.start()
+        outcomes = [o for _ in procs for o in results.get()]
+        for p in procs:
+            p.join()
+
+        committed = [plate for plate, o in outcomes if o == "committed"]
+        with _open(backend, workdir) as store:
+            on_disk = set(store.active(GROUP)["Plate"])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    counts = {o: sum(1 for _, x in outcomes if x == o) for o in ("committed", "full", "duplicate")}
+
+    problems = []
+    if len(outcomes) != total:
+        problems.append(f"{total - len(outcomes)} attempts produced no outcome")
+    if len(committed) > capacity:
+        problems.append(f"capacity exceeded: {len(committed)} > {capacity}")
+    if len(committed) != len(set(committed)):
+        problems.append("a plate was committed twice")
+    if on_disk != set(committed):
+        problems.append(
+            f"disk disagrees with callers: {len(on_disk)} on disk, {len(committed)} committed"
+        )
+
+    print(
+        f"{backend:8s} attempts={total} capacity={capacity} "
+        f"committed={counts['committed']} full={counts['full']} "
+        f"duplicate={counts['duplicate']} on_disk={len(on_disk)} "
+        f"{'OK' if not problems else 'FAIL'}"
+    )
+    for problem in problems:
+        print(f"  - {problem}")
+    return not problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["journal", "sqlite", "all"], default="all")
+    parser.add_argument("--processes", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=25)
+    parser.add_argument("--capacity", type=int, default=120)
+    args = parser.parse_args(argv)
+
+    backends = ["journal", "sqlite"] if args.backend == "all" else [args.backend]
+    ok = all([run(b, args.processes, args.threads, args.capacity) for b in backends])
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Synthetic semester traffic for the Fairfield parking app.
+
+Generates closed parking sessions that look like a real campus:
+
+* Green (commuters): weekday morning surge around 8:30, 2-7 hour stays,
+* Blue (faculty): weekday arrivals around 8:00, full working-day stays,
+* Orange (residents): arrivals at any hour, any day, stays of half a day to
+  three days (steady turnover rather than a surge).
+
+Daily volumes are scaled so peak occupancy stays under ``CAPACITY``.  Every
+session also gets a physical lot from ``LOTS``, picked in proportion to
+``LOT_CAPACITY``.
+"""
+import numpy as np
+import pandas as pd
+
+from parking_config import CAPACITY, LOT_CAPACITY, LOTS
+
+GREEN, BLUE, ORANGE = "Green (Commuters)", "Blue (Faculty)", "Orange (Residents)"
+
+# group -> (weekday arrivals, weekend arrivals, arrival hour mean, sd,
+#           stay hours min, max)
+PROFILES = {
+    GREEN: (500, 60, 8.5, 1.2, 2.0, 7.0),
+    BLUE: (180, 10, 8.0, 0.75, 7.0, 9.5),
+    ORANGE: (90, 90, 14.0, 5.0, 12.0, 72.0),
+}
+
+
+def sessions_per_day() -> float:
+    return sum((5 * wd + 2 * we) / 7 for wd, we, *_ in PROFILES.values())
+
+
+def generate_sessions(rows: int, start=None, seed=0) -> pd.DataFrame:
+    """``rows`` closed sessions (Plate, Lot, LotCode, Entry, Exit), oldest first.
+
+    By default the history ends a few days before today.
+    """
+    rng = np.random.default_rng(seed)
+    days = max(1, int(np.ceil(rows / sessions_per_day())))
+    if start is None:
+        start = pd.Timestamp.now().normalize() - pd.Timedelta(days=days + 3)
+    day_starts = pd.date_range(start, periods=days, freq="D").values
+    weekend = pd.DatetimeIndex(day_starts).dayofweek >= 5
+
+    frames = []
+    for group, (wd, we, mean, sd, stay_min, stay_max) in PROFILES.items():
+        per_day = np.where(weekend, we, wd)
+        day_of = np.repeat(np.arange(days), per_day)
+        n = len(day_of)
+        # slot within the day; commuters/faculty reuse the same plate pool daily
+        slot = np.arange(n) - np.repeat(np.cumsum(per_day) - per_day, per_day)
+        hours = np.clip(rng.normal(mean, sd, n), 0, 23.9)
+        entry = day_starts[day_of] + (hours * 3600).astype("timedelta64[s]")
+        stay = rng.uniform(stay_min, stay_max, n) * 3600
+        if group == ORANGE:
+            plates = np.char.add("R", np.arange(n).astype(str))
+        else:
+            plates = np.char.add(group[0], slot.astype(str))
+        lots = LOTS[group]
+        weights = np.array([LOT_CAPACITY[lot] for lot in lots]) / CAPACITY[group]
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Plate": plates,
+                    "Lot": group,
+                    "LotCode": rng.choice(lots, n, p=weights),
+                    "Entry": entry.astype("datetime64[ns]"),
+                    "Exit": (entry + stay.astype("timedelta64[s]")).astype("datetime64[ns]"),
+                }
+            )
+        )
+    df = pd.concat(frames, ignore_index=True).sort_values("Entry", ignore_index=True)
+    return df.iloc[:rows].reset_index(drop=True)
+
+
+def open_sessions(fill=0.6, now=None, seed=0) -> pd.DataFrame:
+    """Cars on site right now: ``fill`` of each group's capacity, Exit is NaT.
+
+    Entries are spread over the last day so the overstay query has work to do.
+    """
+    rng = np.random.default_rng(seed + 1)
+    now = pd.Timestamp.now().floor("s") if now is None else pd.Timestamp(now)
+    frames = []
+    for group, capacity in CAPACITY.items():
+        n = int(capacity * fill)
+        hours_ago = rng.uniform(0, 24, n)
+        lots = LOTS[group]
+        weights = np.array([LOT_CAPACITY[lot] for lot in lots]) / CAPACITY[group]
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Plate": np.char.add(f"NOW{group[0]}", np.arange(n).astype(str)),
+                    "Lot": group,
+                    "LotCode": rng.choice(lots, n, p=weights),
+                    "Entry": (now - pd.to_timedelta(hours_ago, unit="h")).floor("s"),
+                    "Exit": pd.NaT,
+                }
+            )
+        )
+    df = pd.concat(frames, ignore_index=True)
+    df["Entry"] = df["Entry"].astype("datetime64[ns]")
+    df["Exit"] = df["Exit"].astype("datetime64[ns]")
+    return df.sort_values("Entry", ignore_index=True)
+
+
+def write_journal_fast(df: pd.DataFrame, path: str):
+    """Write sessions as a journal, vectorized (``write_journal`` is per-row).
+
+    Sessions without an Exit only get their IN event.
+    """
+    closed = df[df["Exit"].notna()]
+    events = pd.concat(
+        [
+            pd.DataFrame({"Event": "IN", "Plate": df["Plate"], "Lot": df["Lot"], "Time": df["Entry"],
+                          "LotCode": df["LotCode"], "o": 0}),
+            pd.DataFrame({"Event": "OUT", "Plate": closed["Plate"], "Lot": closed["Lot"], "Time": closed["Exit"],
+                          "LotCode": closed["LotCode"], "o": 1}),
+        ],
+        ignore_index=True,
+    ).sort_values(["Time", "o"], kind="stable")
+    events[["Event", "Plate", "Lot", "Time", "LotCode"]].to_csv(
+        path, index=False, date_format="%Y-%m-%dT%H:%M:%S"
+    )
+
+
+def peak_occupancy(df: pd.DataFrame) -> dict:
+    """Highest number of cars parked at once, per group (sweep line)."""
+    peaks = {}
+    for group, part in df.groupby("Lot"):
+        times = np.concatenate([part["Entry"].values, part["Exit"].values])
+        steps = np.concatenate([np.ones(len(part)), -np.ones(len(part))])
+        order = np.lexsort((steps, times))
+        peaks[group] = int(np.cumsum(steps[order]).max())
+    return peaks
+
+
+if __name__ == "__main__":
+    sample = generate_sessions(50_000)
+    print(sample.head())
+    print("peak occupancy:", peak_occupancy(sample), "capacity:", CAPACITY)
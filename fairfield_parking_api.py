@@ -1,7 +1,70 @@
-from flask import Flask, jsonify
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask, Response, g, jsonify, request
+
+from parking_archive import HistoryArchive
+from parking_config import (
+    ARCHIVE_DIR, CAPACITY, DB, DESTINATIONS, FILE, JOURNAL, LOT_CAPACITY, LOT_GROUP, LOT_IDS,
+)
+from parking_dedupe import IdempotencyCache, RepeatReadFilter
+from parking_feed import OccupancyFeed
+from parking_forecast import OccupancyForecaster
+from parking_overstay import OverstaySweeper
+from parking_recommend import Recommender
+from parking_rollup import WEEKDAYS, OccupancyRollup
+from parking_journal import IN, OUT
+import parking_metrics
+from parking_store import OK, open_store
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # JSON lines only
+    msgpack = None
 
 app = Flask(__name__)
 
+# Static map data only changes on deploy, so clients may reuse it for a while
+# and then revalidate with If-None-Match.
+CACHE_CONTROL = "public, max-age=300, must-revalidate"
+
+# PARKING_API_PRECOMPUTED=0 serializes static responses on every request
+# (plain jsonify, no ETag or compression) to compare against the cached bodies
+PRECOMPUTED = os.environ.get("PARKING_API_PRECOMPUTED", "1") != "0"
+
+# Seconds between comment lines on an idle occupancy stream, so proxies and
+# load balancers do not drop it
+STREAM_KEEPALIVE = 15
+
+# Largest batch accepted by POST /events
+MAX_BATCH = 50_000
+INVALID = "invalid"
+REPEAT_READ = "repeat_read"
+# Gate clocks may run this far ahead of ours; later event times are invalid
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+# Longest ?hours= GET /overstays looks back (a year: every car parked)
+MAX_OVERSTAY_HOURS = 24 * 366
+
+# Shared by every POST /events in this process; _events_lock makes checking,
+# storing and recording a batch one step, so a retry racing its first
+# attempt waits for that attempt's status instead of being applied again
+repeat_reads = RepeatReadFilter()
+idempotency = IdempotencyCache()
+_events_lock = threading.Lock()
+
 # ------------------------
 # CAMPUS PARKING DATA
 # ------------------------
@@ -71,45 +134,628 @@ for zone_name, z in parking_info["zones"].items():
     for lot in z["lots"]:
         lot_index.setdefault(lot, []).append(zone_name)
 
+# -------- lookup tables: normalized key -> canonical name --------
+# Built once at import so resolving a name is one hash lookup, however many
+# zones and lots there are.
+
+_SEPARATORS = re.compile(r"[\s_\-]+")
+_NOT_ALNUM = re.compile(r"[^0-9A-Z]")
+
+
+def zone_key(name: str) -> str:
+    """"Dark Blue", "dark-blue", " DARK_blue " -> "dark blue"."""
+    return _SEPARATORS.sub(" ", name.strip().lower()).strip()
+
+
+def lot_key(lot_id: str) -> str:
+    """"K-1", "k1", "k 1" -> "K1"."""
+    return _NOT_ALNUM.sub("", lot_id.upper())
+
+
+zone_lookup = {zone_key(name): name for name in parking_info["zones"]}
+lot_lookup = {lot_key(lot): lot for lot in lot_index}
+
+
+def resolve_zone(name: str):
+    """Canonical zone name for any spelling, or None."""
+    return zone_lookup.get(zone_key(name))
+
+
+def resolve_lot(lot_id: str):
+    """Canonical lot ID for any spelling, or None."""
+    return lot_lookup.get(lot_key(lot_id))
+
+
+# "Green (Commuters)", "green", "commuters" -> "Green (Commuters)"
+group_lookup = {}
+for group in CAPACITY:
+    color, _, who = group.partition(" (")
+    for alias in (group, color, who.rstrip(")")):
+        group_lookup[zone_key(alias)] = group
+
+
+def resolve_group(name: str):
+    """Canonical occupancy group (CAPACITY key) for any spelling, or None."""
+    return group_lookup.get(zone_key(name))
+
+
+# physical lots with tracked occupancy (LOT_CAPACITY), same spellings as lot_key
+parking_lot_lookup = {lot_key(lot): lot for lot in LOT_IDS}
+
+
+def resolve_parking_lot(lot_id: str):
+    """Canonical LOT_CAPACITY lot code for any spelling, or None."""
+    return parking_lot_lookup.get(lot_key(lot_id))
+
+
+# "Barone Campus Center (BCC)", "barone campus center", "bcc" -> canonical;
+# "The Village / Regis area" also answers to either half
+destination_lookup = {}
+for dest in DESTINATIONS:
+    name, _, short = dest.partition(" (")
+    for alias in (dest, name, short.rstrip(")"), *name.split(" / ")):
+        if alias:
+            destination_lookup[zone_key(alias)] = dest
+
+
+def resolve_destination(name: str):
+    """Canonical DESTINATIONS entry for any spelling, or None."""
+    return destination_lookup.get(zone_key(name))
+
+
+# all-pairs walking times and per-destination lot rankings, built at import
+recommender = Recommender()
+
+# ------------------------
+# LIVE OCCUPANCY
+# ------------------------
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_feed() -> OccupancyFeed:
+    """Open the parking store and start the occupancy feed on first use."""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            store = open_store(CAPACITY.keys(), JOURNAL, DB, legacy_csv=FILE)
+            _feed = OccupancyFeed(store, CAPACITY).start()
+        return _feed
+
+
+def get_store():
+    return get_feed().store
+
+
+_sweeper = None
+
+
+def get_sweeper() -> OverstaySweeper:
+    """Start the background overstay sweeper on first use."""
+    global _sweeper
+    store = get_store()
+    with _feed_lock:
+        if _sweeper is None:
+            _sweeper = OverstaySweeper(store).start()
+        return _sweeper
+
+
+_rollup = None
+
+
+def get_rollup() -> OccupancyRollup:
+    """Build the hourly occupancy cube from all history on first use."""
+    global _rollup
+    store = get_store()
+    with _feed_lock:
+        if _rollup is None:
+            _rollup = OccupancyRollup(store, HistoryArchive(ARCHIVE_DIR)).start()
+        return _rollup
+
+
+def parse_forecast_time(value: str, now: datetime):
+    """``HH:MM`` (next occurrence) or an ISO datetime; None if unparseable.
+
+    A datetime with a UTC offset is converted to local time, like gate events.
+    """
+    try:
+        when = datetime.strptime(value, "%H:%M")
+    except ValueError:
+        try:
+            when = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if when.tzinfo is not None:
+            when = when.astimezone().replace(tzinfo=None)
+        return when
+    when = datetime.combine(now.date(), when.time())
+    return when if when >= now else when + timedelta(days=1)
+
+
+def hours_arg(default: float, maximum: float):
+    """``?hours=`` capped at ``maximum``; None if negative or not finite."""
+    hours = request.args.get("hours", default, type=float)
+    if not math.isfinite(hours) or hours < 0:
+        return None
+    return min(hours, maximum)
+
+
+def sse(event: str, data, event_id: int = None) -> str:
+    """Format one Server-Sent Events message."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# ------------------------
+# GATE EVENT PARSING
+# ------------------------
+
+def read_event_records(body: bytes, content_type: str) -> list:
+    """Decode a POST /events body into a list of dicts.
+
+    msgpack bodies (application/msgpack) hold a stream of maps or a single
+    array of maps; anything else is read as JSON lines, or as one JSON array
+    if the body starts with "[".
+    """
+    if content_type in ("application/msgpack", "application/x-msgpack"):
+        if msgpack is None:
+            raise ValueError("msgpack bodies need the msgpack package")
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(body)
+        records = list(unpacker)
+        if len(records) == 1 and isinstance(records[0], list):
+            records = records[0]
+        return records
+    text = body.decode("utf-8").strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def parse_gate_event(record):
+    """dict -> (event, plate, group, time, lot code), or None if it is not usable.
+
+    Fields: ``event`` ("IN"/"OUT"), ``plate``, ``group`` (any spelling
+    ``resolve_group`` accepts), optional ``lot`` (a lot code in that group,
+    e.g. "B-1"; implies the group) and optional ISO ``time``.  IN needs a
+    group or a lot.  Times with a UTC offset are converted to local time,
+    like the journal.  A time more than ``MAX_CLOCK_SKEW`` in the future is
+    not usable: an IN stamped then would make every real OUT an exit before
+    its entry.
+    """
+    if not isinstance(record, dict):
+        return None
+    event = str(record.get("event", "")).upper()
+    plate = str(record.get("plate", "")).upper().strip()
+    if event not in (IN, OUT) or not plate:
+        return None
+    group = resolve_group(str(record.get("group", "")))
+    lot_code = None
+    if event == IN and record.get("lot"):
+        lot_code = resolve_parking_lot(str(record["lot"]))
+        if lot_code is None or group not in (None, LOT_GROUP[lot_code]):
+            return None
+        group = LOT_GROUP[lot_code]
+    if event == IN and group is None:
+        return None
+    now = datetime.now()
+    try:
+        when = datetime.fromisoformat(record["time"]) if record.get("time") else now
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is not None:
+        when = when.astimezone().replace(tzinfo=None)
+    if when > now + MAX_CLOCK_SKEW:
+        return None
+    return event, plate, group, when, lot_code
+
+# ------------------------
+# PRECOMPUTED RESPONSES
+# ------------------------
+
+class StaticResponse:
+    """A JSON body serialized, hashed and compressed once at startup.
+
+    Served with a strong ETag and Cache-Control; a matching If-None-Match
+    gets an empty 304.  gzip (and brotli, when installed) bodies are kept
+    alongside the plain one and picked from Accept-Encoding.
+    """
+
+    def __init__(self, payload, status=200):
+        self.payload = payload
+        self.status = status
+        body = (app.json.dumps(payload, separators=(",", ":")) + "\n").encode()
+        tag = hashlib.sha256(body).hexdigest()[:32]
+
+        # encoding -> (body, strong ETag for that representation)
+        self.variants = {"identity": (body, tag)}
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body):
+            self.variants["gzip"] = (gz, f"{tag}-gz")
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+            if len(br) < len(body):
+                self.variants["br"] = (br, f"{tag}-br")
+        self.etags = [etag for _, etag in self.variants.values()]
+
+    def respond(self) -> Response:
+        if not PRECOMPUTED:
+            response = jsonify(self.payload)
+            response.status_code = self.status
+            return response
+        encoding = request.accept_encodings.best_match(
+            [e for e in ("br", "gzip") if e in self.variants], default="identity"
+        )
+        body, etag = self.variants[encoding]
+        headers = {
+            "ETag": f'"{etag}"',
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if self.status == 200 and any(e in request.if_none_match for e in self.etags):
+            return Response(status=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, status=self.status, headers=headers, mimetype="application/json")
+
+
+HOME = StaticResponse({"message": "Fairfield Parking API working!", "endpoints": [
+    "/zones",
+    "/zones/<zone_name>",
+    "/lots/<lot_id>",
+    "/walking-times",
+    "/occupancy",
+    "/occupancy/<group>",
+    "/occupancy/lots",
+    "/recommend?destination=<place>&group=<group>&at=<HH:MM>",
+    "/occupancy/stream",
+    "POST /events",
+    "/overstays?hours=<hours>",
+    "/overstays/alerts?since=<seq>",
+    "/analytics/occupancy/<group or lot>",
+    "/forecast/<group or lot>?at=<HH:MM>",
+    "/metrics"
+]})
+ZONES = StaticResponse(parking_info["zones"])
+WALKING_TIMES = StaticResponse(parking_info["walking_times"])
+ZONE_RESPONSES = {
+    name: StaticResponse(z) for name, z in parking_info["zones"].items()
+}
+LOT_RESPONSES = {
+    lot_id: StaticResponse({
+        "lot": lot_id,
+        "zones": zones,
+        "is_visitor_lot": lot_id in parking_info["visitor_lots"]
+    })
+    for lot_id, zones in lot_index.items()
+}
+ZONE_NOT_FOUND = StaticResponse({"error": "Zone not found"}, status=404)
+LOT_NOT_FOUND = StaticResponse({"error": "Lot not found"}, status=404)
+
 # ------------------------
 # API ROUTES
 # ------------------------
 
 @app.get("/")
 def home():
-    return jsonify({"message": "Fairfield Parking API working!", "endpoints": [
-        "/zones",
-        "/zones/<zone_name>",
-        "/lots/<lot_id>",
-        "/walking-times"
-    ]})
+    return HOME.respond()
 
 @app.get("/zones")
 def get_zones():
-    return jsonify(parking_info["zones"])
+    return ZONES.respond()
 
 @app.get("/zones/<zone_name>")
 def get_zone(zone_name):
-    for name, z in parking_info["zones"].items():
-        if name.lower() == zone_name.lower():
-            return jsonify(z)
-    return jsonify({"error": "Zone not found"}), 404
+    return ZONE_RESPONSES.get(resolve_zone(zone_name), ZONE_NOT_FOUND).respond()
 
 @app.get("/lots/<lot_id>")
 def get_lot(lot_id):
-    lot_id = lot_id.upper()
-    if lot_id not in lot_index:
-        return jsonify({"error": "Lot not found"}), 404
-
-    return jsonify({
-        "lot": lot_id,
-        "zones": lot_index[lot_id],
-        "is_visitor_lot": lot_id in parking_info["visitor_lots"]
-    })
+    return LOT_RESPONSES.get(resolve_lot(lot_id), LOT_NOT_FOUND).respond()
 
 @app.get("/walking-times")
 def get_walking():
-    return jsonify(parking_info["walking_times"])
+    return WALKING_TIMES.respond()
+
+@app.get("/occupancy")
+def get_occupancy():
+    response = jsonify(get_feed().snapshot())
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.get("/occupancy/stream")
+def stream_occupancy():
+    """Server-Sent Events: one snapshot, then a delta per group change.
+
+    Reconnecting clients send Last-Event-ID and get only what they missed
+    (or a fresh snapshot if it is too old).
+    """
+    feed = get_feed()
+    last_id = request.headers.get("Last-Event-ID", type=int)
+
+    def events():
+        seq, snapshot = feed.state()
+        missed = feed.since(last_id) if last_id is not None else None
+        if missed is None:
+            yield sse("snapshot", snapshot, seq)
+        else:
+            for seq, delta in missed:
+                yield sse("delta", delta, seq)
+        while True:
+            changes = feed.wait(seq, timeout=STREAM_KEEPALIVE)
+            if changes is None:  # fell too far behind: resync
+                seq, snapshot = feed.state()
+                yield sse("snapshot", snapshot, seq)
+            elif not changes:
+                yield ": keep-alive\n\n"
+            for seq, delta in changes or []:
+                yield sse("delta", delta, seq)
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/events")
+def post_events():
+    """Bulk gate events (e.g. from plate-recognition cameras).
+
+    Events may carry a ``gate`` and an idempotency ``id``.  Before the
+    store sees them, an event whose ``id`` was already processed gets its
+    original status back, and a repeat camera read of the same plate and
+    event at the same gate inside ``REPEAT_WINDOW`` is dropped as
+    ``repeat_read``.  The
+    rest are checked against the same duplicate-plate and capacity rules as
+    PARK IN / PARK OUT, in order, and committed together; an OUT stamped
+    before the plate's entry is rejected as ``exit_before_entry``.  The
+    reply lists only the events that were not accepted, with status 422 if
+    none of a non-empty batch was, whatever the reasons.
+    """
+    try:
+        records = read_event_records(request.get_data(), request.mimetype)
+    except ValueError as exc:  # includes JSON decode errors
+        return jsonify({"error": f"Could not decode events: {exc}"}), 400
+    if not isinstance(records, list):
+        return jsonify({"error": "Expected a list of events"}), 400
+    if len(records) > MAX_BATCH:
+        return jsonify({"error": f"At most {MAX_BATCH} events per request"}), 413
+
+    events = [parse_gate_event(record) for record in records]
+    statuses = [None] * len(records)
+    first_with_key = {}
+    repeats = []  # (index, index of the first event in this batch with its key)
+    to_store = []  # (index, event)
+    store = get_store()
+    with _events_lock:
+        for i, (record, event) in enumerate(zip(records, events)):
+            if event is None:
+                statuses[i] = INVALID
+                continue
+            key = record.get("id")
+            if key is not None:
+                key = str(key)
+                if key in first_with_key:
+                    repeats.append((i, first_with_key[key]))
+                    continue
+                statuses[i] = idempotency.get(key)
+                if statuses[i] is not None:
+                    continue  # answered by an earlier request
+                first_with_key[key] = i
+            if repeat_reads.is_repeat(event[0], event[1], str(record.get("gate", "")), event[3]):
+                statuses[i] = REPEAT_READ
+            else:
+                to_store.append((i, event))
+
+        if to_store:
+            applied = store.apply_events([e for _, e in to_store], CAPACITY, LOT_CAPACITY)
+            for (i, _), status in zip(to_store, applied):
+                statuses[i] = status
+        for key, i in first_with_key.items():
+            idempotency.put(key, statuses[i])
+    for i, first in repeats:
+        statuses[i] = statuses[first]
+    if to_store:
+        get_feed().poll()  # push the new counts to stream clients right away
+
+    accepted = statuses.count(OK)
+    body = jsonify({
+        "received": len(records),
+        "accepted": accepted,
+        "rejected": [
+            {"index": i, "status": status}
+            for i, status in enumerate(statuses)
+            if status != OK
+        ],
+    })
+    if records and not accepted:
+        return body, 422
+    return body
+
+@app.get("/occupancy/<group>")
+def get_group_occupancy(group):
+    name = resolve_group(group)
+    if name is None:
+        return jsonify({"error": "Group not found"}), 404
+    response = jsonify(get_feed().group(name))
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.get("/occupancy/lots")
+def get_lot_occupancy():
+    """Live occupancy of every physical lot."""
+    usage = get_store().lot_usage()
+    response = jsonify({
+        lot: {
+            "group": LOT_GROUP[lot],
+            "capacity": LOT_CAPACITY[lot],
+            "used": used,
+            "free": LOT_CAPACITY[lot] - used,
+        }
+        for lot, used in usage.items()
+    })
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.get("/recommend")
+def recommend():
+    """Best lots with free spaces for a destination and group, best first.
+
+    ``?destination=`` (any spelling ``resolve_destination`` accepts),
+    ``group=`` and optional ``limit=`` (default 3, at least 1, capped at the
+    number of lots).  With ``at=HH:MM`` each lot also gets ``forecast_free``,
+    the free spaces expected then.
+    """
+    destination = resolve_destination(request.args.get("destination", ""))
+    if destination is None:
+        return jsonify({"error": "Destination not found", "destinations": DESTINATIONS}), 404
+    group = resolve_group(request.args.get("group", ""))
+    if group is None:
+        return jsonify({"error": "Group not found"}), 404
+    limit = request.args.get("limit", 3, type=int)
+    if limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    limit = min(limit, len(LOT_CAPACITY))
+    usage = get_store().lot_usage()
+    ranked = recommender.rank(destination, group, usage, limit)
+    body = {"destination": destination, "group": group, "recommendations": ranked}
+    if "at" in request.args and ranked:
+        now = datetime.now()
+        when = parse_forecast_time(request.args["at"], now)
+        if when is None:
+            return jsonify({"error": "at must be HH:MM or an ISO datetime"}), 400
+        parked = OccupancyForecaster(get_rollup()).predict(
+            {r["lot"]: usage.get(r["lot"], 0) for r in ranked}, [when], now
+        )
+        for r in ranked:
+            r["forecast_free"] = int(round(r["capacity"] - parked[r["lot"]][0]))
+        body["at"] = when.isoformat(timespec="minutes")
+    response = jsonify(body)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.get("/overstays")
+def get_overstays():
+    """Cars parked longer than ``hours`` (default 4), oldest first."""
+    hours = hours_arg(4, MAX_OVERSTAY_HOURS)
+    if hours is None:
+        return jsonify({"error": "hours must be a non-negative number"}), 400
+    now = datetime.now()
+    over = get_store().parked_before(now - timedelta(hours=hours))
+    response = jsonify([
+        {
+            "plate": plate,
+            "lot": lot,
+            "lot_code": lot_code,
+            "entry": entry.isoformat(),
+            "hours_parked": round((now - entry).total_seconds() / 3600, 2),
+        }
+        for plate, lot, entry, lot_code in over.itertuples(index=False)
+    ])
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.get("/overstays/alerts")
+def get_overstay_alerts():
+    """Threshold crossings raised by the background sweeper after ``since``."""
+    sweeper = get_sweeper()
+    response = jsonify({
+        "seq": sweeper.seq,
+        "alerts": sweeper.since(request.args.get("since", 0, type=int)),
+    })
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.get("/analytics/occupancy/<name>")
+def get_occupancy_heatmap(name):
+    """Average cars parked per weekday x hour for a group or a physical lot."""
+    key = resolve_group(name) or resolve_parking_lot(name)
+    if key is None:
+        return jsonify({"error": "Group or lot not found"}), 404
+    rollup = get_rollup()
+    average, utilization = rollup.heatmap(key)
+    response = jsonify({
+        "name": key,
+        "capacity": CAPACITY.get(key) or LOT_CAPACITY[key],
+        "sessions": rollup.sessions,
+        "through": rollup.watermark.isoformat() if rollup.watermark is not None else None,
+        "weekdays": WEEKDAYS,
+        "hours": list(range(24)),
+        "average_parked": average.round(2).tolist(),
+        "utilization": utilization.round(3).tolist(),
+    })
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.get("/forecast/<name>")
+def get_forecast(name):
+    """Expected free spaces in a group or lot.
+
+    ``?at=HH:MM`` (next occurrence) or an ISO datetime for a single time;
+    otherwise every ``step`` minutes (default 30) for the next ``hours`` (4).
+    """
+    group = resolve_group(name)
+    key = group or resolve_parking_lot(name)
+    if key is None:
+        return jsonify({"error": "Group or lot not found"}), 404
+    now = datetime.now()
+    store = get_store()
+    parked = store.count(key) if group else store.lot_count(key)
+    capacity = CAPACITY.get(key) or LOT_CAPACITY[key]
+    forecaster = OccupancyForecaster(get_rollup())
+
+    hours = hours_arg(4, 48)
+    if hours is None:
+        return jsonify({"error": "hours must be a non-negative number"}), 400
+
+    body = {"name": key, "capacity": capacity, "parked_now": parked, "free_now": capacity - parked}
+    if "at" in request.args:
+        when = parse_forecast_time(request.args["at"], now)
+        if when is None:
+            return jsonify({"error": "at must be HH:MM or an ISO datetime"}), 400
+        body["at"] = when.isoformat(timespec="minutes")
+        body["free"] = forecaster.free_at(key, when, parked, now)
+    else:
+        body["forecast"] = [
+            dict(f, time=f["time"].isoformat(timespec="minutes"))
+            for f in forecaster.outlook(
+                key, parked, now,
+                hours=hours,
+                step_minutes=max(request.args.get("step", 30, type=int), 5),
+            )
+        ]
+    response = jsonify(body)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+# ------------------------
+# METRICS
+# ------------------------
+# Per-route timings, registered only with PARKING_METRICS=1 so a disabled
+# build runs no extra code per request.  A stream is timed until its first
+# byte is handed to the server, not for as long as the client stays.
+
+if parking_metrics.ENABLED:
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_timing(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            parking_metrics.observe(
+                "parking_http_request_seconds", time.perf_counter() - started,
+                route=request.url_rule.rule if request.url_rule else "unmatched",
+                method=request.method, status=response.status_code,
+            )
+        return response
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of every span and counter in this process."""
+    if not parking_metrics.ENABLED:
+        return Response("metrics are off (set PARKING_METRICS=1)\n", status=404, mimetype="text/plain")
+    return Response(parking_metrics.render(), content_type=parking_metrics.CONTENT_TYPE)
 
 # ------------------------
 # RUN APPLICATION
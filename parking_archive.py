@@ -0,0 +1,455 @@
+"""Cold storage for closed parking sessions.
+
+Closed sessions older than a recent window are moved out of the live store
+into day partitions (by Entry date), so every rerun only loads open sessions
+plus recent history.  The History page reads the archive only when asked to,
+and only the days and columns it needs.
+
+With pyarrow installed, partitions are columnar Parquet files
+(``date=YYYY-MM-DD/part-*.parquet``) with Plate/Lot/LotCode
+dictionary-encoded and Entry/Exit stored as timestamps; without it they are
+``YYYY-MM-DD.csv``.  Both layouts can be read side by side, and partitions
+written before LotCode was recorded read back with an empty LotCode.
+
+    python -m parking_archive [run] [--keep-days 7]   # archive now, e.g. from cron
+    python -m parking_archive migrate [--csv F]       # CSV partitions/history -> Parquet
+"""
+import argparse
+import os
+import sys
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from parking_config import ARCHIVE_DIR, DB, JOURNAL
+from parking_journal import SESSION_COLUMNS, read_sessions_csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # CSV partitions only
+    pa = None
+
+# Live set keeps open sessions plus this much closed history
+KEEP = timedelta(days=7)
+# Archive at least this often ...
+EVERY = timedelta(hours=24)
+# ... or sooner once the live set holds this many sessions
+MAX_LIVE_ROWS = 50_000
+
+if pa is not None:
+    ARROW_SCHEMA = pa.schema(
+        [
+            ("Plate", pa.dictionary(pa.int32(), pa.string())),
+            ("Lot", pa.dictionary(pa.int8(), pa.string())),
+            ("Entry", pa.timestamp("ns")),
+            ("Exit", pa.timestamp("ns")),
+            ("LotCode", pa.dictionary(pa.int8(), pa.string())),
+        ]
+    )
+
+
+def _matching(df: pd.DataFrame, plate: str = None, group: str = None) -> pd.DataFrame:
+    """Rows whose Plate starts with ``plate`` and whose Lot is ``group``."""
+    if group:
+        df = df[df["Lot"] == group]
+    if plate:
+        df = df[df["Plate"].astype(str).str.startswith(plate)]
+    return df
+
+
+def _keys(df: pd.DataFrame) -> pd.MultiIndex:
+    """(Plate, Entry) of every session, comparable across CSV and Parquet."""
+    return pd.MultiIndex.from_arrays(
+        [df["Plate"].astype(str), df["Entry"].astype("datetime64[ns]")], names=["Plate", "Entry"]
+    )
+
+
+def _empty_sessions(columns) -> pd.DataFrame:
+    df = pd.DataFrame(columns=SESSION_COLUMNS).astype(
+        {"Entry": "datetime64[ns]", "Exit": "datetime64[ns]"}
+    )
+    return df[columns]
+
+
+class HistoryArchive:
+    """Day-partitioned store of closed sessions (Parquet, or CSV fallback)."""
+
+    def __init__(self, root: str, fmt: str = None):
+        self.root = root
+        self.fmt = fmt or ("parquet" if pa is not None else "csv")
+        if self.fmt == "parquet" and pa is None:
+            raise RuntimeError("Parquet archive needs pyarrow (pip install pyarrow)")
+        self._file_rows = {}  # (path, size, mtime) -> sessions in that file
+        self._filtered = (None, None)  # (query, {day: matching sessions})
+
+    def _csv_path(self, day: date) -> str:
+        return os.path.join(self.root, f"{day.isoformat()}.csv")
+
+    def _parquet_dir(self, day: date) -> str:
+        return os.path.join(self.root, f"date={day.isoformat()}")
+
+    def _partitions(self) -> dict:
+        """{day: (csv path or None, [parquet files])} for every partition on disk."""
+        parts = {}
+        if not os.path.isdir(self.root):
+            return parts
+        for name in os.listdir(self.root):
+            stem, ext = os.path.splitext(name)
+            try:
+                if ext == ".csv":
+                    day = date.fromisoformat(stem)
+                    parts.setdefault(day, [None, []])[0] = os.path.join(self.root, name)
+                elif name.startswith("date="):
+                    day = date.fromisoformat(name[len("date="):])
+                    folder = os.path.join(self.root, name)
+                    files = sorted(
+                        os.path.join(folder, f)
+                        for f in os.listdir(folder)
+                        if f.endswith(".parquet")
+                    )
+                    parts.setdefault(day, [None, []])[1].extend(files)
+            except ValueError:
+                pass
+        return parts
+
+    def dates(self) -> list:
+        """Days that have an archive partition, oldest first."""
+        return sorted(self._partitions())
+
+    def write(self, df: pd.DataFrame):
+        """Add closed sessions to their day partitions (fsync-ed).
+
+        Sessions the partition already holds (archived before a crash kept
+        them in the live store) are skipped, so footer row counts stay exact.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        for day, part in df.groupby(df["Entry"].dt.date):
+            part = part[~_keys(part).isin(_keys(self.read(day, day, columns=["Plate", "Entry"])))]
+            if part.empty:
+                continue
+            if self.fmt == "parquet":
+                self._write_parquet(day, part)
+            else:
+                self._write_csv(day, part)
+
+    def _write_csv(self, day: date, part: pd.DataFrame):
+        path = self._csv_path(day)
+        part = part.reindex(columns=SESSION_COLUMNS)
+        header = not os.path.exists(path)
+        if not header:
+            with open(path, encoding="utf-8") as fh:
+                old_header = fh.readline().strip().split(",")
+            if old_header != SESSION_COLUMNS:
+                # written before LotCode: rewrite the day with the current columns
+                old = read_sessions_csv(path)
+                part = pd.concat([old.reindex(columns=SESSION_COLUMNS), part], ignore_index=True)
+                with open(path + ".tmp", "w", newline="", encoding="utf-8") as fh:
+                    part.to_csv(fh, index=False)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                os.replace(path + ".tmp", path)
+                return
+        with open(path, "a", newline="", encoding="utf-8") as fh:
+            part.to_csv(fh, header=header, index=False)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def _write_parquet(self, day: date, part: pd.DataFrame):
+        # Parquet files cannot be appended to, so each write adds a new part;
+        # the temp name keeps half-written files out of reads.
+        folder = self._parquet_dir(day)
+        os.makedirs(folder, exist_ok=True)
+        table = pa.Table.from_pandas(
+            part.reindex(columns=SESSION_COLUMNS).astype(
+                {"Plate": str, "Lot": str, "Entry": "datetime64[ns]", "Exit": "datetime64[ns]",
+                 "LotCode": "string"}
+            ),
+            schema=ARROW_SCHEMA,
+            preserve_index=False,
+        )
+        path = os.path.join(folder, f"part-{uuid.uuid4().hex}.parquet")
+        pq.write_table(table, path + ".tmp", compression="zstd")
+        with open(path + ".tmp", "rb") as fh:
+            os.fsync(fh.fileno())
+        os.replace(path + ".tmp", path)
+
+    def read(self, start: date = None, end: date = None, columns=None) -> pd.DataFrame:
+        """Archived sessions with Entry between ``start`` and ``end`` (inclusive).
+
+        Only the partitions in range are opened, and only ``columns`` (default:
+        all) are decoded.
+        """
+        columns = list(columns or SESSION_COLUMNS)
+        parts = [
+            paths for day, paths in sorted(self._partitions().items())
+            if (start is None or day >= start) and (end is None or day <= end)
+        ]
+        csv_files = [c for c, _ in parts if c]
+        parquet_files = [f for _, files in parts for f in files]
+
+        frames = []
+        if parquet_files:
+            table = ds.dataset(parquet_files, schema=ARROW_SCHEMA, format="parquet").to_table(
+                columns=columns
+            )
+            frames.append(table.to_pandas())
+        for path in csv_files:
+            frames.append(
+                read_sessions_csv(path, usecols=lambda c: c in columns).reindex(columns=columns)
+            )
+        if not frames:
+            return _empty_sessions(columns)
+
+        df = pd.concat(frames, ignore_index=True)
+        if "Plate" in columns and "Entry" in columns:
+            # a crash between archiving and compacting the live store can
+            # leave a session archived twice
+            df = df.drop_duplicates(["Plate", "Entry"], ignore_index=True)
+        return df
+
+    def page(self, offset: int = 0, limit: int = 50, plate: str = None, group: str = None,
+             start: date = None, end: date = None, exclude: pd.MultiIndex = None):
+        """One page of archived sessions, newest Entry first, and how many match.
+
+        Partitions are visited newest day first and whole days before the
+        page are skipped by their session counts (Parquet footers, cached per
+        file), so only the days the page falls in are decoded.  With a plate
+        or group filter the counts come from one streamed pass over the
+        Plate/Lot/Entry columns, cached for the same query.
+
+        ``exclude`` holds (Plate, Entry) keys of archived sessions that match
+        the filters but are left out of the page and the total.
+        """
+        parts = self._partitions()
+        days = sorted(
+            (d for d in parts if (start is None or d >= start) and (end is None or d <= end)),
+            reverse=True,
+        )
+        if plate or group:
+            counts = dict(self._filtered_counts(parts, days, plate, group))
+        else:
+            counts = {d: self._partition_rows(*parts[d]) for d in days}
+        if exclude is not None and len(exclude):
+            for day, n in pd.Series(exclude.get_level_values("Entry").date).value_counts().items():
+                if day in counts:
+                    counts[day] -= n
+
+        frames, skip, need = [], offset, limit
+        for day in days:
+            if need <= 0:
+                break
+            if skip >= counts[day]:
+                skip -= counts[day]
+                continue
+            rows = _matching(self.read(day, day), plate, group).sort_values(
+                "Entry", ascending=False, kind="stable"
+            )
+            if exclude is not None and len(exclude):
+                rows = rows[~_keys(rows).isin(exclude)]
+            frames.append(rows.iloc[skip:skip + need])
+            need -= len(frames[-1])
+            skip = 0
+        df = pd.concat(frames, ignore_index=True) if frames else _empty_sessions(SESSION_COLUMNS)
+        return df, sum(counts.values())
+
+    def _file_key(self, path: str):
+        st = os.stat(path)
+        return path, st.st_size, st.st_mtime_ns
+
+    def _partition_rows(self, csv_path, parquet_files) -> int:
+        total = 0
+        for path in ([csv_path] if csv_path else []) + parquet_files:
+            key = self._file_key(path)
+            if key not in self._file_rows:
+                if path.endswith(".parquet"):
+                    self._file_rows[key] = pq.ParquetFile(path).metadata.num_rows
+                else:
+                    self._file_rows[key] = len(pd.read_csv(path, usecols=["Plate"]))
+            total += self._file_rows[key]
+        return total
+
+    def _filtered_counts(self, parts: dict, days: list, plate: str, group: str) -> dict:
+        files = [self._file_key(f) for d in days for f in filter(None, [parts[d][0], *parts[d][1]])]
+        query = (plate, group, tuple(files))
+        if self._filtered[0] == query:
+            return self._filtered[1]
+
+        counts = dict.fromkeys(days, 0)
+
+        def tally(entries: np.ndarray):
+            entry_days, n = np.unique(entries.astype("datetime64[D]"), return_counts=True)
+            for day, k in zip(entry_days.tolist(), n.tolist()):
+                if day in counts:
+                    counts[day] += k
+
+        parquet_files = [f for d in days for f in parts[d][1]]
+        if parquet_files:
+            # filter inside the scan: only matching Entry values are decoded
+            condition = ds.scalar(True)
+            if group:
+                condition &= ds.field("Lot") == group
+            if plate:
+                condition &= pc.starts_with(ds.field("Plate").cast(pa.string()), plate)
+            dataset = ds.dataset(parquet_files, schema=ARROW_SCHEMA, format="parquet")
+            tally(dataset.to_table(columns=["Entry"], filter=condition)["Entry"].to_numpy())
+        for day in days:
+            if parts[day][0]:
+                df = read_sessions_csv(parts[day][0], usecols=["Plate", "Lot", "Entry"])
+                tally(_matching(df, plate, group)["Entry"].to_numpy(dtype="datetime64[ns]"))
+        self._filtered = (query, counts)
+        return counts
+
+    def convert_csv_partitions(self) -> int:
+        """Rewrite every CSV partition as Parquet; returns sessions converted."""
+        converted = 0
+        for day, (csv_path, _) in sorted(self._partitions().items()):
+            if csv_path is None:
+                continue
+            part = read_sessions_csv(csv_path)
+            self._write_parquet(day, part)
+            os.remove(csv_path)
+            converted += len(part)
+        return converted
+
+
+class Archiver:
+    """Moves old closed sessions from a store into a ``HistoryArchive``.
+
+    ``maybe_run`` is cheap enough to call on every rerun: it only archives
+    when ``every`` has passed since the last run or the live set has grown
+    past ``max_live_rows``.
+    """
+
+    def __init__(self, store, archive: HistoryArchive, keep=KEEP, every=EVERY,
+                 max_live_rows=MAX_LIVE_ROWS):
+        self.store = store
+        self.archive = archive
+        self.keep = keep
+        self.every = every
+        self.max_live_rows = max_live_rows
+        self.last_run = None
+        self._lock = threading.Lock()
+
+    def maybe_run(self, now: datetime = None) -> int:
+        now = now or datetime.now()
+        due = (
+            self.last_run is None
+            or now - self.last_run >= self.every
+            or self.store.live_rows() > self.max_live_rows
+        )
+        return self.run(now) if due else 0
+
+    def page(self, offset: int = 0, limit: int = 50, plate: str = None, group: str = None,
+             start: date = None, end: date = None):
+        """One page of live sessions, then archived ones, and how many match.
+
+        A session that is both archived and still live (a crash between
+        archiving and compacting the store) is counted once, as its live row.
+        """
+        filters = dict(plate=plate, group=group, start=start, end=end)
+        rows, total = self.store.history(offset, limit, **filters)
+        archived, archived_total = self.archive.page(
+            max(0, offset - total), limit - len(rows), exclude=self._still_live(**filters), **filters
+        )
+        if len(archived):
+            rows = pd.concat([rows, archived], ignore_index=True)
+        return rows, total + archived_total
+
+    def _still_live(self, plate=None, group=None, start=None, end=None) -> pd.MultiIndex:
+        """(Plate, Entry) of archived sessions matching the filters that are still live."""
+        none = _keys(_empty_sessions(["Plate", "Entry"]))
+        days = self.archive.dates()
+        if not days:
+            return none
+        first = max(days[0], start) if start else days[0]
+        last = min(days[-1], end) if end else days[-1]
+        if first > last:
+            return none
+        filters = dict(plate=plate, group=group, start=first, end=last)
+        live, n = self.store.history(0, 0, **filters)
+        if not n:
+            return none
+        live = _keys(self.store.history(0, n, **filters)[0])
+        archived = pd.concat([
+            self.archive.read(day, day, columns=["Plate", "Entry"])
+            for day in sorted(set(live.get_level_values("Entry").date))
+        ])
+        return live[live.isin(_keys(archived))]
+
+    def run(self, now: datetime = None) -> int:
+        """Archive now; returns the number of sessions moved."""
+        now = now or datetime.now()
+        if not self._lock.acquire(blocking=False):
+            return 0  # another session is already archiving
+        try:
+            moved = self.store.archive_closed(now - self.keep, self.archive)
+            self.last_run = now
+            return moved
+        finally:
+            self._lock.release()
+
+
+def _default_command(argv: list) -> list:
+    """``argv`` with ``run`` inserted when no command is given.
+
+    Keeps ``python -m parking_archive --keep-days 7`` (cron lines from before
+    ``migrate`` existed) working: ``run`` goes after the top-level options.
+    """
+    i = 0
+    while i < len(argv) and (argv[i] == "--archive" or argv[i].startswith("--archive=")):
+        i += 2 if argv[i] == "--archive" else 1
+    if i < len(argv) and argv[i] in ("run", "migrate", "-h", "--help"):
+        return argv
+    return argv[:i] + ["run"] + argv[i:]
+
+
+def main(argv=None):
+    from parking_store import open_store
+
+    parser = argparse.ArgumentParser(
+        description="Archive old closed parking sessions.",
+        usage="%(prog)s [--archive DIR] [run] [--keep-days N] [--journal F] [--db F] [--backend B]\n"
+              "       %(prog)s [--archive DIR] migrate [--csv F]",
+    )
+    parser.add_argument("--archive", default=ARCHIVE_DIR)
+    commands = parser.add_subparsers(dest="command")
+
+    run = commands.add_parser("run", help="archive old sessions now (default)")
+    run.add_argument("--archive", default=argparse.SUPPRESS)
+    run.add_argument("--keep-days", type=float, default=KEEP.days)
+    run.add_argument("--journal", default=JOURNAL)
+    run.add_argument("--db", default=DB)
+    run.add_argument("--backend", default=None, help="journal or sqlite (default: $PARKING_STORE)")
+
+    migrate = commands.add_parser("migrate", help="move CSV history into Parquet partitions")
+    migrate.add_argument(
+        "--csv",
+        help="also import closed sessions from this Plate,Lot,Entry,Exit CSV "
+             "(only for history the live store does not already hold)",
+    )
+    args = parser.parse_args(_default_command(sys.argv[1:] if argv is None else list(argv)))
+
+    if args.command == "migrate":
+        archive = HistoryArchive(args.archive, fmt="parquet")
+        converted = archive.convert_csv_partitions()
+        print(f"Converted {converted} archived sessions to Parquet")
+        if args.csv:
+            df = read_sessions_csv(args.csv)
+            closed = df[df["Entry"].notna() & df["Exit"].notna()]
+            archive.write(closed)
+            print(f"Imported {len(closed)} closed sessions from {args.csv}")
+        return
+
+    with open_store([], args.journal, args.db, backend=args.backend) as store:
+        archiver = Archiver(store, HistoryArchive(args.archive), keep=timedelta(days=args.keep_days))
+        print(f"Archived {archiver.run()} sessions to {args.archive}/")
+
+
+if __name__ == "__main__":
+    main()
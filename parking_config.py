@@ -0,0 +1,140 @@
+"""Campus parking configuration shared by the Streamlit app and the API."""
+
+# ------------------------
+# DATA FILES
+# ------------------------
+FILE = "fairfield_parking.csv"            # legacy full-history CSV
+JOURNAL = "fairfield_parking_events.csv"  # append-only IN/OUT event log
+DB = "fairfield_parking.db"               # SQLite backend (PARKING_STORE=sqlite)
+ARCHIVE_DIR = "fairfield_parking_archive"  # closed sessions, one file per day
+
+# ------------------------
+# CATEGORIES & LOTS
+# ------------------------
+# Specific lots inside each category (from the campus map)
+LOTS = {
+    "Orange (Residents)": [
+        "F-1", "F-2", "H-2", "I-1", "M-2"
+    ],
+    "Green (Commuters)": [
+        "B-1", "B-2", "B-3", "E-1", "H-1", "M-1", "N-1", "N-2"
+    ],
+    "Blue (Faculty)": [
+        "A-1", "A-2", "A-3",
+        "C-4", "C-5",
+        "D-1",
+        "G-1", "G-2", "G-3",
+        "J-1", "J-2", "J-3",
+        "K-1", "K-2", "K-3",
+        "O-1",
+    ],
+}
+
+# Spaces in each physical lot
+LOT_CAPACITY = {
+    # Orange (Residents): 320
+    "F-1": 80, "F-2": 60, "H-2": 70, "I-1": 50, "M-2": 60,
+    # Green (Commuters): 480
+    "B-1": 80, "B-2": 60, "B-3": 50, "E-1": 70, "H-1": 60, "M-1": 50, "N-1": 60, "N-2": 50,
+    # Blue (Faculty): 200
+    "A-1": 15, "A-2": 10, "A-3": 10,
+    "C-4": 15, "C-5": 10,
+    "D-1": 20,
+    "G-1": 15, "G-2": 10, "G-3": 10,
+    "J-1": 15, "J-2": 10, "J-3": 10,
+    "K-1": 15, "K-2": 10, "K-3": 10,
+    "O-1": 15,
+}
+
+# Category-level capacities, the sum of their lots
+CAPACITY = {
+    group: sum(LOT_CAPACITY[lot] for lot in lots) for group, lots in LOTS.items()
+}
+
+# Lot code -> position in per-lot counter arrays, and lot code -> category
+LOT_IDS = [lot for lots in LOTS.values() for lot in lots]
+LOT_INDEX = {lot: i for i, lot in enumerate(LOT_IDS)}
+LOT_GROUP = {lot: group for group, lots in LOTS.items() for lot in lots}
+
+# ------------------------
+# CAMPUS WALKING GRAPH
+# ------------------------
+# Places people walk to from their car (shown in "Where are you heading?")
+DESTINATIONS = [
+    "Barone Campus Center (BCC)",
+    "Dolan School of Business",
+    "RecPlex",
+    "Library",
+    "Townhouses",
+    "The Village / Regis area",
+    "Dolan Campus",
+]
+
+# Walkable paths as (place, place, minutes); walks in both directions.
+# Lots connect to the nearest one or two destinations.
+WALKING_EDGES = [
+    # between destinations
+    ("Barone Campus Center (BCC)", "Dolan School of Business", 7),
+    ("Barone Campus Center (BCC)", "Townhouses", 8),
+    ("Barone Campus Center (BCC)", "The Village / Regis area", 4),
+    ("Barone Campus Center (BCC)", "Library", 3),
+    ("Barone Campus Center (BCC)", "Dolan Campus", 8),
+    ("The Village / Regis area", "RecPlex", 4),
+    ("Dolan Campus", "Dolan School of Business", 15),
+    # near BCC / central campus
+    ("C-4", "Barone Campus Center (BCC)", 2),
+    ("C-5", "Barone Campus Center (BCC)", 3),
+    ("B-1", "Barone Campus Center (BCC)", 2),
+    ("B-2", "Barone Campus Center (BCC)", 3),
+    ("B-2", "Library", 2),
+    ("B-3", "Barone Campus Center (BCC)", 4),
+    # near Dolan School of Business
+    ("D-1", "Dolan School of Business", 2),
+    ("D-1", "Dolan Campus", 5),
+    ("E-1", "Dolan School of Business", 2),
+    ("M-1", "Dolan Campus", 2),
+    ("M-2", "Dolan Campus", 2),
+    ("M-2", "Dolan School of Business", 4),
+    # near RecPlex & the Village
+    ("G-1", "RecPlex", 2),
+    ("G-2", "RecPlex", 3),
+    ("G-3", "RecPlex", 3),
+    ("H-1", "RecPlex", 3),
+    ("H-1", "The Village / Regis area", 2),
+    ("H-2", "The Village / Regis area", 1),
+    ("H-2", "RecPlex", 3),
+    ("I-1", "The Village / Regis area", 3),
+    ("J-1", "The Village / Regis area", 2),
+    ("J-2", "The Village / Regis area", 3),
+    ("J-3", "The Village / Regis area", 3),
+    # near the Library / Kelley Center
+    ("A-1", "Library", 2),
+    ("A-2", "Library", 2),
+    ("A-3", "Library", 3),
+    ("K-1", "Library", 1),
+    ("K-2", "Library", 2),
+    ("K-3", "Library", 3),
+    ("F-1", "Library", 3),
+    # near the Townhouse complex
+    ("N-1", "Townhouses", 2),
+    ("N-2", "Townhouses", 3),
+    ("O-1", "Townhouses", 2),
+    ("F-2", "Townhouses", 3),
+]
+
+# Extra minutes charged to a lot by how full it is (0 when empty, this much
+# when one space is left), so a slightly longer walk to an emptier lot wins
+FULLNESS_PENALTY = 5.0
+
+# ------------------------
+# ENFORCEMENT
+# ------------------------
+# Hours parked at which the overstay sweeper raises an alert (one per car
+# per threshold)
+OVERSTAY_HOURS = (4, 8, 24)
+
+# ------------------------
+# FORECASTING
+# ------------------------
+# How fast today's deviation from the weekly profile fades out (hours)
+FORECAST_DECAY_HOURS = 4.0
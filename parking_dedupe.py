@@ -0,0 +1,90 @@
+"""Duplicate-read suppression for bulk gate events.
+
+Plate-recognition cameras often read the same car several times in a few
+seconds.  ``RepeatReadFilter`` drops those repeats with a sliding window per
+(plate, gate, event); ``IdempotencyCache`` remembers the outcome of events
+sent with an ``id`` so a retried request gets the same answer without being
+applied twice.  Both are bounded, so memory stays flat under sustained traffic.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# Reads of the same plate, gate and event closer together than this are one car
+REPEAT_WINDOW = timedelta(seconds=30)
+# Upper bounds on remembered keys (oldest are evicted first)
+MAX_READS = 100_000
+MAX_IDEMPOTENCY_KEYS = 1_000_000
+
+
+class RepeatReadFilter:
+    """Sliding-window index of recent reads keyed by (plate, gate, event).
+
+    Entries are kept in last-seen order, so expiry pops from the front until
+    it reaches one still inside the window.  A plate that keeps being read
+    stays suppressed until it has been out of view for ``window``.  The event
+    is part of the key: an OUT soon after an IN at a combined entry/exit gate
+    is a car turning around, not a repeat read.
+    """
+
+    def __init__(self, window: timedelta = REPEAT_WINDOW, max_keys: int = MAX_READS):
+        self.window = window
+        self.max_keys = max_keys
+        self._last_seen = OrderedDict()
+        self._clock = datetime.min  # newest read time seen so far
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._last_seen)
+
+    def is_repeat(self, event: str, plate: str, gate: str, when: datetime) -> bool:
+        """Record a read; True if it repeats one inside the window.
+
+        Read times are capped at the wall clock: one future-dated read would
+        otherwise move the expiry clock past every real read.
+        """
+        key = (plate, gate, event)
+        when = min(when, datetime.now())
+        with self._lock:
+            if when > self._clock:
+                self._clock = when
+            self._expire()
+            last = self._last_seen.pop(key, None)
+            self._last_seen[key] = max(when, last) if last is not None else when
+            if len(self._last_seen) > self.max_keys:
+                self._last_seen.popitem(last=False)
+            return last is not None and abs(when - last) < self.window
+
+    def _expire(self):
+        cutoff = self._clock - self.window
+        while self._last_seen:
+            key, seen = next(iter(self._last_seen.items()))
+            if seen >= cutoff:
+                break
+            self._last_seen.popitem(last=False)
+
+
+class IdempotencyCache:
+    """Bounded LRU of idempotency key -> status of the first attempt."""
+
+    def __init__(self, max_keys: int = MAX_IDEMPOTENCY_KEYS):
+        self.max_keys = max_keys
+        self._statuses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._statuses)
+
+    def get(self, key):
+        with self._lock:
+            status = self._statuses.get(key)
+            if status is not None:
+                self._statuses.move_to_end(key)
+            return status
+
+    def put(self, key, status: str):
+        with self._lock:
+            self._statuses[key] = status
+            self._statuses.move_to_end(key)
+            while len(self._statuses) > self.max_keys:
+                self._statuses.popitem(last=False)
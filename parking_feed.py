@@ -0,0 +1,92 @@
+"""Live occupancy feed shared by API requests and streaming clients.
+
+One background thread per process watches the store (for the journal
+backend that is an incremental tail of the event log, so each poll costs only
+the bytes appended since the last one) and publishes per-group changes.
+Request handlers read the latest snapshot; streaming clients block on
+``wait`` and get only the deltas.
+"""
+import threading
+import time
+from collections import deque
+
+
+class OccupancyFeed:
+    """Polls a ``ParkingStore`` and fans out per-group occupancy changes."""
+
+    def __init__(self, store, capacity: dict, interval: float = 0.5, history: int = 1000):
+        self.store = store
+        self.capacity = dict(capacity)
+        self.interval = interval
+        self.seq = 0
+        self._changes = deque(maxlen=history)  # (seq, delta) for reconnects
+        self._cond = threading.Condition()
+        self._used = {g: store.count(g) for g in self.capacity}
+        self._thread = None
+
+    def _group_state(self, group: str, used: int) -> dict:
+        capacity = self.capacity[group]
+        return {"group": group, "capacity": capacity, "used": used, "free": capacity - used}
+
+    def snapshot(self) -> dict:
+        """{group: {capacity, used, free}} as of the last poll."""
+        with self._cond:
+            return {g: self._group_state(g, u) for g, u in self._used.items()}
+
+    def state(self):
+        """(seq, snapshot) read together, the starting point for a stream."""
+        with self._cond:
+            return self.seq, {g: self._group_state(g, u) for g, u in self._used.items()}
+
+    def group(self, group: str) -> dict:
+        with self._cond:
+            return self._group_state(group, self._used[group])
+
+    def start(self):
+        """Start the background poller (idempotent)."""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="occupancy-feed", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception:  # keep serving the last good state
+                pass
+
+    def poll(self):
+        """Read current counts and publish a delta for every group that changed.
+
+        Counts are read under the lock: a request thread polls too, and an
+        older read published after a newer one would move counts backwards.
+        """
+        with self._cond:
+            used = {g: self.store.count(g) for g in self.capacity}
+            for group, count in used.items():
+                change = count - self._used[group]
+                if change:
+                    self.seq += 1
+                    delta = dict(self._group_state(group, count), change=change)
+                    self._changes.append((self.seq, delta))
+            if used != self._used:
+                self._used = used
+                self._cond.notify_all()
+
+    def since(self, seq: int):
+        """Deltas after ``seq``, or None if they have already been dropped."""
+        with self._cond:
+            if seq == self.seq:
+                return []
+            if seq > self.seq or not self._changes or self._changes[0][0] > seq + 1:
+                return None
+            return [(s, d) for s, d in self._changes if s > seq]
+
+    def wait(self, seq: int, timeout: float):
+        """Block until there are deltas after ``seq`` (or ``timeout``)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != seq, timeout)
+        return self.since(seq)
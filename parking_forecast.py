@@ -0,0 +1,82 @@
+"""Short-term occupancy forecasts from the hourly rollup.
+
+The expected number of cars parked at time ``t`` is the seasonal profile
+(the rollup's average for that hour of the week, interpolated between hour
+centres so 10:30 sits halfway between the 10:00 and 11:00 averages) plus how
+far today is off that profile right now, fading out over the horizon:
+
+    parked(t) = profile(t) + (parked now - profile(now)) * exp(-(t - now) / decay)
+
+The profile is the rollup itself, so the model is retrained incrementally as
+sessions close, and a forecast is a handful of array operations for any
+number of groups/lots and times at once.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from parking_config import FORECAST_DECAY_HOURS
+from parking_rollup import KEY_CAPACITY, KEY_INDEX, OccupancyRollup
+
+_SLOTS = 7 * 24
+
+
+def _hour_of_week(times) -> np.ndarray:
+    """Hours since Monday 00:00 (float) for datetimes / datetime64 values."""
+    hours = np.asarray(times, dtype="datetime64[ns]").astype(np.int64) / 3.6e12
+    days = np.floor(hours / 24)
+    return ((days + 3) % 7) * 24 + (hours - days * 24)  # 1970-01-01 was a Thursday
+
+
+class OccupancyForecaster:
+    """Predicts cars parked (and free spaces) per group or lot."""
+
+    def __init__(self, rollup: OccupancyRollup, decay_hours: float = FORECAST_DECAY_HOURS):
+        self.rollup = rollup
+        self.decay_hours = decay_hours
+
+    def _profile(self, averages: np.ndarray, times) -> np.ndarray:
+        """Seasonal profile of every row of ``averages`` at ``times``."""
+        position = _hour_of_week(times) - 0.5
+        below = np.floor(position)
+        weight = position - below
+        i0 = below.astype(np.int64) % _SLOTS
+        i1 = (i0 + 1) % _SLOTS
+        return averages[:, i0] * (1 - weight) + averages[:, i1] * weight
+
+    def predict(self, parked_now: dict, times, now: datetime = None) -> dict:
+        """{key: cars parked at each of ``times``} for every key in ``parked_now``.
+
+        ``parked_now`` maps groups and/or lot codes to their current count.
+        """
+        now = now or datetime.now()
+        keys = list(parked_now)
+        rows = [KEY_INDEX[k] for k in keys]
+        times = np.atleast_1d(np.asarray(times, dtype="datetime64[ns]"))
+        averages = self.rollup.averages()[rows]
+
+        profile = self._profile(averages, np.concatenate([[np.datetime64(now, "ns")], times]))
+        current = np.array([parked_now[k] for k in keys], dtype=float)
+        ahead = (times - np.datetime64(now, "ns")) / np.timedelta64(1, "h")
+        fade = np.exp(-np.clip(ahead, 0, None) / self.decay_hours)
+        parked = profile[:, 1:] + (current - profile[:, 0])[:, None] * fade
+        parked = np.clip(parked, 0, KEY_CAPACITY[rows][:, None])
+        return dict(zip(keys, parked))
+
+    def free_at(self, key: str, when: datetime, parked_now: int, now: datetime = None) -> int:
+        """Expected free spaces in ``key`` at ``when``."""
+        parked = self.predict({key: parked_now}, [when], now)[key][0]
+        return int(round(KEY_CAPACITY[KEY_INDEX[key]] - parked))
+
+    def outlook(self, key: str, parked_now: int, now: datetime = None,
+                hours: float = 4, step_minutes: int = 30) -> list:
+        """[{time, parked, free}] every ``step_minutes`` for the next ``hours``."""
+        now = now or datetime.now()
+        start = np.datetime64(now, "m")
+        times = start + np.arange(step_minutes, hours * 60 + 1, step_minutes).astype("timedelta64[m]")
+        parked = self.predict({key: parked_now}, times, now)[key]
+        capacity = KEY_CAPACITY[KEY_INDEX[key]]
+        return [
+            {"time": t.item(), "parked": int(round(p)), "free": int(round(capacity - p))}
+            for t, p in zip(times, parked)
+        ]
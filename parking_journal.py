@@ -0,0 +1,850 @@
+"""Append-only event journal for the Fairfield parking app.
+
+Every PARK IN / PARK OUT is written as one short CSV line instead of
+rewriting the whole history, and the session table (Plate, Lot, Entry, Exit,
+LotCode) is rebuilt by replaying the journal.  ``Lot`` is the category and
+``LotCode`` the physical lot (e.g. "B-1"); journals written before lot codes
+were recorded have four fields per line and replay with an empty LotCode.
+Replayed sessions live in a columnar ``SessionTable`` (dictionary-encoded
+text, int64 timestamps) rather than one Python object per field.
+"""
+import atexit
+import csv
+import os
+import threading
+import time
+import weakref
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from parking_config import LOT_IDS, LOTS
+from parking_metrics import inc, span
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+# ------------------------
+# EVENT FORMAT
+# ------------------------
+IN = "IN"
+OUT = "OUT"
+
+EVENT_FIELDS = ["Event", "Plate", "Lot", "Time", "LotCode"]
+SESSION_COLUMNS = ["Plate", "Lot", "Entry", "Exit", "LotCode"]
+
+_open_journals = weakref.WeakSet()  # closed (synced) at exit unless closed before
+
+
+@atexit.register
+def _close_open_journals():
+    for journal in list(_open_journals):
+        journal.close()
+
+
+class EventJournal:
+    """Append-only CSV log of IN/OUT events.
+
+    Each write is flushed to the OS right away (so other processes reading the
+    file see it), but ``os.fsync`` is batched: it runs every ``fsync_every``
+    events or once ``fsync_interval`` seconds have passed since the last sync,
+    and again when the journal is closed.  A timer covers the interval when no
+    further event arrives, so an idle journal is never left unsynced.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 32, fsync_interval: float = 1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._timer = None  # pending idle sync
+
+        self._open()
+        _open_journals.add(self)
+
+    def _open(self):
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._fh = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._fh)
+        if is_new:
+            self._writer.writerow(EVENT_FIELDS)
+            self._fh.flush()
+
+    def _is_current(self) -> bool:
+        """False once the journal has been replaced on disk (e.g. compacted)."""
+        try:
+            return os.fstat(self._fh.fileno()).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def reopen(self):
+        """Sync and close the current handle and open the file at ``path``."""
+        with self._lock:
+            self._sync()
+            self._fh.close()
+            self._open()
+
+    def append(self, event: str, plate: str, lot: str, when: datetime, lot_code: str = None):
+        """Write one event; cost does not depend on the size of the history."""
+        with self._lock:
+            self._writer.writerow([event, plate, lot, when.isoformat(), lot_code or ""])
+            self._fh.flush()
+            self._pending += 1
+            if (
+                self._pending >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def append_many(self, events):
+        """Write a batch of (event, plate, lot, time, lot code) as one group commit.
+
+        The lines are flushed together and covered by a single fsync.
+        """
+        with self._lock:
+            self._writer.writerows(
+                [event, plate, lot, when.isoformat(), lot_code or ""]
+                for event, plate, lot, when, lot_code in events
+            )
+            self._fh.flush()
+            self._pending += 1
+            self._sync()
+
+    @contextmanager
+    def locked(self):
+        """Exclusive lock over the journal, across threads and processes.
+
+        Hold it around read-check-append sequences so two writers cannot
+        both pass a check before either has appended.  If another process
+        replaced the file while we waited, the new file is opened and locked
+        instead.
+        """
+        with self._lock:
+            while True:
+                if fcntl is not None:
+                    fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+                if self._is_current():
+                    break
+                self.reopen()  # closing the old handle drops its lock
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+
+    def sync(self):
+        """Force any batched events to disk."""
+        with self._lock:
+            if not self._fh.closed:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._fh.closed:
+                return
+            self._sync(force=True)
+            self._fh.close()
+            _open_journals.discard(self)
+
+    def _sync(self, force: bool = False):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending or force:
+            os.fsync(self._fh.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+
+# ------------------------
+# REPLAY
+# ------------------------
+
+def parse_events(lines):
+    """Yield (event, plate, lot, time, lot code) tuples from journal text lines."""
+    for row in csv.reader(lines):
+        if len(row) not in (4, 5) or row[0] not in (IN, OUT):
+            continue  # header, or a torn line from a crash mid-write
+        event, plate, lot, when, *lot_code = row
+        yield event, plate, lot, datetime.fromisoformat(when), (lot_code or [None])[0] or None
+
+
+def read_events(path: str):
+    """Yield (event, plate, lot, time, lot code) tuples from a journal file."""
+    if not os.path.exists(path):
+        return
+    with open(path, newline="", encoding="utf-8") as fh:
+        yield from parse_events(fh)
+
+
+def replay(events) -> "SessionTable":
+    """Turn an event stream into a ``SessionTable``."""
+    table = SessionTable()
+    table.replay(events, {})
+    return table
+
+
+def load_sessions(path: str) -> pd.DataFrame:
+    """Rebuild the session table from the journal."""
+    return replay(read_events(path)).frame()
+
+
+# ------------------------
+# SESSION TABLE
+# ------------------------
+NAT = np.iinfo(np.int64).min  # NaT as int64 nanoseconds
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_ns(when) -> int:
+    """Naive datetime -> int64 nanoseconds since the epoch (NaT for None)."""
+    return NAT if when is None else (when - _EPOCH) // _MICROSECOND * 1000
+
+
+def _to_ns_array(values) -> np.ndarray:
+    """A list of naive datetimes (None -> NaT) as int64 nanoseconds."""
+    return pd.DatetimeIndex(values).as_unit("ns").asi8
+
+
+class Dictionary:
+    """Value <-> integer code, for dictionary-encoded columns.
+
+    Seeded values keep fixed codes (e.g. groups, lot codes); anything else is
+    appended on first sight.  ``dtype`` is the matching pandas categorical.
+    """
+
+    def __init__(self, seed=()):
+        self.values = list(seed)
+        self._index = None
+        self._dtype = None
+
+    @property
+    def index(self) -> dict:
+        """value -> code, built on first use (a restored table may not need it)."""
+        if self._index is None:
+            self._index = dict(zip(self.values, range(len(self.values))))
+        return self._index
+
+    def code(self, value) -> int:
+        if value is None:
+            return -1
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+            self._dtype = None
+        return code
+
+    def encode(self, values) -> np.ndarray:
+        """Codes for a column of values (missing -> -1), vectorized."""
+        positions, uniques = pd.factorize(pd.Series(values, dtype=object))
+        codes = np.array([self.code(value) for value in uniques] + [-1], dtype=np.int64)
+        return codes[positions]  # factorize marks missing as -1: the trailing -1
+
+    def dtype(self) -> pd.CategoricalDtype:
+        # object categories: no conversion to the str dtype for every new value
+        if self._dtype is None:
+            self._dtype = pd.CategoricalDtype(pd.Index(self.values, dtype=object))
+        return self._dtype
+
+
+class SessionTable:
+    """Columnar, append-only session table (Plate, Lot, Entry, Exit, LotCode).
+
+    Plate, Lot and LotCode are integer codes into ``Dictionary`` columns (Lot
+    seeded with the groups, LotCode with ``LOT_IDS``), Entry and Exit int64
+    nanoseconds with NaT while parked.  Columns are NumPy buffers that double
+    when full, so replaying events only writes the new slots and closed
+    Exits; ``frame`` wraps the buffers in a typed DataFrame (categoricals and
+    datetime64[ns]) without copying anything but Exit.
+
+    The Entry order is kept for paging: nothing extra while sessions arrive
+    in time order, a row permutation once one arrives out of order.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.plates = Dictionary()
+        self.groups = Dictionary(LOTS)
+        self.lot_codes = Dictionary(LOT_IDS)
+        self.n = 0
+        self.version = 0  # bumped on every change
+        self._cols = {
+            "plate": np.empty(capacity, dtype=np.int32),
+            "group": np.empty(capacity, dtype=np.int16),
+            "lot_code": np.empty(capacity, dtype=np.int16),
+            "entry": np.empty(capacity, dtype=np.int64),
+            "exit": np.empty(capacity, dtype=np.int64),
+        }
+        # row positions in Entry order and the Entry values in that order;
+        # None while the rows themselves are in Entry order
+        self._order = None
+        self._sorted = None
+
+    def __len__(self):
+        return self.n
+
+    def _reserve(self, extra: int):
+        capacity = len(self._cols["entry"])
+        if self.n + extra <= capacity:
+            return
+        while capacity < self.n + extra:
+            capacity *= 2
+        for name, column in self._cols.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.n] = column[:self.n]
+            self._cols[name] = grown
+
+    # ----- writing -----
+
+    def replay(self, events, open_rows: dict):
+        """Apply IN/OUT events in order; ``open_rows`` maps parked plates to rows.
+
+        The new rows and closes are collected first and written to the
+        buffers in one vectorized step per column.
+        """
+        first = self.n
+        plates, groups, entries, exits, lot_codes = [], [], [], [], []
+        closed, closed_at = [], []
+        for event, plate, lot, when, lot_code in events:
+            if event == IN:
+                open_rows[plate] = first + len(plates)
+                plates.append(plate)
+                groups.append(lot)
+                entries.append(when)
+                exits.append(None)
+                lot_codes.append(lot_code)
+            elif event == OUT and plate in open_rows:
+                row = open_rows.pop(plate)
+                if row >= first:
+                    exits[row - first] = when
+                else:
+                    closed.append(row)
+                    closed_at.append(when)
+
+        cols = self._cols
+        if plates:
+            count = len(plates)
+            self._reserve(count)
+            rows = slice(first, first + count)
+            cols["plate"][rows] = [self.plates.code(v) for v in plates]
+            cols["group"][rows] = [self.groups.code(v) for v in groups]
+            cols["lot_code"][rows] = [self.lot_codes.code(v) for v in lot_codes]
+            cols["entry"][rows] = _to_ns_array(entries)
+            cols["exit"][rows] = _to_ns_array(exits)
+            self.n += count
+            self._extend_order(first)
+        if closed:
+            self.close(closed, closed_at)
+        elif plates:
+            self.version += 1
+
+    def extend(self, df: pd.DataFrame) -> int:
+        """Append a frame of sessions at once; returns the first new row."""
+        first, count = self.n, len(df)
+        self._reserve(count)
+        cols = self._cols
+        rows = slice(first, first + count)
+        cols["plate"][rows] = self.plates.encode(df["Plate"])
+        cols["group"][rows] = self.groups.encode(df["Lot"])
+        cols["lot_code"][rows] = self.lot_codes.encode(df["LotCode"])
+        cols["entry"][rows] = df["Entry"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        cols["exit"][rows] = df["Exit"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        self.n += count
+        self._extend_order(first)
+        self.version += 1
+        return first
+
+    def close(self, rows, exits):
+        """Set the Exit of ``rows`` (earlier rows) to the datetimes ``exits``."""
+        self._cols["exit"][rows] = _to_ns_array(exits)
+        self.version += 1
+
+    def _extend_order(self, first: int):
+        """Keep the Entry order valid after rows from ``first`` were added."""
+        entries = self._cols["entry"][:self.n]
+        new = entries[first:]
+        last = (entries[first - 1] if self._order is None else self._sorted[-1]) if first else None
+        in_order = not (np.diff(new) < 0).any() and (last is None or new[0] >= last)
+        if in_order and self._order is None:
+            return
+        if in_order:
+            self._order = np.concatenate([self._order, np.arange(first, self.n)])
+            self._sorted = np.concatenate([self._sorted, new])
+        else:
+            self._order = np.argsort(entries, kind="stable")
+            self._sorted = entries[self._order]
+
+    # ----- snapshots -----
+
+    def snapshot(self) -> dict:
+        """Columns up to ``n`` and the dictionary values, for ``restore``."""
+        state = {name: column[:self.n] for name, column in self._cols.items()}
+        state["exit"] = state["exit"].copy()  # the only column rows change in
+        state["plates"] = self.plates.values[:]
+        state["groups"] = self.groups.values[:]
+        state["lot_codes"] = self.lot_codes.values[:]
+        return state
+
+    @classmethod
+    def restore(cls, state) -> "SessionTable":
+        n = len(state["entry"])
+        table = cls(capacity=max(n, 1024))
+        for name, column in table._cols.items():
+            column[:n] = state[name]
+        table.plates = Dictionary(_unpack_strings(state["plates"]))
+        table.groups = Dictionary(_unpack_strings(state["groups"]))
+        table.lot_codes = Dictionary(_unpack_strings(state["lot_codes"]))
+        table.n = n
+        table._extend_order(0)
+        return table
+
+    def open_events(self, rows) -> list:
+        """IN events that reopen ``rows``, in row (arrival) order."""
+        rows = np.sort(rows)
+        cols = self._cols
+        entries = pd.to_datetime(cols["entry"][rows]).to_pydatetime()
+        lot_codes = self.lot_codes.values
+        return [
+            (IN, self.plates.values[p], self.groups.values[g], when, lot_codes[c] if c >= 0 else None)
+            for p, g, c, when in zip(
+                cols["plate"][rows].tolist(), cols["group"][rows].tolist(),
+                cols["lot_code"][rows].tolist(), entries,
+            )
+        ]
+
+    # ----- reading -----
+
+    def take(self, rows) -> pd.DataFrame:
+        """Typed frame of the given rows (a slice shares the buffers)."""
+        cols = self._cols
+
+        def categorical(name, dictionary):
+            return pd.Categorical.from_codes(cols[name][rows], dtype=dictionary.dtype(), validate=False)
+
+        entry = cols["entry"][rows].view("datetime64[ns]")
+        entry.flags.writeable = False
+        return pd.DataFrame(
+            {
+                "Plate": categorical("plate", self.plates),
+                "Lot": categorical("group", self.groups),
+                "Entry": entry,
+                "Exit": cols["exit"][rows].copy().view("datetime64[ns]"),
+                "LotCode": categorical("lot_code", self.lot_codes),
+            },
+            copy=False,
+        )
+
+    def frame(self) -> pd.DataFrame:
+        return self.take(slice(0, self.n))
+
+    def page(self, offset: int, limit: int, plate: str = None, group: str = None,
+             start: datetime = None, end: datetime = None):
+        """Rows ``offset`` .. ``offset + limit`` newest Entry first, and the total.
+
+        ``start``/``end`` bound Entry (end exclusive) by binary search over
+        the Entry order; ``group`` compares integer codes; ``plate`` is a
+        prefix matched against the plate dictionary, not every row.
+        """
+        n = self.n
+        order = None if self._order is None else self._order[:n]
+        entries = self._cols["entry"][:n] if order is None else self._sorted[:n]
+        if group:
+            code = self.groups.index.get(group)
+            codes = self._cols["group"][:n]
+            mine = np.flatnonzero((codes if order is None else codes[order]) == code)
+            entries = entries[mine]
+            order = mine if order is None else order[mine]
+        lo = entries.searchsorted(to_ns(start)) if start else 0
+        hi = entries.searchsorted(to_ns(end)) if end else len(entries)
+
+        def rows(a, b):
+            return np.arange(a, b) if order is None else order[a:b]
+
+        if plate:
+            codes = [c for c, value in enumerate(self.plates.values) if value.startswith(plate)]
+            window = rows(lo, hi)
+            window = window[np.isin(self._cols["plate"][window], codes)]
+            total = len(window)
+            picked = window[::-1][offset:offset + limit]
+        else:
+            total = max(hi - lo, 0)
+            stop = max(hi - offset, lo)
+            picked = rows(max(stop - limit, lo), stop)[::-1]
+        return self.take(picked), int(total)
+
+
+# ------------------------
+# SNAPSHOTS
+# ------------------------
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+_CRC_BYTES = 4096  # journal bytes before the offset that a snapshot checks
+
+
+def _journal_crc(fh, offset: int) -> int:
+    """CRC of the journal bytes just before ``offset`` (what a snapshot covers)."""
+    start = max(offset - _CRC_BYTES, 0)
+    fh.seek(start)
+    return zlib.crc32(fh.read(offset - start))
+
+
+def _pack_strings(values: list) -> np.ndarray:
+    """Strings as one UTF-8 byte array, each one NUL-terminated."""
+    return np.frombuffer("".join(value + "\0" for value in values).encode("utf-8"), dtype=np.uint8)
+
+
+def _unpack_strings(packed: np.ndarray) -> list:
+    return packed.tobytes().decode("utf-8").split("\0")[:-1]
+
+
+def write_snapshot(path: str, state: dict):
+    """Atomically write ``state`` (arrays, ints, lists of str) as an .npz file.
+
+    Written to a temporary file of its own (per process and thread), fsync-ed,
+    then renamed over ``path``, so a crash leaves the previous snapshot in
+    place.
+    """
+    arrays = {
+        name: _pack_strings(value) if isinstance(value, list) else np.asarray(value)
+        for name, value in state.items()
+    }
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(fh, **arrays)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _remove_stale_tmp(path: str, age: float = 600.0):
+    """Delete temporary snapshot files left behind by writers that died."""
+    folder, name = os.path.split(os.path.abspath(path))
+    cutoff = time.time() - age
+    for entry in os.scandir(folder):
+        if entry.name.startswith(name + ".") and entry.name.endswith(".tmp"):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:  # already gone, or not ours to remove
+                pass
+
+
+def read_snapshot(path: str):
+    """The arrays of a snapshot, or None if it is missing or unreadable."""
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            state = {name: npz[name] for name in npz.files}  # zip CRCs checked here
+    except Exception:  # missing, torn or not a snapshot: replay instead
+        return None
+    if state.get("format", -1) != SNAPSHOT_FORMAT:
+        return None
+    return state
+
+
+class JournalTail:
+    """Process-wide, incrementally refreshed view of a journal.
+
+    ``refresh()`` stats the file and, when its size or mtime changed, parses
+    only the bytes appended since the last call.  A file that shrank or was
+    replaced (new inode) is re-read from the start.  New events are replayed
+    into a ``SessionTable`` and passed to every listener's ``apply``; on a
+    re-read the listeners are ``clear()``-ed first (e.g. ``OccupancyIndex``).
+
+    With a ``snapshot`` path, a cold start (or re-read) first loads the
+    snapshot and replays only the journal after its offset, provided the
+    journal bytes just before that offset still match.  Listeners are rebuilt
+    from the open sessions in it.  A new snapshot is written in the
+    background every ``SNAPSHOT_EVERY`` events or ``SNAPSHOT_INTERVAL``
+    seconds (whichever comes first, once there is something new).
+    """
+
+    BLOCK_BYTES = 8 << 20
+    SNAPSHOT_EVERY = 10_000
+    SNAPSHOT_INTERVAL = 300.0
+
+    def __init__(self, path: str, listeners=(), snapshot: str = None):
+        self.path = path
+        self.listeners = list(listeners)
+        self.snapshot_path = snapshot
+        self._lock = threading.Lock()
+        self._snapshot_thread = None
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self._stat = None
+        self.table = SessionTable()
+        self.open_rows = {}
+        self._frame = None
+        self._frame_version = None
+        self._since_snapshot = 0
+        self._snapshot_at = time.monotonic()
+        self.restored_from = None  # offset of the snapshot loaded, if any
+
+    @contextmanager
+    def reading(self):
+        """Refresh, then hold the lock events are applied to listeners under.
+
+        Readers of a listener's state (e.g. building a roster frame) do it
+        inside this block, so another thread's refresh cannot change that
+        state halfway through.
+        """
+        self.refresh()
+        with self._lock:
+            yield
+
+    def refresh(self) -> int:
+        """Pick up events appended since the last refresh; returns how many.
+
+        The new bytes are parsed and replayed in blocks of ``BLOCK_BYTES``,
+        so a cold start never holds the whole journal as Python objects.
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+            key = (st.st_ino, st.st_size, st.st_mtime_ns)
+            if key == self._stat:
+                return 0
+            if self._stat is not None and (
+                st.st_ino != self._stat[0] or st.st_size < self.offset
+            ):
+                self._reset()
+                for listener in self.listeners:
+                    listener.clear()
+            if self._stat is None and self.snapshot_path:
+                with span("parking_journal_load_seconds", source="snapshot"):
+                    self._restore(st.st_size)
+            self._stat = key
+
+            count = 0
+            with span("parking_journal_load_seconds", source="journal"), open(self.path, "rb") as fh:
+                fh.seek(self.offset)
+                rest = b""
+                while True:
+                    block = fh.read(self.BLOCK_BYTES)
+                    if not block:
+                        break
+                    chunk = rest + block
+                    end = chunk.rfind(b"\n") + 1  # leave a half-written line for later
+                    rest = chunk[end:]
+                    self.offset += end
+                    count += self._replay(chunk[:end].decode("utf-8").splitlines())
+            inc("parking_journal_events_total", count)
+            self._since_snapshot += count
+            if self._snapshot_due():
+                state = self._capture()
+                self._snapshot_thread = threading.Thread(
+                    target=self._write_snapshot, args=(state,), name="journal-snapshot", daemon=True
+                )
+                self._snapshot_thread.start()
+            return count
+
+    def _replay(self, lines) -> int:
+        events = list(parse_events(lines))
+        self.table.replay(events, self.open_rows)
+        for listener in self.listeners:
+            for event in events:
+                listener.apply(*event)
+        return len(events)
+
+    # ----- snapshots -----
+
+    def _restore(self, size: int) -> bool:
+        """Load the snapshot if it still matches the journal; True if it did."""
+        _remove_stale_tmp(self.snapshot_path)
+        state = read_snapshot(self.snapshot_path)
+        if state is None:
+            return False
+        offset = int(state["offset"])
+        if offset > size:
+            return False
+        with open(self.path, "rb") as fh:
+            if _journal_crc(fh, offset) != int(state["crc"]):
+                return False  # journal rewritten (e.g. archived) since
+        try:
+            table = SessionTable.restore(state)
+            rows = state["open_rows"]
+            plates = table.plates.values
+            open_rows = {
+                plates[code]: row for code, row in zip(state["plate"][rows].tolist(), rows.tolist())
+            }
+            events = table.open_events(rows)
+        except (KeyError, IndexError, ValueError):  # not laid out as this version writes it
+            return False
+        self.table, self.open_rows = table, open_rows
+        for listener in self.listeners:
+            listener.clear()
+            for event in events:
+                listener.apply(*event)
+        self.offset = self.restored_from = offset
+        return True
+
+    def _snapshot_due(self) -> bool:
+        if not self.snapshot_path or not self._since_snapshot:
+            return False
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return False
+        return (
+            self._since_snapshot >= self.SNAPSHOT_EVERY
+            or time.monotonic() - self._snapshot_at >= self.SNAPSHOT_INTERVAL
+        )
+
+    def _capture(self) -> dict:
+        """Snapshot state as of ``offset`` (cheap: views plus a copy of Exit)."""
+        with open(self.path, "rb") as fh:
+            crc = _journal_crc(fh, self.offset)
+        state = self.table.snapshot()
+        state.update(
+            format=SNAPSHOT_FORMAT,
+            offset=self.offset,
+            crc=crc,
+            open_rows=np.fromiter(self.open_rows.values(), dtype=np.int64, count=len(self.open_rows)),
+        )
+        self._since_snapshot = 0
+        self._snapshot_at = time.monotonic()
+        return state
+
+    def _write_snapshot(self, state: dict):
+        try:
+            write_snapshot(self.snapshot_path, state)
+        except OSError:  # the journal still has everything; try again next time
+            pass
+
+    def save_snapshot(self):
+        """Refresh and write a snapshot now (e.g. after the journal was rewritten)."""
+        self.refresh()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()  # or its older state could land after ours
+        with self._lock:
+            state = self._capture()
+        write_snapshot(self.snapshot_path, state)
+
+    # ----- reading -----
+
+    def frame(self) -> pd.DataFrame:
+        """Typed session table; rebuilt from the column buffers only after a change."""
+        self.refresh()
+        with self._lock:
+            if self._frame_version != self.table.version:
+                self._frame = self.table.frame()
+                self._frame_version = self.table.version
+            return self._frame
+
+    def page(self, offset: int, limit: int, **filters):
+        """One page of sessions, newest first, and the total (``SessionTable.page``)."""
+        self.refresh()
+        with self._lock:
+            return self.table.page(offset, limit, **filters)
+
+
+# ------------------------
+# MIGRATION
+# ------------------------
+
+def session_events(rows):
+    """IN/OUT events for [Plate, Lot, Entry, Exit, LotCode] rows, row by row.
+
+    Each session's IN is followed by its OUT, in row order.  Sorting across
+    sessions by time would misorder a plate that leaves one lot and enters
+    another in the same second (or an OUT stamped before its IN).  Rows
+    without a LotCode (the old four-column layout) are accepted.
+    """
+    events = []
+    for plate, lot, entry, exit_, *lot_code in rows:
+        if pd.isna(entry):
+            continue
+        lot_code = lot_code[0] if lot_code and not pd.isna(lot_code[0]) else None
+        events.append((IN, plate, lot, pd.Timestamp(entry).to_pydatetime(), lot_code))
+        if not pd.isna(exit_):
+            events.append((OUT, plate, lot, pd.Timestamp(exit_).to_pydatetime(), lot_code))
+    return events
+
+
+def write_journal(path: str, rows):
+    """Atomically replace the journal at ``path`` with events for ``rows``.
+
+    Written to a temporary file, fsync-ed, then renamed over ``path``, so a
+    crash leaves either the old journal or the new one.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(EVENT_FIELDS)
+        for event, plate, lot, when, lot_code in session_events(rows):
+            writer.writerow([event, plate, lot, when.isoformat(), lot_code or ""])
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def rewrite_journal(path: str, keep) -> int:
+    """Atomically drop the events of sessions whose ``keep[row]`` is False.
+
+    Rows are numbered as ``SessionTable.replay`` numbers them (one per IN, in
+    file order).  The surviving lines are copied verbatim and in their
+    original order, so replaying the result gives the kept rows exactly.
+    OUTs for plates that were not parked and torn lines are dropped, as
+    replay ignores them.  Returns the number of lines written.
+    """
+    tmp = path + ".tmp"
+    open_rows = {}
+    row = written = 0
+    with open(path, newline="", encoding="utf-8") as src, \
+            open(tmp, "w", newline="", encoding="utf-8") as out:
+        out.write(src.readline())  # header
+        for line in src:
+            if not line.endswith("\n"):
+                break  # torn last line from a crash mid-write
+            fields = next(csv.reader([line]), [])
+            if len(fields) not in (4, 5) or fields[0] not in (IN, OUT):
+                continue
+            plate = fields[1]
+            if fields[0] == IN:
+                open_rows[plate] = row
+                kept = keep[row]
+                row += 1
+            elif plate in open_rows:
+                kept = keep[open_rows.pop(plate)]
+            else:
+                continue
+            if kept:
+                out.write(line)
+                written += 1
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, path)
+    return written
+
+
+def read_sessions_csv(path: str, **kwargs) -> pd.DataFrame:
+    """A Plate,Lot,Entry,Exit[,LotCode] CSV with Entry/Exit as timestamps.
+
+    ``parse_dates`` guesses one format from the first value and leaves the
+    column as strings when whole seconds and microseconds are mixed, so the
+    times are parsed as ISO 8601 instead.
+    """
+    df = pd.read_csv(path, **kwargs)
+    for column in ("Entry", "Exit"):
+        if column in df:
+            df[column] = pd.to_datetime(df[column], format="ISO8601")
+    return df
+
+
+def migrate_csv(csv_path: str, journal_path: str):
+    """Seed a new journal from the old full-history CSV (one-time)."""
+    legacy = read_sessions_csv(csv_path)
+    write_journal(journal_path, legacy.reindex(columns=SESSION_COLUMNS).itertuples(index=False))
@@ -0,0 +1,204 @@
+"""Span timers and counters for the parking app's hot paths.
+
+Off unless ``PARKING_METRICS=1``.  While off, ``span`` hands back one shared
+no-op context manager and ``timed`` returns the function it decorates
+unchanged, so instrumented code pays one function call at most.
+
+While on, every span adds its duration to a histogram keyed by name and
+labels, and ``render`` exports all of them in the Prometheus text format.
+The Flask API serves that at ``/metrics``; Streamlit cannot add routes, so
+``app.py`` starts ``serve`` on ``PARKING_METRICS_PORT`` instead.
+
+    with metrics.span("parking_store_seconds", op="history"):
+        ...
+
+    @metrics.timed("parking_streamlit_fragment_seconds", fragment="park_exit")
+    def park_exit_panel(): ...
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("PARKING_METRICS", "0") == "1"
+PORT = int(os.environ.get("PARKING_METRICS_PORT", "9464"))
+HOST = os.environ.get("PARKING_METRICS_HOST", "127.0.0.1")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram bucket upper bounds, seconds: a cached read sits in the first few,
+# a cold journal replay in the last
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL = nullcontext()
+_lock = threading.Lock()
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_counters = {}    # (name, labels) -> value
+_help = {}
+
+
+def _key(name: str, labels: dict):
+    return name, tuple(sorted(labels.items()))
+
+
+def describe(name: str, text: str):
+    """HELP line for ``name`` in the export."""
+    _help[name] = text
+
+
+def observe(name: str, seconds: float, **labels):
+    """Add one duration to the histogram ``name``."""
+    if ENABLED:
+        _observe(_key(name, labels), seconds)
+
+
+def _observe(key, seconds: float):
+    slot = bisect_left(BUCKETS, seconds)
+    with _lock:
+        row = _histograms.get(key)
+        if row is None:
+            row = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        row[slot] += 1
+        row[-1] += seconds
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Add ``value`` to the counter ``name``."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+class _Span:
+    __slots__ = ("key", "started")
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _observe(self.key, time.perf_counter() - self.started)
+        if exc_type is not None:
+            inc("parking_errors_total", span=self.key[0], error=exc_type.__name__)
+        return False
+
+
+def span(name: str, **labels):
+    """Context manager timing its block into the histogram ``name``."""
+    if not ENABLED:
+        return _NULL
+    return _Span(_key(name, labels))
+
+
+def timed(name: str, **labels):
+    """Decorator form of ``span``; a no-op when metrics are off at import."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        key = _key(name, labels)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(key):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ------------------------
+# EXPORT
+# ------------------------
+
+def _labels(pairs, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in pairs]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def render() -> str:
+    """Every histogram and counter in the Prometheus text format."""
+    with _lock:
+        histograms = sorted((k, list(v)) for k, v in _histograms.items())
+        counters = sorted(_counters.items())
+
+    lines = []
+    seen = set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, pairs), row in histograms:
+        header(name, "histogram")
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), row):
+            cumulative += n
+            le = 'le="%s"' % bound
+            lines.append(f"{name}_bucket{_labels(pairs, le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(pairs)} {row[-1]:.6f}")
+        lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+    for (name, pairs), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_labels(pairs)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Forget everything recorded so far."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # no access log on stderr
+        pass
+
+
+def serve(port: int = PORT, host: str = HOST):
+    """Serve ``/metrics`` from a daemon thread; None when metrics are off."""
+    if not ENABLED:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+describe("parking_store_seconds", "Time spent in ParkingStore operations.")
+describe("parking_journal_load_seconds", "Time spent reading new journal events into memory.")
+describe("parking_journal_events_total", "Journal events replayed into memory.")
+describe("parking_sqlite_sync_seconds", "Time spent mirroring SQLite changes into memory.")
+describe("parking_active_in_group_seconds", "Time to list the cars parked in a group.")
+describe("parking_streamlit_render_seconds", "Streamlit page render time, by page.")
+describe("parking_streamlit_fragment_seconds", "Streamlit fragment rerun time.")
+describe("parking_http_request_seconds", "API request handling time, by route.")
+describe("parking_errors_total", "Exceptions raised inside a timed span.")
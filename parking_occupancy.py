@@ -0,0 +1,152 @@
+"""In-memory occupancy index for the Fairfield parking app.
+
+Keeps who is parked where so capacity and duplicate-plate checks are O(1)
+instead of scanning the full history DataFrame.
+"""
+import bisect
+from array import array
+from datetime import datetime
+
+import pandas as pd
+
+from parking_config import LOT_IDS, LOT_INDEX
+from parking_journal import IN, OUT
+
+ACTIVE_COLUMNS = ["Plate", "Lot", "Entry", "LotCode"]
+
+
+class OccupancyIndex:
+    """Active plates, per-group counters and per-group rosters.
+
+    ``active`` maps plate -> group, ``counts`` maps group -> cars parked and
+    ``rosters`` maps group -> {plate: entry time} (insertion ordered, so the
+    roster stays in arrival order).  Every update is a handful of dict
+    operations regardless of how much history exists.
+
+    ``by_entry`` is (entry time, plate) for every active car, sorted, so
+    "parked since before T" is a bisect plus a slice of the oldest cars.  It
+    is built on first use after a change rather than kept sorted on every
+    PARK IN/OUT (an O(n) list insert); rosters are in arrival order, so the
+    rebuild is mostly a merge of already-sorted runs.
+
+    ``lot_counts`` is a flat int array with one counter per physical lot,
+    indexed by ``LOT_INDEX``.  Cars recorded without a (known) lot code only
+    count towards their group.
+    """
+
+    def __init__(self, groups):
+        self.groups = list(groups)
+        self.clear()
+
+    def clear(self):
+        self.active = {}
+        self.counts = {g: 0 for g in self.groups}
+        self.rosters = {g: {} for g in self.groups}
+        self._by_entry = []  # None once an update has made it stale
+        self.lot_counts = array("i", [0] * len(LOT_IDS))
+        self.lot_of = {}  # plate -> index into lot_counts
+
+    @classmethod
+    def from_events(cls, groups, events):
+        index = cls(groups)
+        for event in events:
+            index.apply(*event)
+        return index
+
+    def apply(self, event: str, plate: str, lot: str, when: datetime, lot_code: str = None):
+        """Apply one journal event."""
+        if event == IN:
+            self.enter(plate, lot, when, lot_code)
+        elif event == OUT:
+            self.exit(plate)
+
+    def enter(self, plate: str, group: str, when: datetime, lot_code: str = None):
+        if plate in self.active:
+            return
+        self.active[plate] = group
+        self.counts[group] = self.counts.get(group, 0) + 1
+        self.rosters.setdefault(group, {})[plate] = when
+        self._by_entry = None
+        i = LOT_INDEX.get(lot_code)
+        if i is not None:
+            self.lot_counts[i] += 1
+            self.lot_of[plate] = i
+
+    def exit(self, plate: str):
+        group = self.active.pop(plate, None)
+        if group is None:
+            return None
+        self.counts[group] -= 1
+        del self.rosters[group][plate]
+        self._by_entry = None
+        i = self.lot_of.pop(plate, None)
+        if i is not None:
+            self.lot_counts[i] -= 1
+        return group
+
+    @property
+    def by_entry(self) -> list:
+        if self._by_entry is None:
+            self._by_entry = sorted(
+                (when, plate) for roster in self.rosters.values() for plate, when in roster.items()
+            )
+        return self._by_entry
+
+    def is_parked(self, plate: str) -> bool:
+        return plate in self.active
+
+    def group_of(self, plate: str):
+        return self.active.get(plate)
+
+    def entry_of(self, plate: str):
+        group = self.active.get(plate)
+        return None if group is None else self.rosters[group].get(plate)
+
+    def count(self, group: str) -> int:
+        return self.counts.get(group, 0)
+
+    def lot_code_of(self, plate: str):
+        i = self.lot_of.get(plate)
+        return None if i is None else LOT_IDS[i]
+
+    def lot_count(self, lot_code: str) -> int:
+        i = LOT_INDEX.get(lot_code)
+        return 0 if i is None else self.lot_counts[i]
+
+    def lot_usage(self) -> dict:
+        """{lot code: cars parked} for every lot."""
+        return dict(zip(LOT_IDS, self.lot_counts))
+
+    def roster(self, group: str) -> pd.DataFrame:
+        """Active cars in one group as a Plate / Lot / Entry / LotCode frame."""
+        cars = self.rosters.get(group, {})
+        return pd.DataFrame(
+            {
+                "Plate": list(cars.keys()),
+                "Lot": group,
+                "Entry": pd.to_datetime(list(cars.values())),
+                "LotCode": [self.lot_code_of(plate) for plate in cars],
+            },
+            columns=ACTIVE_COLUMNS,
+        )
+
+    def parked_before(self, cutoff: datetime) -> pd.DataFrame:
+        """Active cars that entered before ``cutoff``, oldest first."""
+        by_entry = self.by_entry
+        oldest = by_entry[:bisect.bisect_left(by_entry, (cutoff,))]
+        return pd.DataFrame(
+            {
+                "Plate": [plate for _, plate in oldest],
+                "Lot": [self.active[plate] for _, plate in oldest],
+                "Entry": pd.to_datetime([when for when, _ in oldest]),
+                "LotCode": [self.lot_code_of(plate) for _, plate in oldest],
+            },
+            columns=ACTIVE_COLUMNS,
+        )
+
+    def all_active(self) -> pd.DataFrame:
+        """Active cars across every group."""
+        return pd.concat(
+            [self.roster(g) for g in self.rosters],
+            ignore_index=True,
+        )
@@ -0,0 +1,93 @@
+"""Background overstay detection for the Fairfield parking app.
+
+``OverstaySweeper`` periodically asks the store for cars that entered before
+``now - threshold``, a range lookup on the entry-ordered index rather than a
+duration computed for every active car, and emits one event per car each
+time it crosses a threshold.  Enforcement then hears about overstays even
+when nobody has the Alerts page open.
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from parking_config import OVERSTAY_HOURS
+
+
+class OverstaySweeper:
+    """Emits ``{seq, plate, lot, lot_code, entry, threshold_hours, hours_parked}`` events.
+
+    Listeners are called with each new event from the sweeper thread; the
+    latest ``history`` events are also kept for ``since``.  A car is
+    reported again only when it crosses a higher threshold.
+    """
+
+    def __init__(self, store, thresholds=OVERSTAY_HOURS, interval: float = 60.0,
+                 history: int = 1000, listeners=()):
+        self.store = store
+        self.thresholds = sorted(thresholds)
+        self.interval = interval
+        self.listeners = list(listeners)
+        self.seq = 0
+        self._events = deque(maxlen=history)
+        self._reported = {}  # (plate, entry) -> highest threshold reported
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Sweep once now, then keep sweeping in the background (idempotent)."""
+        if self._thread is None:
+            self.sweep()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="overstay-sweeper", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception:  # try again next interval
+                pass
+
+    def sweep(self, now: datetime = None) -> list:
+        """Report cars that crossed a threshold since the last sweep."""
+        now = now or datetime.now()
+        over = self.store.parked_before(now - timedelta(hours=self.thresholds[0]))
+        new = []
+        with self._lock:
+            still_parked = set()
+            for plate, lot, entry, lot_code in over.itertuples(index=False):
+                key = (plate, entry)
+                still_parked.add(key)
+                hours = (now - entry).total_seconds() / 3600
+                crossed = self.thresholds[bisect.bisect_right(self.thresholds, hours) - 1]
+                if crossed <= self._reported.get(key, 0):
+                    continue
+                self._reported[key] = crossed
+                self.seq += 1
+                event = {
+                    "seq": self.seq,
+                    "plate": plate,
+                    "lot": lot,
+                    "lot_code": lot_code,
+                    "entry": entry.isoformat(),
+                    "threshold_hours": crossed,
+                    "hours_parked": round(hours, 2),
+                }
+                self._events.append(event)
+                new.append(event)
+            # forget cars that have left
+            self._reported = {k: v for k, v in self._reported.items() if k in still_parked}
+        for event in new:
+            for listener in self.listeners:
+                listener(event)
+        return new
+
+    def since(self, seq: int = 0) -> list:
+        """Kept events after ``seq``, oldest first."""
+        with self._lock:
+            return [e for e in self._events if e["seq"] > seq]
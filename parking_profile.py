@@ -0,0 +1,203 @@
+"""Opt-in per-rerun profiles of the Streamlit app.
+
+``PARKING_PROFILE=1`` profiles every script run and every Park / Exit
+fragment run; ``PARKING_PROFILE=query`` only those of browser sessions
+opened with ``?profile=1``.  Unset (the default), nothing is profiled and
+``start`` returns None.
+
+Each run is profiled twice at once: ``cProfile`` (deterministic, written as
+``.pstats`` for ``python -m pstats`` or snakeviz) and a sampler thread that
+records the run's stack every ``PARKING_PROFILE_INTERVAL`` seconds (written
+as ``.collapsed``, one ``frame;frame;frame count`` line per stack, for
+flamegraph.pl or speedscope).  Files land in ``PARKING_PROFILE_DIR``, named
+``<time>-<kind>-<page>-<action>-<ms>ms``; only the newest
+``PARKING_PROFILE_KEEP`` runs are kept.
+
+Only one cProfile profiler can be active per process (Python 3.12+ raises
+otherwise), so while one session's run holds it, a run overlapping it in
+another session gets the sampler alone and writes no ``.pstats``.
+
+A script run cut short by ``st.rerun()`` never reaches ``finish`` and
+writes nothing; the next run's ``start`` stops its profiler.
+"""
+import cProfile
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+MODE = os.environ.get("PARKING_PROFILE", "")  # "1", "query" or unset
+PROFILE_DIR = os.environ.get("PARKING_PROFILE_DIR", "fairfield_parking_profiles")
+KEEP = int(os.environ.get("PARKING_PROFILE_KEEP", "50"))
+INTERVAL = float(os.environ.get("PARKING_PROFILE_INTERVAL", "0.005"))
+
+_SLUG = re.compile(r"[^0-9A-Za-z]+")
+_local = threading.local()
+_cprofile_lock = threading.Lock()
+_cprofile_owner = None  # the RerunProfile whose cProfile is enabled
+
+
+def wanted(query_flag: bool) -> bool:
+    """Whether this run should be profiled, given its ``?profile=`` flag."""
+    return MODE == "1" or (MODE == "query" and query_flag)
+
+
+def _claim_cprofile(run) -> bool:
+    """Make ``run`` the process's one cProfile user, if no live run is."""
+    global _cprofile_owner
+    with _cprofile_lock:
+        owner = _cprofile_owner
+        if owner is not None:
+            if owner._thread.is_alive():
+                return False
+            owner._profile.disable()  # its thread died mid-run
+        try:
+            run._profile.enable()
+        except ValueError:  # another profiler outside this module is active
+            _cprofile_owner = None
+            return False
+        _cprofile_owner = run
+        return True
+
+
+def _release_cprofile(run):
+    global _cprofile_owner
+    with _cprofile_lock:
+        if _cprofile_owner is run:
+            run._profile.disable()
+            _cprofile_owner = None
+
+
+class RerunProfile:
+    """cProfile plus a stack sampler over one run of the calling thread.
+
+    ``profile`` is None when another run held cProfile (sampler only).
+    """
+
+    def __init__(self, kind: str, interval: float = INTERVAL):
+        self.kind = kind
+        self.interval = interval
+        self.tags = {}
+        self.stacks = Counter()
+        self._ident = threading.get_ident()
+        self._thread = threading.current_thread()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self._profile = cProfile.Profile()
+        self.profile = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._sampler.start()
+        if _claim_cprofile(self):
+            self.profile = self._profile
+        return self
+
+    def stop(self) -> float:
+        _release_cprofile(self)
+        self._stop.set()
+        self._sampler.join()
+        return time.perf_counter() - self.started
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._ident)
+            if frame is None:  # the run's thread has finished without us
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def save(self, directory: str, elapsed: float) -> str:
+        """Write ``.pstats`` (if profiled) and ``.collapsed``; returns their path stem."""
+        os.makedirs(directory, exist_ok=True)
+        name = "-".join(
+            [datetime.now().strftime("%Y%m%d-%H%M%S-%f"), self.kind]
+            + [_SLUG.sub("_", str(self.tags.get(t, "none"))).strip("_") for t in ("page", "action")]
+            + [f"{elapsed * 1000:.0f}ms"]
+        )
+        stem = os.path.join(directory, name)
+        if self.profile is not None:
+            self.profile.dump_stats(stem + ".pstats")
+        with open(stem + ".collapsed", "w", encoding="utf-8") as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        return stem
+
+
+def _rotate(directory: str, keep: int):
+    """Delete all but the newest ``keep`` runs (names start with the time)."""
+    stems = sorted({os.path.splitext(f)[0] for f in os.listdir(directory)
+                    if f.endswith((".pstats", ".collapsed"))})
+    for stem in stems[:-keep] if keep > 0 else stems:
+        for ext in (".pstats", ".collapsed"):
+            try:
+                os.remove(os.path.join(directory, stem + ext))
+            except FileNotFoundError:
+                pass
+
+
+def start(kind: str, query_flag: bool = False):
+    """Begin profiling this thread's run if it is wanted; None otherwise.
+
+    Script runs never nest, so one still active here was interrupted and is
+    dropped.  A fragment called during a profiled script run is part of it:
+    None, and its ``tag`` calls label the script run.
+    """
+    if not wanted(query_flag):
+        return None
+    active = getattr(_local, "run", None)
+    if active is not None:
+        if kind != "script":
+            return None
+        active.stop()
+    run = _local.run = RerunProfile(kind).start()
+    return run
+
+
+def tag(**tags):
+    """Label the run in progress on this thread (page, action)."""
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.tags.update(tags)
+
+
+def finish(run, directory: str = PROFILE_DIR, keep: int = KEEP, **tags):
+    """Stop ``run``, write its files and rotate the directory."""
+    if run is None:
+        return None
+    elapsed = run.stop()
+    if getattr(_local, "run", None) is run:
+        _local.run = None
+    run.tags.update(tags)
+    stem = run.save(directory, elapsed)
+    _rotate(directory, keep)
+    return stem
+
+
+def profiled(kind: str, query_flag=lambda: False):
+    """Decorator: profile each call on its own, e.g. a fragment rerun.
+
+    ``query_flag()`` is called per run, inside it (for ``?profile=1``).
+    Returns the function unchanged when profiling is off.
+    """
+    def decorate(fn):
+        if not MODE:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = start(kind, query_flag())
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                finish(run)
+        return wrapper
+    return decorate
@@ -0,0 +1,87 @@
+"""Lot recommendations from the campus walking graph and live availability.
+
+``WalkingGraph`` turns ``WALKING_EDGES`` into all-pairs shortest walking
+times once (Floyd-Warshall over a few dozen places), and keeps, for every
+(destination, group), that group's lots sorted by walk.  A recommendation
+then only has to look at those few lots with the current per-lot counts, so
+it costs microseconds and never touches the walking data again.
+"""
+import numpy as np
+
+from parking_config import DESTINATIONS, FULLNESS_PENALTY, LOT_CAPACITY, LOTS, WALKING_EDGES
+
+
+class WalkingGraph:
+    """Shortest walking minutes between any two places (lots or destinations)."""
+
+    def __init__(self, edges=WALKING_EDGES):
+        self.places = sorted({p for a, b, _ in edges for p in (a, b)})
+        self.index = {place: i for i, place in enumerate(self.places)}
+        n = len(self.places)
+        minutes = np.full((n, n), np.inf)
+        np.fill_diagonal(minutes, 0)
+        for a, b, m in edges:
+            i, j = self.index[a], self.index[b]
+            minutes[i, j] = minutes[j, i] = min(minutes[i, j], m)
+        for k in range(n):
+            minutes = np.minimum(minutes, minutes[:, k, None] + minutes[None, k, :])
+        self.minutes = minutes
+
+    def walk(self, a: str, b: str) -> float:
+        """Minutes from ``a`` to ``b`` (inf if there is no path)."""
+        return float(self.minutes[self.index[a], self.index[b]])
+
+    def table(self, rows, columns):
+        """{row: {column: minutes}} for display."""
+        return {r: {c: self.walk(r, c) for c in columns} for r in rows}
+
+
+class Recommender:
+    """Ranks the lots a group may use by walk time, penalized by fullness.
+
+    ``score = walk minutes + FULLNESS_PENALTY * used / capacity``; full lots
+    are left out.  ``usage`` is ``{lot code: cars parked}``, e.g.
+    ``ParkingStore.lot_usage()``.
+    """
+
+    def __init__(self, graph: WalkingGraph = None, lots=LOTS, lot_capacity=LOT_CAPACITY,
+                 destinations=DESTINATIONS, fullness_penalty=FULLNESS_PENALTY):
+        self.graph = graph or WalkingGraph()
+        self.lot_capacity = dict(lot_capacity)
+        self.fullness_penalty = fullness_penalty
+        self.destinations = list(destinations)
+        # (destination, group) -> [(lot, walk minutes)], nearest first
+        self.candidates = {}
+        for dest in self.destinations:
+            for group, group_lots in lots.items():
+                reachable = [
+                    (lot, self.graph.walk(lot, dest))
+                    for lot in group_lots
+                    if lot in self.graph.index
+                ]
+                self.candidates[dest, group] = sorted(
+                    [c for c in reachable if c[1] != np.inf], key=lambda c: c[1]
+                )
+
+    def rank(self, destination: str, group: str, usage: dict, limit: int = None) -> list:
+        """Lots with free spaces, best first, as dicts for display or JSON."""
+        ranked = []
+        for lot, walk in self.candidates.get((destination, group), ()):
+            capacity = self.lot_capacity[lot]
+            used = usage.get(lot, 0)
+            if used >= capacity:
+                continue
+            ranked.append({
+                "lot": lot,
+                "walk_minutes": walk,
+                "free": capacity - used,
+                "capacity": capacity,
+                "score": round(walk + self.fullness_penalty * used / capacity, 2),
+            })
+        ranked.sort(key=lambda r: r["score"])
+        return ranked[:limit] if limit else ranked
+
+    def best(self, destination: str, group: str, usage: dict):
+        """The top lot (a ``rank`` entry), or None if every permitted lot is full."""
+        ranked = self.rank(destination, group, usage, limit=1)
+        return ranked[0] if ranked else None
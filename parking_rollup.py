@@ -0,0 +1,198 @@
+"""Hourly occupancy rollup for analytics: group/lot x weekday x hour.
+
+``OccupancyRollup`` keeps a small cube of car-hours parked in each hour of
+the week (7 x 24 slots) for every group and every physical lot, plus how many
+calendar hours of each slot the history covers.  Average occupancy for a slot
+is one division of the two, so a heatmap never touches raw sessions.
+
+The cube is built with a vectorized sweep line over closed sessions (a
+difference array per key for the whole hours, plus the partial first and
+last hour of each stay) and then kept current by folding in only sessions
+that closed after the newest Exit already counted.  A session closed with an
+Exit older than that (e.g. a back-dated gate event) is picked up on the next
+rebuild.  Given a store (and optionally the history archive), ``start``
+rebuilds from the whole history once and then refreshes from the live
+sessions on a background thread, so readers only ever touch the cube.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from parking_config import CAPACITY, LOT_CAPACITY, LOT_IDS
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Cube rows: every group, then every physical lot
+KEYS = list(CAPACITY) + LOT_IDS
+KEY_INDEX = {key: i for i, key in enumerate(KEYS)}
+KEY_CAPACITY = np.array([CAPACITY.get(k) or LOT_CAPACITY[k] for k in KEYS], dtype=float)
+
+_NS_PER_HOUR = 3_600 * 10**9
+_EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday
+
+
+def _hours(times: pd.Series) -> np.ndarray:
+    """Timestamps -> float hours since the epoch (wall clock, no time zone)."""
+    return times.to_numpy(dtype="datetime64[ns]").astype(np.int64) / _NS_PER_HOUR
+
+
+def _slots(first_hour: int, last_hour: int) -> np.ndarray:
+    """Hour-of-week slot (weekday * 24 + hour) of every hour in [first, last)."""
+    hours = np.arange(first_hour, last_hour)
+    return ((hours // 24 + _EPOCH_WEEKDAY) % 7) * 24 + hours % 24
+
+
+class OccupancyRollup:
+    """Car-hours per (key, weekday, hour) and calendar hours covered per slot."""
+
+    def __init__(self, store=None, archive=None, interval: float = 60.0):
+        self.store = store
+        self.archive = archive
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self.clear()
+
+    def start(self):
+        """Rebuild from the full history now, then keep refreshing (idempotent)."""
+        if self._thread is None:
+            self.rebuild(self.history())
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="occupancy-rollup", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh(self.store.sessions())
+            except Exception:  # try again next interval
+                pass
+
+    def history(self) -> pd.DataFrame:
+        """Live sessions plus everything archived."""
+        columns = ["Plate", "Lot", "Entry", "Exit", "LotCode"]
+        # live first: a session archived in between then shows up twice, not never
+        frames = [self.store.sessions()[columns]]
+        if self.archive is not None:
+            frames.append(self.archive.read(columns=columns))
+        df = pd.concat(frames, ignore_index=True)
+        return df.drop_duplicates(["Plate", "Entry"], ignore_index=True)
+
+    def clear(self):
+        self.car_hours = np.zeros((len(KEYS), 7 * 24))
+        self.observed = np.zeros(7 * 24)
+        self.first_hour = None  # covered hours are [first_hour, end_hour)
+        self.end_hour = None
+        self.watermark = None  # newest Exit folded in
+        self._at_watermark = set()  # plates whose Exit equals the watermark
+        self.sessions = 0
+
+    # ----- building -----
+
+    def rebuild(self, sessions: pd.DataFrame):
+        """Recompute the cube from a full history (Lot, Entry, Exit, LotCode)."""
+        with self._lock:
+            self.clear()
+            self._add(sessions)
+
+    def refresh(self, sessions: pd.DataFrame) -> int:
+        """Fold in sessions that closed after the watermark; returns how many."""
+        with self._lock:
+            exits = sessions["Exit"]
+            if self.watermark is None:
+                new = sessions
+            else:
+                new = sessions[
+                    (exits > self.watermark)
+                    | ((exits == self.watermark) & ~sessions["Plate"].isin(self._at_watermark))
+                ]
+            return self._add(new)
+
+    def _add(self, sessions: pd.DataFrame) -> int:
+        closed = sessions[sessions["Exit"].notna() & (sessions["Exit"] > sessions["Entry"])]
+        if closed.empty:
+            return 0
+        entry = _hours(closed["Entry"])
+        exit_ = _hours(closed["Exit"])
+
+        # one contribution per session to its group row, and one to its lot row
+        group_rows = closed["Lot"].map(KEY_INDEX).to_numpy(dtype=float)
+        lot_rows = (
+            closed["LotCode"].map(KEY_INDEX).to_numpy(dtype=float)
+            if "LotCode" in closed else np.full(len(closed), np.nan)
+        )
+        rows = np.concatenate([group_rows, lot_rows])
+        entry = np.concatenate([entry, entry])
+        exit_ = np.concatenate([exit_, exit_])
+        known = ~np.isnan(rows)
+        rows, entry, exit_ = rows[known].astype(np.int64), entry[known], exit_[known]
+
+        first = np.floor(entry).astype(np.int64)
+        last = np.floor(exit_).astype(np.int64)
+        lo, hi = int(first.min()), int(last.max()) + 1
+        width = hi - lo + 1
+        size = len(KEYS) * width
+        flat = rows * width
+
+        # whole hours strictly between the first and last hour: +1 .. -1
+        spans = last > first
+        diff = np.bincount(flat[spans] + first[spans] + 1 - lo, minlength=size)
+        diff -= np.bincount(flat[spans] + last[spans] - lo, minlength=size)
+        timeline = np.cumsum(diff.reshape(len(KEYS), width), axis=1).astype(float)
+
+        # partial first and last hours (or the whole stay inside one hour)
+        head = np.where(spans, first + 1 - entry, exit_ - entry)
+        tail = np.where(spans, exit_ - last, 0.0)
+        partial = np.bincount(flat + first - lo, weights=head, minlength=size)
+        partial += np.bincount(flat + last - lo, weights=tail, minlength=size)
+        timeline += partial.reshape(len(KEYS), width)
+
+        # fold absolute hours onto hour-of-week slots
+        slots = _slots(lo, hi + 1)
+        for row in np.unique(rows):
+            self.car_hours[row] += np.bincount(slots, weights=timeline[row], minlength=7 * 24)
+
+        self._cover(lo, hi)
+        newest = closed["Exit"].max()
+        at_newest = set(closed.loc[closed["Exit"] == newest, "Plate"])
+        if self.watermark is None or newest > self.watermark:
+            self.watermark, self._at_watermark = newest, at_newest
+        elif newest == self.watermark:
+            self._at_watermark |= at_newest
+        self.sessions += len(closed)
+        return len(closed)
+
+    def _cover(self, lo: int, hi: int):
+        """Count calendar hours in [lo, hi) that were not covered yet."""
+        if self.first_hour is None:
+            self.observed += np.bincount(_slots(lo, hi), minlength=7 * 24)
+            self.first_hour, self.end_hour = lo, hi
+            return
+        if lo < self.first_hour:
+            self.observed += np.bincount(_slots(lo, self.first_hour), minlength=7 * 24)
+            self.first_hour = lo
+        if hi > self.end_hour:
+            self.observed += np.bincount(_slots(self.end_hour, hi), minlength=7 * 24)
+            self.end_hour = hi
+
+    # ----- serving -----
+
+    def averages(self) -> np.ndarray:
+        """Average cars parked, one row of 7 * 24 hour-of-week slots per key."""
+        with self._lock:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(self.observed > 0, self.car_hours / self.observed, 0.0)
+
+    def heatmap(self, key: str):
+        """(average cars parked, utilization 0..1) as 7 x 24 arrays for ``key``."""
+        row = KEY_INDEX[key]
+        with self._lock:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                average = np.where(self.observed > 0, self.car_hours[row] / self.observed, 0.0)
+        average = average.reshape(7, 24)
+        return average, average / KEY_CAPACITY[row]
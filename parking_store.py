@@ -0,0 +1,762 @@
+"""Pluggable storage backends for the Fairfield parking app.
+
+``app.py`` talks to a ``ParkingStore``; which one is used is picked by the
+``PARKING_STORE`` environment variable ("journal" or "sqlite").
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+from parking_config import LOT_IDS
+from parking_journal import (
+    IN,
+    OUT,
+    SESSION_COLUMNS,
+    SNAPSHOT_SUFFIX,
+    EventJournal,
+    JournalTail,
+    SessionTable,
+    load_sessions,
+    read_sessions_csv,
+    migrate_csv,
+    rewrite_journal,
+)
+from parking_metrics import timed
+from parking_occupancy import ACTIVE_COLUMNS, OccupancyIndex
+
+
+class ParkingError(Exception):
+    """A PARK IN / PARK OUT that was rejected."""
+
+
+class AlreadyParked(ParkingError):
+    pass
+
+
+class LotFull(ParkingError):
+    pass
+
+
+class NotParked(ParkingError):
+    pass
+
+
+class ExitBeforeEntry(ParkingError):
+    """A PARK OUT stamped earlier than the plate's open entry."""
+
+
+# Per-event outcomes of ParkingStore.apply_events
+OK = "ok"
+ALREADY_PARKED = "already_parked"
+FULL = "full"
+NOT_PARKED = "not_parked"
+EXIT_BEFORE_ENTRY = "exit_before_entry"
+
+
+def check_batch(events, capacity: dict, group_of, count,
+                lot_capacity: dict = None, lot_code_of=None, lot_count=None, entry_of=None):
+    """Run the PARK IN / PARK OUT rules over a batch, in order.
+
+    Events are (event, plate, group, time, lot code).  ``group_of(plate)``
+    and ``count(group)`` give the committed state (``lot_code_of`` and
+    ``lot_count`` the same per physical lot, checked against
+    ``lot_capacity`` for IN events that name a lot; ``entry_of`` the open
+    entry time, which an OUT may not precede); events earlier in the batch
+    are layered on top, so an IN followed by an OUT for the same plate both
+    pass.  Returns (statuses, accepted events), where OUT events get the
+    group and lot the plate was parked in.
+    """
+    parked = {}  # plate -> (group, lot code, entry), None once it left, for this batch
+    used = {}
+    lot_used = {}
+    statuses = []
+    accepted = []
+
+    def committed(plate):
+        group = group_of(plate)
+        if group is None:
+            return None
+        return (
+            group,
+            lot_code_of(plate) if lot_code_of else None,
+            entry_of(plate) if entry_of else None,
+        )
+
+    for event, plate, group, when, lot_code in events:
+        current = parked[plate] if plate in parked else committed(plate)
+        if event == IN:
+            if current is not None:
+                statuses.append(ALREADY_PARKED)
+                continue
+            if group not in used:
+                used[group] = count(group)
+            if used[group] >= capacity[group]:
+                statuses.append(FULL)
+                continue
+            check_lot = lot_code is not None and lot_capacity and lot_code in lot_capacity
+            if check_lot:
+                if lot_code not in lot_used:
+                    lot_used[lot_code] = lot_count(lot_code)
+                if lot_used[lot_code] >= lot_capacity[lot_code]:
+                    statuses.append(FULL)
+                    continue
+                lot_used[lot_code] += 1
+            used[group] += 1
+            parked[plate] = (group, lot_code, when)
+        else:
+            if current is None:
+                statuses.append(NOT_PARKED)
+                continue
+            group, lot_code, entry = current
+            if entry is not None and when < entry:
+                statuses.append(EXIT_BEFORE_ENTRY)
+                continue
+            if group not in used:
+                used[group] = count(group)
+            used[group] -= 1
+            if lot_code is not None and lot_count is not None:
+                if lot_code not in lot_used:
+                    lot_used[lot_code] = lot_count(lot_code)
+                lot_used[lot_code] -= 1
+            parked[plate] = None
+        statuses.append(OK)
+        accepted.append((event, plate, group, when, lot_code))
+    return statuses, accepted
+
+
+class ParkingStore(ABC):
+    """Interface shared by every storage backend."""
+
+    @abstractmethod
+    def sessions(self) -> pd.DataFrame:
+        """Full history, one row per session (Plate, Lot, Entry, Exit, LotCode).
+
+        Plate, Lot and LotCode are categoricals, Entry and Exit datetime64[ns]
+        (Exit NaT while parked).  The frame is shared; copy before changing it.
+        """
+
+    @abstractmethod
+    def active(self, group: str) -> pd.DataFrame:
+        """Cars currently parked in one group (Plate, Lot, Entry, LotCode)."""
+
+    @abstractmethod
+    def active_all(self) -> pd.DataFrame:
+        """Cars currently parked anywhere (Plate, Lot, Entry, LotCode)."""
+
+    @abstractmethod
+    def parked_before(self, cutoff: datetime) -> pd.DataFrame:
+        """Cars still parked that entered before ``cutoff``, oldest first."""
+
+    @abstractmethod
+    def history(self, offset: int = 0, limit: int = 50, plate: str = None, group: str = None,
+                start: date = None, end: date = None):
+        """One page of sessions, newest Entry first, and how many match in all.
+
+        ``plate`` matches as a prefix; ``start``/``end`` are Entry dates
+        (inclusive).  Only the page's rows are materialized.
+        """
+
+    @abstractmethod
+    def count(self, group: str) -> int:
+        """Cars parked in one group."""
+
+    @abstractmethod
+    def lot_count(self, lot_code: str) -> int:
+        """Cars parked in one physical lot."""
+
+    @abstractmethod
+    def lot_usage(self) -> dict:
+        """{lot code: cars parked} for every lot in ``LOT_IDS``."""
+
+    @abstractmethod
+    def lot_code_of(self, plate: str):
+        """Physical lot the plate is parked in, or None (unknown or not parked)."""
+
+    @abstractmethod
+    def group_of(self, plate: str):
+        """Group the plate is parked in, or None."""
+
+    @abstractmethod
+    def entry_of(self, plate: str):
+        """Entry time of the plate's open session, or None."""
+
+    def is_parked(self, plate: str) -> bool:
+        return self.group_of(plate) is not None
+
+    @abstractmethod
+    def park_in(self, plate: str, group: str, when: datetime, capacity: int,
+                lot_code: str = None, lot_capacity: int = None):
+        """Check and record an entry in one atomic step.
+
+        ``capacity`` is the group's; when ``lot_code`` is given the car is
+        recorded in that lot and, with ``lot_capacity``, the lot is checked
+        too.  Raises ``AlreadyParked`` or ``LotFull`` instead of committing;
+        a call that returns has been committed.
+        """
+
+    @abstractmethod
+    def park_out(self, plate: str, when: datetime) -> str:
+        """Close the plate's open session and return its group.
+
+        Raises ``NotParked`` if the plate has no open session, and
+        ``ExitBeforeEntry`` if ``when`` is earlier than its entry.
+        """
+
+    @abstractmethod
+    def apply_events(self, events, capacity: dict, lot_capacity: dict = None) -> list:
+        """Validate and commit a batch of (event, plate, group, time, lot code) at once.
+
+        Each event is checked with the same rules as ``park_in`` /
+        ``park_out`` (see ``check_batch``); the accepted ones are written in
+        a single group commit.  Returns one status per event.
+        """
+
+    @abstractmethod
+    def live_rows(self) -> int:
+        """Sessions held in the live store (open plus not yet archived)."""
+
+    @abstractmethod
+    def archive_closed(self, cutoff: datetime, archive) -> int:
+        """Move sessions that closed before ``cutoff`` into ``archive``.
+
+        Returns the number of sessions moved.
+        """
+
+    @abstractmethod
+    def close(self):
+        """Sync and release the files or connections the store holds open."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _entry_bounds(start: date = None, end: date = None):
+    """Inclusive Entry dates -> [start, end) datetimes (None for open ends)."""
+    return (
+        datetime.combine(start, time()) if start else None,
+        datetime.combine(end + timedelta(days=1), time()) if end else None,
+    )
+
+
+# ------------------------
+# JOURNAL BACKEND
+# ------------------------
+
+class JournalStore(ParkingStore):
+    """Append-only CSV journal plus an in-memory occupancy index.
+
+    State is snapshotted next to the journal (``<journal>.snapshot``) so a
+    new process replays only the events written after the latest snapshot.
+    """
+
+    def __init__(self, path: str, groups, legacy_csv: str = None):
+        if (
+            legacy_csv
+            and not os.path.exists(path)
+            and os.path.exists(legacy_csv)
+            and os.path.getsize(legacy_csv) > 0
+        ):
+            migrate_csv(legacy_csv, path)
+        self.journal = EventJournal(path)
+        self.occupancy = OccupancyIndex(groups)
+        self.tail = JournalTail(path, listeners=[self.occupancy], snapshot=path + SNAPSHOT_SUFFIX)
+
+    def _occupancy(self) -> OccupancyIndex:
+        self.tail.refresh()
+        return self.occupancy
+
+    @timed("parking_store_seconds", backend="journal", op="sessions")
+    def sessions(self):
+        return self.tail.frame()
+
+    @timed("parking_store_seconds", backend="journal", op="active")
+    def active(self, group):
+        with self.tail.reading():
+            return self.occupancy.roster(group)
+
+    def active_all(self):
+        with self.tail.reading():
+            return self.occupancy.all_active()
+
+    def parked_before(self, cutoff):
+        with self.tail.reading():  # the sweeper thread runs this next to writers
+            return self.occupancy.parked_before(cutoff)
+
+    @timed("parking_store_seconds", backend="journal", op="history")
+    def history(self, offset=0, limit=50, plate=None, group=None, start=None, end=None):
+        start, end = _entry_bounds(start, end)
+        return self.tail.page(offset, limit, plate=plate, group=group, start=start, end=end)
+
+    def count(self, group):
+        return self._occupancy().count(group)
+
+    def lot_count(self, lot_code):
+        return self._occupancy().lot_count(lot_code)
+
+    def lot_usage(self):
+        return self._occupancy().lot_usage()
+
+    def lot_code_of(self, plate):
+        return self._occupancy().lot_code_of(plate)
+
+    def group_of(self, plate):
+        return self._occupancy().group_of(plate)
+
+    def entry_of(self, plate):
+        return self._occupancy().entry_of(plate)
+
+    @timed("parking_store_seconds", backend="journal", op="park_in")
+    def park_in(self, plate, group, when, capacity, lot_code=None, lot_capacity=None):
+        with self.journal.locked():
+            occupancy = self._occupancy()
+            if occupancy.is_parked(plate):
+                raise AlreadyParked(plate)
+            if occupancy.count(group) >= capacity:
+                raise LotFull(group)
+            if lot_code and lot_capacity is not None and occupancy.lot_count(lot_code) >= lot_capacity:
+                raise LotFull(lot_code)
+            self.journal.append(IN, plate, group, when, lot_code)
+            self.tail.refresh()
+
+    @timed("parking_store_seconds", backend="journal", op="park_out")
+    def park_out(self, plate, when):
+        with self.journal.locked():
+            occupancy = self._occupancy()
+            group = occupancy.group_of(plate)
+            if group is None:
+                raise NotParked(plate)
+            if when < occupancy.entry_of(plate):
+                raise ExitBeforeEntry(plate)
+            self.journal.append(OUT, plate, group, when, occupancy.lot_code_of(plate))
+            self.tail.refresh()
+        return group
+
+    @timed("parking_store_seconds", backend="journal", op="apply_events")
+    def apply_events(self, events, capacity, lot_capacity=None):
+        with self.journal.locked():
+            occupancy = self._occupancy()
+            statuses, accepted = check_batch(
+                events, capacity, occupancy.group_of, occupancy.count,
+                lot_capacity, occupancy.lot_code_of, occupancy.lot_count, occupancy.entry_of,
+            )
+            if accepted:
+                self.journal.append_many(accepted)
+                self.tail.refresh()
+        return statuses
+
+    def live_rows(self):
+        self.tail.refresh()
+        return len(self.tail.table)
+
+    @timed("parking_store_seconds", backend="journal", op="archive_closed")
+    def archive_closed(self, cutoff, archive):
+        with self.journal.locked():
+            df = self.tail.frame()
+            old = df["Exit"].notna() & (df["Exit"] < cutoff)
+            if not old.any():
+                return 0
+            # archive first: a crash before the rewrite only duplicates rows,
+            # which HistoryArchive.read drops
+            archive.write(df[old])
+            # the remaining rows' own lines, in journal order (re-deriving
+            # events from the frame could reorder same-second OUT / IN)
+            rewrite_journal(self.journal.path, (~old).to_numpy())
+            self.journal.reopen()
+            self.tail.save_snapshot()  # the old one no longer matches the journal
+            return int(old.sum())
+
+    def close(self):
+        self.journal.close()
+
+
+# ------------------------
+# SQLITE BACKEND
+# ------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id       INTEGER PRIMARY KEY,
+    plate    TEXT NOT NULL,
+    lot      TEXT NOT NULL,
+    entry    TEXT NOT NULL,
+    exit     TEXT,
+    lot_code TEXT
+);
+-- open sessions per group (capacity counts, group rosters)
+CREATE INDEX IF NOT EXISTS sessions_open_by_lot
+    ON sessions (lot, entry) WHERE exit IS NULL;
+-- at most one open session per plate (duplicate check, PARK OUT)
+CREATE UNIQUE INDEX IF NOT EXISTS sessions_open_by_plate
+    ON sessions (plate) WHERE exit IS NULL;
+-- open sessions by entry time (overstay range lookups)
+CREATE INDEX IF NOT EXISTS sessions_open_by_entry
+    ON sessions (entry) WHERE exit IS NULL;
+-- plate history lookups
+CREATE INDEX IF NOT EXISTS sessions_by_plate ON sessions (plate, entry);
+-- History page, newest first (overall and per group); open-session queries
+-- name sessions_open_by_lot with INDEXED BY, or the planner may pick this one
+CREATE INDEX IF NOT EXISTS sessions_by_entry ON sessions (entry);
+CREATE INDEX IF NOT EXISTS sessions_by_lot ON sessions (lot, entry);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+-- bumped when sessions are deleted (archived), so cached copies reload
+INSERT OR IGNORE INTO meta (key, value) VALUES ('deletions', 0);
+"""
+
+# Run after SCHEMA, once databases from before lot codes have the column
+LOT_CODE_INDEX = """
+-- open sessions per physical lot (lot-level occupancy)
+CREATE INDEX IF NOT EXISTS sessions_open_by_lot_code
+    ON sessions (lot_code) WHERE exit IS NULL;
+"""
+
+
+class SQLiteStore(ParkingStore):
+    """SQLite database in WAL mode; every PARK IN/OUT is one small transaction.
+
+    Each thread (Streamlit runs each browser session in its own thread) gets
+    its own connection.  WAL lets readers carry on while another session or
+    process is writing.
+    """
+
+    SYNC_CHUNK = 100_000  # rows per read when mirroring new sessions
+
+    def __init__(self, path: str, groups, seed_journal: str = None, legacy_csv: str = None):
+        self.path = path
+        self.groups = list(groups)
+        self._local = threading.local()
+        self._cache_lock = threading.Lock()
+        self._cached = (None, None)  # (version, sessions frame)
+        # SessionTable mirror of the sessions table, synced by id
+        self._table = None
+        self._open_ids = {}  # sessions id -> mirror row, for sessions open in the mirror
+        self._max_id = 0
+        self._deletions = None
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+        if "lot_code" not in columns:
+            conn.execute("ALTER TABLE sessions ADD COLUMN lot_code TEXT")
+        conn.executescript(LOT_CODE_INDEX)
+        # Seed only a database nothing was ever written to (version 0), so an
+        # import that failed part-way is retried on the next open
+        if self._version() == 0:
+            if seed_journal and os.path.exists(seed_journal):
+                self._import(load_sessions(seed_journal))
+            elif legacy_csv and os.path.exists(legacy_csv) and os.path.getsize(legacy_csv) > 0:
+                self._import(read_sessions_csv(legacy_csv))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _import(self, df: pd.DataFrame):
+        rows = [
+            (
+                plate,
+                lot,
+                entry.isoformat(),
+                None if pd.isna(exit_) else exit_.isoformat(),
+                None if pd.isna(lot_code) else lot_code,
+            )
+            for plate, lot, entry, exit_, lot_code in df.reindex(
+                columns=SESSION_COLUMNS
+            ).itertuples(index=False)
+            if not pd.isna(entry)
+        ]
+        if not rows:
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._version() != 0:
+                return  # another process seeded it first
+            conn.executemany(
+                "INSERT INTO sessions (plate, lot, entry, exit, lot_code) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def _version(self) -> int:
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def _active_frame(self, rows) -> pd.DataFrame:
+        df = pd.DataFrame(rows, columns=ACTIVE_COLUMNS)
+        df["Entry"] = pd.to_datetime(df["Entry"], format="ISO8601").astype("datetime64[ns]")
+        return df
+
+    @timed("parking_store_seconds", backend="sqlite", op="sessions")
+    def sessions(self):
+        with self._cache_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("BEGIN")  # one snapshot for the counters and the rows
+                meta = dict(conn.execute("SELECT key, value FROM meta"))
+                if self._cached[0] != meta["version"]:
+                    self._sync(conn, meta["deletions"])
+                    self._cached = (meta["version"], self._table.frame())
+            return self._cached[1]
+
+    @timed("parking_sqlite_sync_seconds")
+    def _sync(self, conn, deletions: int):
+        """Bring the mirror up to date: new ids, plus exits of sessions it has open.
+
+        Only a deletion (archiving) makes it start over.
+        """
+        if self._table is None or deletions != self._deletions:
+            self._table, self._open_ids, self._max_id = SessionTable(), {}, 0
+            self._deletions = deletions
+        elif self._open_ids:
+            closed = conn.execute(
+                "SELECT id, exit FROM sessions WHERE exit IS NOT NULL "
+                "AND id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(self._open_ids)),),
+            ).fetchall()
+            if closed:
+                self._table.close(
+                    [self._open_ids.pop(id_) for id_, _ in closed],
+                    pd.to_datetime([exit_ for _, exit_ in closed], format="ISO8601"),
+                )
+
+        # in chunks, so a cold load never holds every row as Python strings
+        for df in pd.read_sql_query(
+            "SELECT id, plate AS Plate, lot AS Lot, entry AS Entry, exit AS Exit, "
+            "lot_code AS LotCode FROM sessions WHERE id > ? ORDER BY id",
+            conn,
+            params=(self._max_id,),
+            chunksize=self.SYNC_CHUNK,
+        ):
+            df["Entry"] = pd.to_datetime(df["Entry"], format="ISO8601").astype("datetime64[ns]")
+            df["Exit"] = pd.to_datetime(df["Exit"], format="ISO8601").astype("datetime64[ns]")
+            first = self._table.extend(df)
+            ids = df["id"].to_numpy()
+            still_open = np.flatnonzero(df["Exit"].isna().to_numpy())
+            self._open_ids.update(zip(ids[still_open].tolist(), (first + still_open).tolist()))
+            self._max_id = int(ids[-1])
+
+    @timed("parking_store_seconds", backend="sqlite", op="active")
+    def active(self, group):
+        rows = self._conn().execute(
+            "SELECT plate, lot, entry, lot_code FROM sessions INDEXED BY sessions_open_by_lot "
+            "WHERE lot = ? AND exit IS NULL ORDER BY entry",
+            (group,),
+        ).fetchall()
+        return self._active_frame(rows)
+
+    def active_all(self):
+        rows = self._conn().execute(
+            "SELECT plate, lot, entry, lot_code FROM sessions WHERE exit IS NULL ORDER BY entry"
+        ).fetchall()
+        return self._active_frame(rows)
+
+    def parked_before(self, cutoff):
+        rows = self._conn().execute(
+            "SELECT plate, lot, entry, lot_code FROM sessions "
+            "WHERE exit IS NULL AND entry < ? ORDER BY entry",
+            (cutoff.isoformat(),),
+        ).fetchall()
+        return self._active_frame(rows)
+
+    @timed("parking_store_seconds", backend="sqlite", op="history")
+    def history(self, offset=0, limit=50, plate=None, group=None, start=None, end=None):
+        start, end = _entry_bounds(start, end)
+        where, params = [], []
+        if plate:
+            # prefix as a range, so sessions_by_plate can be used
+            where.append("plate >= ? AND plate < ?")
+            params += [plate, plate + "\U0010ffff"]
+        if group:
+            where.append("lot = ?")
+            params.append(group)
+        if start:
+            where.append("entry >= ?")
+            params.append(start.isoformat())
+        if end:
+            where.append("entry < ?")
+            params.append(end.isoformat())
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM sessions {clause}", params).fetchone()[0]
+        df = pd.read_sql_query(
+            "SELECT plate AS Plate, lot AS Lot, entry AS Entry, exit AS Exit, "
+            f"lot_code AS LotCode FROM sessions {clause} "
+            "ORDER BY entry DESC, id DESC LIMIT ? OFFSET ?",
+            conn,
+            params=params + [limit, offset],
+        )
+        df["Entry"] = pd.to_datetime(df["Entry"], format="ISO8601").astype("datetime64[ns]")
+        df["Exit"] = pd.to_datetime(df["Exit"], format="ISO8601").astype("datetime64[ns]")
+        return df, total
+
+    def count(self, group):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM sessions INDEXED BY sessions_open_by_lot "
+            "WHERE lot = ? AND exit IS NULL",
+            (group,),
+        ).fetchone()[0]
+
+    def lot_count(self, lot_code):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM sessions WHERE lot_code = ? AND exit IS NULL", (lot_code,)
+        ).fetchone()[0]
+
+    def lot_usage(self):
+        usage = dict.fromkeys(LOT_IDS, 0)
+        usage.update(self._conn().execute(
+            "SELECT lot_code, COUNT(*) FROM sessions "
+            "WHERE exit IS NULL AND lot_code IS NOT NULL GROUP BY lot_code"
+        ).fetchall())
+        return usage
+
+    def lot_code_of(self, plate):
+        row = self._conn().execute(
+            "SELECT lot_code FROM sessions WHERE plate = ? AND exit IS NULL", (plate,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def group_of(self, plate):
+        row = self._conn().execute(
+            "SELECT lot FROM sessions WHERE plate = ? AND exit IS NULL", (plate,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def entry_of(self, plate):
+        row = self._conn().execute(
+            "SELECT entry FROM sessions WHERE plate = ? AND exit IS NULL", (plate,)
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    @timed("parking_store_seconds", backend="sqlite", op="park_in")
+    def park_in(self, plate, group, when, capacity, lot_code=None, lot_capacity=None):
+        conn = self._conn()
+        with conn:
+            # IMMEDIATE takes the write lock up front, so the checks below and
+            # the insert see the same state as every other writer.
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute(
+                "SELECT 1 FROM sessions WHERE plate = ? AND exit IS NULL", (plate,)
+            ).fetchone():
+                raise AlreadyParked(plate)
+            used = conn.execute(
+                "SELECT COUNT(*) FROM sessions INDEXED BY sessions_open_by_lot "
+                "WHERE lot = ? AND exit IS NULL",
+                (group,),
+            ).fetchone()[0]
+            if used >= capacity:
+                raise LotFull(group)
+            if lot_code and lot_capacity is not None and self.lot_count(lot_code) >= lot_capacity:
+                raise LotFull(lot_code)
+            conn.execute(
+                "INSERT INTO sessions (plate, lot, entry, lot_code) VALUES (?, ?, ?, ?)",
+                (plate, group, when.isoformat(), lot_code),
+            )
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    @timed("parking_store_seconds", backend="sqlite", op="park_out")
+    def park_out(self, plate, when):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            entry = self.entry_of(plate)
+            if entry is None:
+                raise NotParked(plate)
+            if when < entry:
+                raise ExitBeforeEntry(plate)
+            row = conn.execute(
+                "UPDATE sessions SET exit = ? WHERE plate = ? AND exit IS NULL RETURNING lot",
+                (when.isoformat(), plate),
+            ).fetchone()
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return row[0]
+
+    @timed("parking_store_seconds", backend="sqlite", op="apply_events")
+    def apply_events(self, events, capacity, lot_capacity=None):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            statuses, accepted = check_batch(
+                events, capacity, self.group_of, self.count,
+                lot_capacity, self.lot_code_of, self.lot_count, self.entry_of,
+            )
+            for event, plate, group, when, lot_code in accepted:
+                if event == IN:
+                    conn.execute(
+                        "INSERT INTO sessions (plate, lot, entry, lot_code) VALUES (?, ?, ?, ?)",
+                        (plate, group, when.isoformat(), lot_code),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE sessions SET exit = ? WHERE plate = ? AND exit IS NULL",
+                        (when.isoformat(), plate),
+                    )
+            if accepted:
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return statuses
+
+    def live_rows(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    @timed("parking_store_seconds", backend="sqlite", op="archive_closed")
+    def archive_closed(self, cutoff, archive):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            df = pd.read_sql_query(
+                "SELECT plate AS Plate, lot AS Lot, entry AS Entry, exit AS Exit, "
+                "lot_code AS LotCode FROM sessions WHERE exit IS NOT NULL AND exit < ?",
+                conn,
+                params=(cutoff.isoformat(),),
+            )
+            if df.empty:
+                return 0
+            df["Entry"] = pd.to_datetime(df["Entry"], format="ISO8601").astype("datetime64[ns]")
+            df["Exit"] = pd.to_datetime(df["Exit"], format="ISO8601").astype("datetime64[ns]")
+            archive.write(df)
+            conn.execute(
+                "DELETE FROM sessions WHERE exit IS NOT NULL AND exit < ?",
+                (cutoff.isoformat(),),
+            )
+            conn.execute(
+                "UPDATE meta SET value = value + 1 WHERE key IN ('version', 'deletions')"
+            )
+        return len(df)
+
+    def close(self):
+        """Close this thread's connection; other threads' close as they end."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# ------------------------
+# FACTORY
+# ------------------------
+
+def open_store(groups, journal_path: str, sqlite_path: str, legacy_csv: str = None,
+               backend: str = None) -> ParkingStore:
+    """Open the backend named by ``backend`` or ``$PARKING_STORE``."""
+    backend = (backend or os.environ.get("PARKING_STORE", "journal")).lower()
+    if backend == "journal":
+        return JournalStore(journal_path, groups, legacy_csv=legacy_csv)
+    if backend == "sqlite":
+        return SQLiteStore(sqlite_path, groups, seed_journal=journal_path, legacy_csv=legacy_csv)
+    raise ValueError(f"Unknown PARKING_STORE backend: {backend!r}")
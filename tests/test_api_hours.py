@@ -0,0 +1,48 @@
+"""``?hours=`` and ``?at=`` on the API's time-window routes."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = pytest.importorskip("fairfield_parking_api")
+    monkeypatch.setattr(api, "_feed", None)
+    return api.app.test_client()
+
+
+@pytest.mark.parametrize("hours", ["nan", "inf", "-1"])
+def test_overstays_rejects_bad_hours(client, hours):
+    response = client.get(f"/overstays?hours={hours}")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("hours", ["1e9", "0", "4"])
+def test_overstays_accepts_any_window(client, hours):
+    response = client.get(f"/overstays?hours={hours}")
+    assert response.status_code == 200
+    assert response.get_json() == []
+
+
+@pytest.mark.parametrize("hours", ["nan", "inf", "-1"])
+def test_forecast_rejects_bad_hours(client, hours):
+    response = client.get(f"/forecast/green?hours={hours}")
+    assert response.status_code == 400
+
+
+def test_forecast_caps_hours(client):
+    response = client.get("/forecast/green?hours=1e9&step=60")
+    assert response.status_code == 200
+    assert len(response.get_json()["forecast"]) <= 49
+
+
+@pytest.mark.filterwarnings("error")
+def test_forecast_at_with_utc_offset_is_local_time(client):
+    at = datetime.now(timezone(timedelta(hours=2))).replace(microsecond=0) + timedelta(hours=3)
+    local = at.astimezone().replace(tzinfo=None)
+
+    response = client.get("/forecast/green", query_string={"at": at.isoformat()})
+
+    assert response.status_code == 200
+    assert response.get_json()["at"] == local.isoformat(timespec="minutes")
@@ -0,0 +1,76 @@
+"""Migrating history written before LotCode was recorded into Parquet."""
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from parking_archive import HistoryArchive, main  # noqa: E402
+
+LEGACY = (
+    "Plate,Lot,Entry,Exit\n"
+    "A1,Green (Commuters),2026-01-05 08:00:00,2026-01-05 10:00:00\n"
+    "B2,Blue (Faculty),2026-01-06 09:00:00,2026-01-06 11:00:00\n"
+    "C3,Blue (Faculty),2026-01-06 12:00:00,\n"
+)
+
+
+def _check(df):
+    df = df.sort_values("Entry", ignore_index=True)
+    assert df["Plate"].astype(str).tolist() == ["A1", "B2"]
+    assert df["Entry"].tolist() == [pd.Timestamp("2026-01-05 08:00"), pd.Timestamp("2026-01-06 09:00")]
+    assert df["LotCode"].isna().all()
+
+
+def test_migrate_legacy_csv_without_lot_code(tmp_path):
+    legacy = tmp_path / "legacy.csv"
+    legacy.write_text(LEGACY)
+    root = tmp_path / "archive"
+
+    main(["--archive", str(root), "migrate", "--csv", str(legacy)])
+
+    _check(HistoryArchive(str(root), fmt="parquet").read())
+
+
+def test_convert_four_column_csv_partitions(tmp_path):
+    root = tmp_path / "archive"
+    root.mkdir()
+    day, rest = LEGACY.split("\n", 1)[1].split("\n", 1)
+    (root / "2026-01-05.csv").write_text("Plate,Lot,Entry,Exit\n" + day + "\n")
+    (root / "2026-01-06.csv").write_text("Plate,Lot,Entry,Exit\n" + rest.split("\n")[0] + "\n")
+    archive = HistoryArchive(str(root), fmt="parquet")
+
+    assert archive.convert_csv_partitions() == 2
+
+    assert not list(root.glob("*.csv"))
+    _check(archive.read())
+
+
+def test_migrate_csv_with_mixed_timestamp_precision(tmp_path):
+    legacy = tmp_path / "legacy.csv"
+    legacy.write_text(
+        "Plate,Lot,Entry,Exit\n"
+        "A1,Green (Commuters),2026-01-05 08:00:00,2026-01-05 10:00:00.250000\n"
+        "B2,Blue (Faculty),2026-01-06 09:00:00.500000,2026-01-06 11:00:00\n"
+    )
+    root = tmp_path / "archive"
+
+    main(["--archive", str(root), "migrate", "--csv", str(legacy)])
+
+    df = HistoryArchive(str(root), fmt="parquet").read().sort_values("Entry", ignore_index=True)
+    assert df["Entry"].tolist() == [pd.Timestamp("2026-01-05 08:00"),
+                                    pd.Timestamp("2026-01-06 09:00:00.5")]
+
+
+@pytest.mark.parametrize("argv", [
+    ["--keep-days", "7"],
+    ["--archive", "ARCHIVE", "--keep-days", "7"],
+    ["--keep-days", "7", "--archive", "ARCHIVE"],
+    ["--archive", "ARCHIVE", "run", "--keep-days", "7"],
+])
+def test_run_is_the_default_command(tmp_path, monkeypatch, capsys, argv):
+    monkeypatch.chdir(tmp_path)
+    argv = [str(tmp_path / "archive") if a == "ARCHIVE" else a for a in argv]
+
+    main(argv + ["--journal", str(tmp_path / "events.csv"), "--backend", "journal"])
+
+    assert capsys.readouterr().out.startswith("Archived 0 sessions")
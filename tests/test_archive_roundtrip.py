@@ -0,0 +1,84 @@
+"""HistoryArchive reads and pages against plain pandas over the same sessions."""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from parking_archive import HistoryArchive
+from parking_config import LOT_GROUP
+from parking_journal import SESSION_COLUMNS
+
+
+def _formats():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return ["csv"]
+    return ["csv", "parquet"]
+
+
+def _sessions(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    lots = rng.choice(sorted(LOT_GROUP), n)
+    seconds = np.sort(rng.choice(10 * 86_400, n, replace=False))  # distinct Entry times
+    entry = pd.Timestamp("2026-01-05") + pd.to_timedelta(seconds, unit="s")
+    return pd.DataFrame({
+        "Plate": rng.choice(["AB1", "AB2", "AC3", "X9", "X10"], n),
+        "Lot": [LOT_GROUP[lot] for lot in lots],
+        "Entry": entry,
+        "Exit": entry + pd.to_timedelta(rng.integers(60, 9 * 3_600, n), unit="s"),
+        "LotCode": lots,
+    })
+
+
+def _plain(df):
+    df = df[SESSION_COLUMNS].astype({"Plate": str, "Lot": str, "LotCode": str})
+    return df.sort_values("Entry", ignore_index=True)
+
+
+@pytest.fixture(params=_formats())
+def archived(request, tmp_path):
+    sessions = _sessions()
+    archive = HistoryArchive(str(tmp_path / "archive"), fmt=request.param)
+    archive.write(sessions.iloc[:200])
+    archive.write(sessions.iloc[150:])  # overlap, as after a crash before compaction
+    return archive, sessions
+
+
+def test_read_returns_every_session_once(archived):
+    archive, sessions = archived
+
+    pd.testing.assert_frame_equal(_plain(archive.read()), _plain(sessions), check_dtype=False)
+
+    day = date(2026, 1, 8)
+    one_day = sessions[sessions["Entry"].dt.date == day]
+    pd.testing.assert_frame_equal(_plain(archive.read(day, day)), _plain(one_day), check_dtype=False)
+
+
+@pytest.mark.parametrize("offset, limit, plate, group, start, end", [
+    (0, 50, None, None, None, None),
+    (37, 25, None, None, None, None),
+    (280, 50, None, None, None, None),
+    (0, 20, "AB", None, None, None),
+    (15, 20, "X1", "Blue (Faculty)", None, None),
+    (5, 30, None, "Green (Commuters)", date(2026, 1, 7), date(2026, 1, 11)),
+])
+def test_page_matches_sorting_everything(archived, offset, limit, plate, group, start, end):
+    archive, sessions = archived
+    matching = sessions
+    if plate:
+        matching = matching[matching["Plate"].str.startswith(plate)]
+    if group:
+        matching = matching[matching["Lot"] == group]
+    if start:
+        matching = matching[matching["Entry"].dt.date >= start]
+    if end:
+        matching = matching[matching["Entry"].dt.date <= end]
+    expected = matching.sort_values("Entry", ascending=False).iloc[offset:offset + limit]
+
+    page, total = archive.page(offset, limit, plate=plate, group=group, start=start, end=end)
+
+    assert total == len(matching)
+    assert page["Entry"].tolist() == expected["Entry"].tolist()
+    assert page["Plate"].astype(str).tolist() == expected["Plate"].tolist()
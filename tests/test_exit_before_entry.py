@@ -0,0 +1,71 @@
+"""An OUT stamped before the plate's open entry is rejected."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from parking_config import CAPACITY
+from parking_journal import IN, OUT
+from parking_store import (
+    EXIT_BEFORE_ENTRY, NOT_PARKED, OK, ExitBeforeEntry, JournalStore, SQLiteStore, check_batch,
+)
+
+GREEN = "Green (Commuters)"
+NOW = datetime(2026, 3, 2, 9, 30)
+
+
+def test_check_batch_uses_committed_and_batch_entries():
+    entries = {"OLD": NOW}
+    statuses, accepted = check_batch(
+        [
+            (OUT, "OLD", None, NOW - timedelta(minutes=1), None),  # before its entry
+            (IN, "NEW", GREEN, NOW, None),
+            (OUT, "NEW", None, NOW - timedelta(seconds=1), None),  # before the IN above
+            (OUT, "NEW", None, NOW, None),                         # same second is fine
+            (OUT, "GONE", None, NOW, None),
+        ],
+        CAPACITY,
+        group_of=lambda plate: GREEN if plate in entries else None,
+        count=lambda group: 0,
+        entry_of=entries.get,
+    )
+    assert statuses == [EXIT_BEFORE_ENTRY, OK, EXIT_BEFORE_ENTRY, OK, NOT_PARKED]
+    assert [event[:2] for event in accepted] == [(IN, "NEW"), (OUT, "NEW")]
+
+
+@pytest.mark.parametrize("backend", ["journal", "sqlite"])
+def test_park_out_before_entry(tmp_path, backend):
+    if backend == "journal":
+        store = JournalStore(str(tmp_path / "events.csv"), CAPACITY.keys())
+    else:
+        store = SQLiteStore(str(tmp_path / "parking.db"), CAPACITY.keys())
+    store.park_in("P", GREEN, NOW, CAPACITY[GREEN])
+    with pytest.raises(ExitBeforeEntry):
+        store.park_out("P", NOW - timedelta(minutes=5))
+    assert store.apply_events(
+        [(OUT, "P", None, NOW - timedelta(minutes=5), None)], CAPACITY,
+    ) == [EXIT_BEFORE_ENTRY]
+    assert store.count(GREEN) == 1
+    assert store.park_out("P", NOW + timedelta(hours=1)) == GREEN
+    assert store.count(GREEN) == 0
+
+
+def test_post_events_answers_422(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = pytest.importorskip("fairfield_parking_api")
+    monkeypatch.setattr(api, "_feed", None)
+    client = api.app.test_client()
+
+    def post(*events):
+        return client.post(
+            "/events", data="\n".join(json.dumps(e) for e in events),
+            content_type="application/x-ndjson",
+        )
+
+    entry = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+    assert post({"event": "IN", "plate": "Q1", "group": "green", "time": entry.isoformat()}).status_code == 200
+    early = {"event": "OUT", "plate": "Q1", "time": (entry - timedelta(minutes=1)).isoformat()}
+    response = post(early)
+    assert response.status_code == 422
+    assert response.get_json()["rejected"] == [{"index": 0, "status": EXIT_BEFORE_ENTRY}]
+    assert post({"event": "OUT", "plate": "Q1", "time": (entry + timedelta(minutes=1)).isoformat()}).status_code == 200
@@ -0,0 +1,39 @@
+"""Concurrent polls of the occupancy feed."""
+import threading
+import time
+
+from parking_feed import OccupancyFeed
+
+
+class RisingStore:
+    """Counts that only go up: each read sees one more car than the last."""
+
+    def __init__(self):
+        self.cars = 0
+        self._lock = threading.Lock()
+
+    def count(self, group):
+        with self._lock:
+            self.cars += 1
+            seen = self.cars
+        time.sleep(0.0005)  # the read is slow, as a journal tail can be
+        return seen
+
+
+def test_concurrent_polls_never_move_counts_backwards():
+    store = RisingStore()
+    feed = OccupancyFeed(store, {"Green": 10_000})
+
+    def poll():
+        for _ in range(50):
+            feed.poll()
+
+    threads = [threading.Thread(target=poll) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    changes = [delta["change"] for _, delta in feed.since(0)]
+    assert all(change > 0 for change in changes)
+    assert feed.snapshot()["Green"]["used"] == store.cars
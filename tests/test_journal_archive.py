@@ -0,0 +1,102 @@
+"""Archiving closed sessions rewrites the journal without changing who is parked."""
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from parking_archive import HistoryArchive
+from parking_config import CAPACITY, LOT_CAPACITY
+from parking_journal import IN, OUT
+from parking_store import JournalStore
+
+GREEN = "Green (Commuters)"
+BLUE = "Blue (Faculty)"
+NOW = datetime(2026, 3, 2, 9, 30)
+
+
+def _state(store):
+    return (
+        {group: store.count(group) for group in CAPACITY},
+        store.lot_usage(),
+        {group: store.active(group)["Plate"].tolist() for group in CAPACITY},
+        sorted(store.active_all()["Plate"]),
+    )
+
+
+def _archive(tmp_path, store):
+    archive = HistoryArchive(str(tmp_path / "archive"))
+    moved = store.archive_closed(NOW - timedelta(days=1), archive)
+    reopened = JournalStore(store.journal.path, CAPACITY.keys())
+    return moved, reopened
+
+
+def test_same_second_exit_and_reentry_survives_archiving(tmp_path):
+    store = JournalStore(str(tmp_path / "events.csv"), CAPACITY.keys())
+    old = NOW - timedelta(days=3)
+    store.park_in("OLD1", GREEN, old, CAPACITY[GREEN], "E-1", LOT_CAPACITY["E-1"])
+    store.park_out("OLD1", old + timedelta(hours=2))
+    # P leaves a Green lot and enters a Blue one in the same second
+    store.park_in("P", GREEN, NOW - timedelta(hours=1), CAPACITY[GREEN], "E-1", LOT_CAPACITY["E-1"])
+    store.park_out("P", NOW)
+    store.park_in("P", BLUE, NOW, CAPACITY[BLUE], "B-1", LOT_CAPACITY["B-1"])
+    before = _state(store)
+    assert before[0][BLUE] == 1 and before[0][GREEN] == 0
+    assert before[2][BLUE] == ["P"]
+
+    moved, reopened = _archive(tmp_path, store)
+
+    assert moved == 1
+    assert _state(store) == before
+    assert _state(reopened) == before
+    assert reopened.sessions()["Plate"].tolist() == ["P", "P"]
+
+
+def test_out_stamped_before_in_keeps_journal_order(tmp_path):
+    store = JournalStore(str(tmp_path / "events.csv"), CAPACITY.keys())
+    old = NOW - timedelta(days=3)
+    store.journal.append(IN, "OLD1", GREEN, old, "E-1")
+    store.journal.append(OUT, "OLD1", GREEN, old + timedelta(hours=1), "E-1")
+    # a journal written before exits were checked against entries
+    store.journal.append(IN, "Q", GREEN, NOW, "E-1")
+    store.journal.append(OUT, "Q", GREEN, NOW - timedelta(minutes=5), "E-1")
+    store.journal.append(IN, "R", BLUE, NOW, "B-1")
+    before = _state(store)
+    assert before[0][GREEN] == 0 and before[0][BLUE] == 1
+
+    moved, reopened = _archive(tmp_path, store)
+
+    assert moved == 1
+    assert _state(store) == before
+    assert _state(reopened) == before
+
+
+def test_random_journal_archives_exactly_the_old_closed_sessions(tmp_path):
+    rng = random.Random(17)
+    store = JournalStore(str(tmp_path / "events.csv"), CAPACITY.keys())
+    parked = {}
+    when = NOW - timedelta(days=5)
+    for _ in range(400):
+        when += timedelta(seconds=rng.choice([0, 0, 1, 600, 3_600]))  # many same-second events
+        plate = f"P{rng.randrange(40)}"
+        if plate in parked:
+            store.journal.append(OUT, plate, parked.pop(plate), when, None)
+        else:
+            parked[plate] = rng.choice([GREEN, BLUE])
+            store.journal.append(IN, plate, parked[plate], when, None)
+    store.tail.refresh()
+    sessions = store.sessions().reset_index(drop=True)
+    old = sessions["Exit"].notna() & (sessions["Exit"] < NOW - timedelta(days=1))
+    before = _state(store)
+
+    moved, reopened = _archive(tmp_path, store)
+
+    assert moved == old.sum() > 0
+    assert _state(reopened) == before
+    kept = reopened.sessions().reset_index(drop=True)[["Plate", "Lot", "Entry", "Exit"]]
+    expected = sessions[~old].reset_index(drop=True)[["Plate", "Lot", "Entry", "Exit"]]
+    pd.testing.assert_frame_equal(kept.astype({"Plate": str, "Lot": str}),
+                                  expected.astype({"Plate": str, "Lot": str}))
+    archived = HistoryArchive(str(tmp_path / "archive")).read()
+    assert sorted(zip(archived["Plate"].astype(str), archived["Entry"])) == sorted(
+        zip(sessions.loc[old, "Plate"].astype(str), sessions.loc[old, "Entry"])
+    )
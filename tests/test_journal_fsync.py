@@ -0,0 +1,66 @@
+"""Batched fsync of the event journal, and closing it."""
+import gc
+import time
+import weakref
+from datetime import datetime
+
+import parking_journal
+from parking_config import CAPACITY
+from parking_journal import IN, EventJournal
+from parking_store import JournalStore
+
+
+def _count_fsyncs(monkeypatch):
+    calls = []
+    fsync = parking_journal.os.fsync
+
+    def counting(fd):
+        calls.append(fd)
+        fsync(fd)
+
+    monkeypatch.setattr(parking_journal.os, "fsync", counting)
+    return calls
+
+
+def test_idle_journal_is_synced_after_the_interval(tmp_path, monkeypatch):
+    calls = _count_fsyncs(monkeypatch)
+    journal = EventJournal(str(tmp_path / "events.csv"), fsync_every=1000, fsync_interval=0.05)
+    journal.append(IN, "P1", "Green (Commuters)", datetime(2026, 3, 2, 9, 0))
+    assert calls == []  # batched
+
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(calls) == 1
+    journal.close()
+
+
+def test_close_always_syncs(tmp_path, monkeypatch):
+    calls = _count_fsyncs(monkeypatch)
+    journal = EventJournal(str(tmp_path / "events.csv"))  # writes the header only
+
+    journal.close()
+
+    assert len(calls) == 1
+
+
+def test_closed_journals_are_not_held_for_exit(tmp_path):
+    journals = [EventJournal(str(tmp_path / f"events{i}.csv")) for i in range(3)]
+    assert all(journal in parking_journal._open_journals for journal in journals)
+
+    with JournalStore(str(tmp_path / "events1.csv"), CAPACITY.keys()) as store:
+        store.park_in("P1", "Green (Commuters)", datetime(2026, 3, 2, 9, 0), 10)
+    for journal in journals:
+        journal.close()
+
+    assert store.journal._fh.closed
+    for journal in journals + [store.journal]:
+        assert journal not in parking_journal._open_journals
+
+
+def test_unclosed_journal_is_not_kept_alive_for_exit(tmp_path):
+    journal = weakref.ref(EventJournal(str(tmp_path / "events.csv")))
+    gc.collect()
+
+    assert journal() is None
@@ -0,0 +1,55 @@
+"""Roster reads while other threads park cars in and out."""
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from parking_config import CAPACITY
+from parking_store import JournalStore
+
+GROUP = "Orange (Residents)"
+
+
+def _hammer(store, readers, seconds=2.0, window=300):
+    deadline = time.monotonic() + seconds
+    errors = []
+
+    def write(w):
+        for i in range(10**9):
+            if time.monotonic() > deadline:
+                return
+            store.park_in(f"W{w}-{i}", GROUP, datetime.now() - timedelta(hours=10), 10**6)
+            if i >= window:
+                store.park_out(f"W{w}-{i - window}", datetime.now())
+
+    def read(fn):
+        while time.monotonic() < deadline:
+            try:
+                fn()
+            except Exception as exc:  # noqa: BLE001 - any failure is the bug
+                errors.append(repr(exc))
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(3)]
+    threads += [threading.Thread(target=read, args=(fn,)) for fn in readers]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # switch threads often, so races show up in 2 s
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    return errors
+
+
+def test_rosters_read_while_writing(tmp_path):
+    store = JournalStore(str(tmp_path / "events.csv"), CAPACITY.keys())
+    errors = _hammer(store, [lambda: store.active(GROUP), store.active_all])
+    assert errors == []
+
+
+def test_parked_before_while_writing(tmp_path):
+    store = JournalStore(str(tmp_path / "events.csv"), CAPACITY.keys())
+    errors = _hammer(store, [lambda: store.parked_before(datetime.now())] * 3)
+    assert errors == []
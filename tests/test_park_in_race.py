@@ -0,0 +1,61 @@
+"""Concurrent PARK IN attempts at one small category, both backends.
+
+A scaled-down ``benchmarks.stress_park_in``: threads in one process, each with
+its own store on the same files, so the cross-process locking is what keeps
+them apart.  Every plate is tried by two threads.
+"""
+import threading
+from datetime import datetime
+
+import pytest
+
+from parking_store import AlreadyParked, LotFull, open_store
+
+GROUP = "Green (Commuters)"
+THREADS = 4
+ATTEMPTS = 150  # per thread
+CAPACITY = 200
+
+
+def _open(backend, tmp_path):
+    return open_store([GROUP], str(tmp_path / "events.csv"), str(tmp_path / "parking.db"), backend=backend)
+
+
+@pytest.mark.parametrize("backend", ["journal", "sqlite"])
+def test_capacity_holds_and_no_event_is_lost(backend, tmp_path):
+    _open(backend, tmp_path).close()  # create the files before the race starts
+    total = THREADS * ATTEMPTS
+    plates = [f"S{i % (total // 2):04d}" for i in range(total)]
+    outcomes = []
+    lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def attempt(mine):
+        with _open(backend, tmp_path) as store:
+            start.wait()
+            for plate in mine:
+                try:
+                    store.park_in(plate, GROUP, datetime.now(), CAPACITY)
+                    outcome = "committed"
+                except LotFull:
+                    outcome = "full"
+                except AlreadyParked:
+                    outcome = "duplicate"
+                with lock:
+                    outcomes.append((plate, outcome))
+
+    # plates[i] and plates[i + 300] are the same plate, tried by different threads
+    chunks = [plates[t * ATTEMPTS:(t + 1) * ATTEMPTS] for t in range(THREADS)]
+    threads = [threading.Thread(target=attempt, args=(chunk,)) for chunk in chunks]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    committed = [plate for plate, outcome in outcomes if outcome == "committed"]
+    assert len(outcomes) == total
+    assert len(committed) == len(set(committed)) == CAPACITY  # 300 plates for 200 spaces
+    with _open(backend, tmp_path) as reopened:
+        assert reopened.count(GROUP) == CAPACITY
+        assert set(reopened.active(GROUP)["Plate"]) == set(committed)
+        assert len(reopened.sessions()) == CAPACITY  # nothing written twice
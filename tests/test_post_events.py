@@ -0,0 +1,124 @@
+"""Idempotency keys and repeat reads on POST /events."""
+import json
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from parking_dedupe import IdempotencyCache, RepeatReadFilter
+
+NOW = datetime.now().replace(microsecond=0) - timedelta(minutes=5)
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = pytest.importorskip("fairfield_parking_api")
+    monkeypatch.setattr(api, "_feed", None)
+    monkeypatch.setattr(api, "repeat_reads", RepeatReadFilter())
+    monkeypatch.setattr(api, "idempotency", IdempotencyCache())
+    return api
+
+
+def _post(client, *events, status=200):
+    response = client.post(
+        "/events", data="\n".join(json.dumps(e) for e in events),
+        content_type="application/x-ndjson",
+    )
+    assert response.status_code == status
+    return response.get_json()
+
+
+def _park_in(plate, key=None, gate="north", seconds=0):
+    event = {"event": "IN", "plate": plate, "group": "green", "gate": gate,
+             "time": (NOW + timedelta(seconds=seconds)).isoformat()}
+    if key is not None:
+        event["id"] = key
+    return event
+
+
+def test_key_evicted_during_the_batch(api, monkeypatch):
+    monkeypatch.setattr(api, "idempotency", IdempotencyCache(max_keys=1))
+    client = api.app.test_client()
+    assert _post(client, _park_in("A1", "a"))["accepted"] == 1
+
+    # recording "b" evicts "a", which this batch repeats
+    reply = _post(client, _park_in("B2", "b"), _park_in("A1", "a"))
+
+    assert reply["accepted"] == 2
+    assert api.get_store().count("Green (Commuters)") == 2
+
+
+def test_concurrent_retries_are_applied_once(api):
+    client = api.app.test_client()
+    api.get_store()
+    replies = []
+    start = threading.Barrier(8)
+
+    def retry():
+        start.wait()
+        replies.append(_post(client, _park_in("R1", "retry-1")))
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        threads = [threading.Thread(target=retry) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert [r["accepted"] for r in replies] == [1] * 8
+    assert api.get_store().count("Green (Commuters)") == 1
+
+
+def test_out_right_after_in_at_one_gate_is_not_a_repeat(api):
+    client = api.app.test_client()
+    out = {"event": "OUT", "plate": "T1", "gate": "north",
+           "time": (NOW + timedelta(seconds=5)).isoformat()}
+
+    reply = _post(client, _park_in("T1"), out, _park_in("T1", seconds=8))
+
+    assert reply["rejected"] == [{"index": 2, "status": "repeat_read"}]
+    assert api.get_store().count("Green (Commuters)") == 0
+
+
+def test_repeat_filter_keys_on_event():
+    reads = RepeatReadFilter()
+    assert not reads.is_repeat("IN", "P", "g", NOW)
+    assert reads.is_repeat("IN", "P", "g", NOW + timedelta(seconds=1))
+    assert not reads.is_repeat("OUT", "P", "g", NOW + timedelta(seconds=2))
+
+
+def test_future_event_is_rejected(api):
+    client = api.app.test_client()
+    future = dict(_park_in("F1"), time="2099-01-01T08:00:00")
+    skewed = _park_in("F2", seconds=5 * 60 + 60)  # a minute or so ahead of our clock
+
+    reply = _post(client, future, skewed, _park_in("F3"))
+
+    assert reply["rejected"] == [{"index": 0, "status": "invalid"}]
+    assert not api.get_store().is_parked("F1")
+
+
+def test_future_read_does_not_end_suppression():
+    reads = RepeatReadFilter()
+    now = datetime.now()
+    assert not reads.is_repeat("IN", "P", "g", now - timedelta(seconds=2))
+    reads.is_repeat("IN", "Q", "g", datetime(2099, 1, 1))
+
+    assert reads.is_repeat("IN", "P", "g", now - timedelta(seconds=1))
+
+
+def test_batch_with_nothing_accepted_is_422(api):
+    client = api.app.test_client()
+    assert _post(client, _park_in("N1"))["accepted"] == 1
+
+    invalid, repeat, not_parked = {"event": "IN"}, _park_in("N1", seconds=1), {"event": "OUT", "plate": "N9"}
+    reply = _post(client, invalid, repeat, not_parked, status=422)
+
+    assert [r["status"] for r in reply["rejected"]] == ["invalid", "repeat_read", "not_parked"]
+    assert _post(client)["received"] == 0  # an empty batch rejects nothing
@@ -0,0 +1,50 @@
+"""Overlapping profiled runs share the process's one cProfile."""
+import os
+import threading
+
+from parking_profile import RerunProfile
+
+
+def _busy():
+    return sum(i * i for i in range(20_000))
+
+
+def test_overlapping_run_falls_back_to_the_sampler(tmp_path):
+    first = RerunProfile("script", interval=0.001).start()
+    second = {}
+    started, done = threading.Event(), threading.Event()
+
+    def other_session():
+        run = second["run"] = RerunProfile("script", interval=0.001).start()
+        started.set()
+        done.wait()
+        _busy()
+        second["stem"] = run.save(str(tmp_path), run.stop())
+
+    thread = threading.Thread(target=other_session)
+    thread.start()
+    started.wait()
+    _busy()
+    stem = first.save(str(tmp_path), first.stop())
+    done.set()
+    thread.join()
+
+    assert first.profile is not None and second["run"].profile is None
+    assert os.path.exists(stem + ".pstats") and os.path.exists(stem + ".collapsed")
+    assert not os.path.exists(second["stem"] + ".pstats")
+    assert os.path.exists(second["stem"] + ".collapsed")
+
+    third = RerunProfile("script").start()  # free again once the first run stopped
+    third.stop()
+    assert third.profile is not None
+
+
+def test_run_whose_thread_died_gives_cprofile_back():
+    thread = threading.Thread(target=lambda: RerunProfile("script").start())
+    thread.start()
+    thread.join()  # never stopped, as when a session goes away mid-run
+
+    run = RerunProfile("script").start()
+    run.stop()
+
+    assert run.profile is not None
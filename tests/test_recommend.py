@@ -0,0 +1,32 @@
+"""``?limit=`` on GET /recommend."""
+import pytest
+
+from parking_config import LOT_CAPACITY
+
+QUERY = {"destination": "Library", "group": "green"}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = pytest.importorskip("fairfield_parking_api")
+    monkeypatch.setattr(api, "_feed", None)
+    return api.app.test_client()
+
+
+@pytest.mark.parametrize("limit", ["0", "-2"])
+def test_rejects_limit_below_one(client, limit):
+    response = client.get("/recommend", query_string={**QUERY, "limit": limit})
+    assert response.status_code == 400
+
+
+def test_caps_limit_at_the_number_of_lots(client):
+    response = client.get("/recommend", query_string={**QUERY, "limit": 10**9})
+    assert response.status_code == 200
+    assert 1 <= len(response.get_json()["recommendations"]) <= len(LOT_CAPACITY)
+
+
+def test_default_limit(client):
+    response = client.get("/recommend", query_string=QUERY)
+    assert response.status_code == 200
+    assert 1 <= len(response.get_json()["recommendations"]) <= 3
@@ -0,0 +1,70 @@
+"""The rollup's sweep line against an hour-by-hour walk of every session."""
+import numpy as np
+import pandas as pd
+
+from parking_config import LOT_GROUP
+from parking_rollup import KEY_INDEX, KEYS, OccupancyRollup
+
+HOUR = pd.Timedelta(hours=1)
+
+
+def _sessions(n=400, seed=7):
+    rng = np.random.default_rng(seed)
+    lots = rng.choice(sorted(LOT_GROUP), n)
+    entry = pd.Timestamp("2026-02-02") + pd.to_timedelta(rng.integers(0, 21 * 86_400, n), unit="s")
+    stay = pd.to_timedelta(rng.integers(0, 30 * 3_600, n), unit="s")
+    exit_ = pd.Series(entry + stay)
+    exit_[rng.random(n) < 0.1] = pd.NaT  # still parked
+    return pd.DataFrame({
+        "Plate": [f"P{i}" for i in range(n)],
+        "Lot": [LOT_GROUP[lot] for lot in lots],
+        "Entry": entry,
+        "Exit": exit_,
+        "LotCode": np.where(rng.random(n) < 0.2, None, lots),  # some rows predate lot codes
+    })
+
+
+def _walk(sessions):
+    car_hours = np.zeros((len(KEYS), 7 * 24))
+    closed = sessions[sessions["Exit"].notna() & (sessions["Exit"] > sessions["Entry"])]
+    for lot, entry, exit_, lot_code in closed[["Lot", "Entry", "Exit", "LotCode"]].itertuples(index=False):
+        for key in (lot, lot_code):
+            if key not in KEY_INDEX:
+                continue
+            t = entry
+            while t < exit_:
+                start = t.floor("h")
+                end = min(start + HOUR, exit_)
+                car_hours[KEY_INDEX[key], start.weekday() * 24 + start.hour] += (end - t) / HOUR
+                t = end
+    observed = np.zeros(7 * 24)
+    for hour in pd.date_range(closed["Entry"].min().floor("h"), closed["Exit"].max().floor("h"), freq="h"):
+        observed[hour.weekday() * 24 + hour.hour] += 1
+    return car_hours, observed
+
+
+def test_rebuild_matches_hour_by_hour_walk():
+    sessions = _sessions()
+    rollup = OccupancyRollup()
+    rollup.rebuild(sessions)
+
+    car_hours, observed = _walk(sessions)
+
+    np.testing.assert_allclose(rollup.car_hours, car_hours, atol=1e-9)
+    np.testing.assert_array_equal(rollup.observed, observed)
+    assert rollup.sessions == int((sessions["Exit"] > sessions["Entry"]).sum())
+
+
+def test_refresh_in_exit_order_matches_rebuild():
+    sessions = _sessions(seed=11)
+    by_exit = sessions.sort_values("Exit", ignore_index=True)
+    rollup = OccupancyRollup()
+    for end in (100, 250, len(by_exit)):
+        rollup.refresh(by_exit.iloc[:end])
+
+    full = OccupancyRollup()
+    full.rebuild(sessions)
+
+    np.testing.assert_allclose(rollup.car_hours, full.car_hours, atol=1e-9)
+    np.testing.assert_array_equal(rollup.observed, full.observed)
+    assert rollup.sessions == full.sessions
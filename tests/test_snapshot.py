@@ -0,0 +1,136 @@
+"""Cold start from a journal snapshot, and falling back to a full replay."""
+import os
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from parking_archive import HistoryArchive
+from parking_config import CAPACITY, LOT_CAPACITY, LOTS
+from parking_journal import SNAPSHOT_SUFFIX, JournalTail
+from parking_occupancy import OccupancyIndex
+from parking_store import JournalStore
+
+NOW = datetime(2026, 3, 2, 9, 30)
+
+
+def _park(store, rng, events, start):
+    """``events`` random PARK IN/OUTs, one second apart from ``start``."""
+    parked = set(store.active_all()["Plate"])
+    for i in range(events):
+        when = start + timedelta(seconds=i)
+        if parked and (len(parked) > 60 or rng.random() < 0.45):
+            plate = rng.choice(sorted(parked))
+            store.park_out(plate, when)
+            parked.discard(plate)
+        else:
+            plate = f"S{start:%H%M%S}-{i}"
+            group = rng.choice(list(CAPACITY))
+            lot = rng.choice(LOTS[group])
+            store.park_in(plate, group, when, CAPACITY[group], lot, LOT_CAPACITY[lot])
+            parked.add(plate)
+
+
+def _replayed(journal):
+    """The same view from a plain replay of the journal, no snapshot."""
+    reference = OccupancyIndex(CAPACITY.keys())
+    tail = JournalTail(journal, listeners=[reference])
+    tail.refresh()
+    return tail, reference
+
+
+def _check_against_replay(store, journal):
+    tail, reference = _replayed(journal)
+    pd.testing.assert_frame_equal(store.sessions().astype(str), tail.frame().astype(str))
+    assert {g: store.count(g) for g in CAPACITY} == {g: reference.count(g) for g in CAPACITY}
+    assert store.lot_usage() == reference.lot_usage()
+    for group in CAPACITY:
+        pd.testing.assert_frame_equal(store.active(group), reference.roster(group))
+    assert store.tail.open_rows == tail.open_rows
+
+
+def _opened(journal):
+    """A new store on ``journal`` that has loaded it (snapshot, then the rest)."""
+    store = JournalStore(journal, CAPACITY.keys())
+    store.count(next(iter(CAPACITY)))
+    return store
+
+
+@pytest.fixture
+def journal(tmp_path):
+    path = str(tmp_path / "events.csv")
+    with JournalStore(path, CAPACITY.keys()) as store:
+        _park(store, random.Random(1), 400, NOW - timedelta(days=3))
+        store.tail.save_snapshot()
+    return path
+
+
+def test_restore_matches_replay(journal):
+    with _opened(journal) as store:
+        assert store.tail.restored_from == os.path.getsize(journal)
+        _check_against_replay(store, journal)
+
+
+def test_restore_then_replay_new_appends(journal):
+    with JournalStore(journal, CAPACITY.keys()) as writer:
+        _park(writer, random.Random(2), 150, NOW - timedelta(days=2))  # closes snapshot sessions too
+
+    with _opened(journal) as store:
+        assert 0 < store.tail.restored_from < os.path.getsize(journal)
+        _check_against_replay(store, journal)
+
+
+def test_crc_mismatch_replays_from_the_start(journal):
+    with open(journal, "r+b") as fh:  # same size, one plate renamed before the offset
+        data = fh.read()
+        fh.seek(data.rindex(b",S") + 1)
+        fh.write(b"T")
+
+    with _opened(journal) as store:
+        assert store.tail.restored_from is None
+        _check_against_replay(store, journal)
+
+
+def test_archived_journal_does_not_reuse_the_old_snapshot(journal, tmp_path):
+    with open(journal + SNAPSHOT_SUFFIX, "rb") as fh:
+        stale = fh.read()
+    with JournalStore(journal, CAPACITY.keys()) as store:
+        archive = HistoryArchive(str(tmp_path / "archive"))
+        assert store.archive_closed(NOW - timedelta(days=1), archive) > 0
+
+    with _opened(journal) as store:
+        assert store.tail.restored_from == os.path.getsize(journal)  # the snapshot written after
+        _check_against_replay(store, journal)
+
+    with open(journal + SNAPSHOT_SUFFIX, "wb") as fh:  # as if that write never happened
+        fh.write(stale)
+    with _opened(journal) as store:
+        assert store.tail.restored_from is None
+        _check_against_replay(store, journal)
+
+
+def test_torn_snapshot_replays_from_the_start(journal):
+    snapshot = journal + SNAPSHOT_SUFFIX
+    with open(snapshot, "r+b") as fh:
+        fh.truncate(os.path.getsize(snapshot) // 2)
+
+    with _opened(journal) as store:
+        assert store.tail.restored_from is None
+        _check_against_replay(store, journal)
+
+
+def test_write_killed_midway_leaves_the_previous_snapshot(journal):
+    snapshot = journal + SNAPSHOT_SUFFIX
+    with open(snapshot, "rb") as fh:
+        data = fh.read()
+    torn = f"{snapshot}.99999-1.tmp"  # a writer killed halfway through
+    with open(torn, "wb") as fh:
+        fh.write(data[: len(data) // 3])
+    old = os.path.getmtime(torn) - 3600
+    os.utime(torn, (old, old))
+
+    with _opened(journal) as store:
+        assert store.tail.restored_from == os.path.getsize(journal)
+        assert not os.path.exists(torn)  # cleaned up once stale
+        _check_against_replay(store, journal)
@@ -0,0 +1,43 @@
+"""Seeding a new SQLite database from the legacy history CSV."""
+import pandas as pd
+import pytest
+
+from parking_config import CAPACITY
+from parking_store import SQLiteStore
+
+LEGACY = (
+    "Plate,Lot,Entry,Exit\n"
+    "A1,Green (Commuters),2026-01-05 08:00:00,2026-01-05 10:00:00.250000\n"
+    "B2,Blue (Faculty),2026-01-06 09:00:00.500000,\n"
+)
+
+
+def _legacy(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text(LEGACY)
+    return str(path)
+
+
+def test_import_with_mixed_timestamp_precision(tmp_path):
+    store = SQLiteStore(str(tmp_path / "parking.db"), CAPACITY.keys(), legacy_csv=_legacy(tmp_path))
+
+    df = store.sessions().sort_values("Entry", ignore_index=True)
+    assert df["Plate"].tolist() == ["A1", "B2"]
+    assert df["Exit"][0] == pd.Timestamp("2026-01-05 10:00:00.25")
+    assert store.count("Blue (Faculty)") == 1
+
+
+def test_failed_import_is_retried_on_next_open(tmp_path, monkeypatch):
+    db, legacy = str(tmp_path / "parking.db"), _legacy(tmp_path)
+
+    def fail(self, df):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(SQLiteStore, "_import", fail)
+        with pytest.raises(OSError):
+            SQLiteStore(db, CAPACITY.keys(), legacy_csv=legacy)
+
+    assert len(SQLiteStore(db, CAPACITY.keys(), legacy_csv=legacy).sessions()) == 2
+    # and only once
+    assert len(SQLiteStore(db, CAPACITY.keys(), legacy_csv=legacy).sessions()) == 2
@@ -0,0 +1,112 @@
+"""Store queries against plain pandas over the same sessions, both backends.
+
+For SQLite, queries pinned to ``sessions_open_by_lot`` with INDEXED BY are
+also run as full scans (NOT INDEXED) and must return the same rows.
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from parking_config import CAPACITY, LOT_GROUP
+from parking_journal import write_journal
+from parking_store import SESSION_COLUMNS, open_store
+
+CUTOFF = datetime(2026, 1, 12, 12, 0)
+
+
+def _sessions(n=600, seed=5):
+    rng = np.random.default_rng(seed)
+    lots = rng.choice(sorted(LOT_GROUP), n)
+    seconds = np.sort(rng.choice(10 * 86_400, n, replace=False))  # distinct Entry times
+    entry = pd.Timestamp("2026-01-05") + pd.to_timedelta(seconds, unit="s")
+    exit_ = pd.Series(entry + pd.to_timedelta(rng.integers(60, 9 * 3_600, n), unit="s"))
+    still_parked = rng.random(n) < 0.25
+    exit_[still_parked] = pd.NaT
+    plates = rng.choice(["AB1", "AB2", "AC3", "X9", "X10"], n).astype(object)
+    # a plate is open at most once: open sessions get their own plates
+    open_rows = np.flatnonzero(still_parked)
+    plates[open_rows] = [f"{plates[i]}-{i}" for i in open_rows]
+    return pd.DataFrame({
+        "Plate": plates,
+        "Lot": [LOT_GROUP[lot] for lot in lots],
+        "Entry": entry,
+        "Exit": exit_,
+        "LotCode": lots,
+    })
+
+
+@pytest.fixture(scope="module")
+def sessions():
+    return _sessions()
+
+
+@pytest.fixture(scope="module", params=["journal", "sqlite"])
+def store(request, sessions, tmp_path_factory):
+    root = tmp_path_factory.mktemp(request.param)
+    journal = str(root / "events.csv")
+    write_journal(journal, sessions[SESSION_COLUMNS].itertuples(index=False))
+    return open_store(CAPACITY.keys(), journal, str(root / "parking.db"), backend=request.param)
+
+
+def _rows(df):
+    return [
+        (str(plate), str(lot), pd.Timestamp(entry))
+        for plate, lot, entry in df[["Plate", "Lot", "Entry"]].itertuples(index=False)
+    ]
+
+
+def test_open_sessions(store, sessions):
+    parked = sessions[sessions["Exit"].isna()].sort_values("Entry")
+    for group in CAPACITY:
+        expected = parked[parked["Lot"] == group]
+        assert store.count(group) == len(expected)
+        assert _rows(store.active(group)) == _rows(expected)
+    assert sorted(_rows(store.active_all())) == sorted(_rows(parked))  # no order is promised
+    assert _rows(store.parked_before(CUTOFF)) == _rows(parked[parked["Entry"] < CUTOFF])
+    assert store.lot_usage() == {lot: int((parked["LotCode"] == lot).sum()) for lot in LOT_GROUP}
+
+
+@pytest.mark.parametrize("offset, limit, filters", [
+    (0, 50, {}),
+    (123, 40, {}),
+    (590, 50, {}),
+    (0, 25, {"plate": "AB"}),
+    (10, 25, {"plate": "X1", "group": "Blue (Faculty)"}),
+    (3, 30, {"group": "Green (Commuters)", "start": date(2026, 1, 7), "end": date(2026, 1, 11)}),
+])
+def test_history_pages(store, sessions, offset, limit, filters):
+    matching = sessions
+    if "plate" in filters:
+        matching = matching[matching["Plate"].str.startswith(filters["plate"])]
+    if "group" in filters:
+        matching = matching[matching["Lot"] == filters["group"]]
+    if "start" in filters:
+        matching = matching[matching["Entry"].dt.date >= filters["start"]]
+    if "end" in filters:
+        matching = matching[matching["Entry"].dt.date <= filters["end"]]
+    expected = matching.sort_values("Entry", ascending=False).iloc[offset:offset + limit]
+
+    page, total = store.history(offset, limit, **filters)
+
+    assert total == len(matching)
+    assert _rows(page) == _rows(expected)
+
+
+def test_indexed_by_matches_full_scan(store):
+    if not hasattr(store, "_conn"):
+        pytest.skip("SQLite only")
+    conn = store._conn()
+    queries = [
+        "SELECT plate, lot, entry, lot_code FROM sessions INDEXED BY sessions_open_by_lot "
+        "WHERE lot = ? AND exit IS NULL ORDER BY entry",
+        "SELECT COUNT(*) FROM sessions INDEXED BY sessions_open_by_lot "
+        "WHERE lot = ? AND exit IS NULL",
+    ]
+    for sql in queries:
+        for group in CAPACITY:
+            indexed = conn.execute(sql, (group,)).fetchall()
+            scanned = conn.execute(sql.replace("INDEXED BY sessions_open_by_lot", "NOT INDEXED"),
+                                   (group,)).fetchall()
+            assert indexed == scanned